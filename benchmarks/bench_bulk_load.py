@@ -0,0 +1,114 @@
+"""
+Benchmark: rows/sec of each bulk-load strategy (see db.bulk_load).
+
+Loads the same --rows synthetic rows (INT, NVARCHAR, DECIMAL, DATETIME2,
+BIT columns) into a scratch table once per strategy, in chunks of
+--chunk-size validated rows, as one transaction, and prints seconds,
+rows/sec and speedup over executemany. The table is emptied between runs
+and dropped afterwards unless --keep is given.
+
+    executemany   fast_executemany INSERT batches
+    tvp           table-valued parameter per chunk
+    bulk_insert   staged CSV file + BULK INSERT; the server must be able to
+                  read --staging-dir (default: the temp folder, local servers only)
+
+Usage:
+    python -m benchmarks.bench_bulk_load \\
+        --conn-str "DRIVER={ODBC Driver 17 for SQL Server};SERVER=localhost\\SQLEXPRESS;DATABASE=bench;Trusted_Connection=yes;TrustServerCertificate=yes;" \\
+        --rows 1000000 --strategies executemany,tvp,bulk_insert
+"""
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from db.bulk_load import BulkLoadUnavailable, open_bulk_loader
+from db.db_utils import fetch_insert_metadata
+from db.insert_validation import validate_insert_frame
+
+TABLE = "bench_bulk_load"
+
+
+def _create_table(conn):
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS [{TABLE}]")
+    cursor.execute(
+        f"CREATE TABLE [{TABLE}] (id INT NOT NULL, name NVARCHAR(100) NULL, "
+        f"amount DECIMAL(18, 2) NULL, created DATETIME2 NULL, active BIT NULL)"
+    )
+    conn.commit()
+
+
+def _make_chunks(rows, chunk_size, col_meta):
+    base = np.datetime64("2024-01-01T08:30:00")
+    chunks = []
+    for start in range(0, rows, chunk_size):
+        i = np.arange(start, min(start + chunk_size, rows))
+        df = pd.DataFrame({
+            "id": i,
+            "name": [f"Customer {v}" for v in i],
+            "amount": (i * 7919 % 10_000_000) / 100,
+            "created": base + (i * 37).astype("timedelta64[s]"),
+            "active": i % 2 == 1,
+        })
+        chunks.append(validate_insert_frame(df, col_meta, first_row=start + 1))
+    return chunks
+
+
+def _run(conn, strategy, chunks, col_meta, staging_dir):
+    conn.cursor().execute(f"TRUNCATE TABLE [{TABLE}]")
+    conn.commit()
+    start = time.perf_counter()
+    loader = open_bulk_loader(conn, TABLE, list(chunks[0].columns), col_meta, strategy,
+                              staging_dir=staging_dir)
+    try:
+        rows = sum(loader.load(df) for df in chunks)
+        loader.flush()
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        loader.close()
+    return rows, time.perf_counter() - start
+
+
+def main():
+    import pyodbc
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conn-str", required=True, help="ODBC connection string")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    parser.add_argument("--strategies", default="executemany,tvp,bulk_insert",
+                        help="Comma-separated strategies (executemany, tvp, bulk_insert)")
+    parser.add_argument("--staging-dir", help="Folder the server can read, for bulk_insert")
+    parser.add_argument("--keep", action="store_true", help="Do not drop the scratch table")
+    args = parser.parse_args()
+
+    conn = pyodbc.connect(args.conn_str)
+    _create_table(conn)
+    conn.autocommit = False
+    try:
+        col_meta = fetch_insert_metadata(conn, TABLE)
+        chunks = _make_chunks(args.rows, args.chunk_size, col_meta)
+        print(f"{'strategy':<12} {'rows':>12} {'seconds':>9} {'rows/sec':>12} {'speedup':>8}")
+        baseline = None
+        for strategy in args.strategies.split(","):
+            try:
+                rows, seconds = _run(conn, strategy, chunks, col_meta, args.staging_dir)
+            except BulkLoadUnavailable as e:
+                print(f"{strategy:<12} unavailable: {e}")
+                continue
+            baseline = baseline or seconds
+            print(f"{strategy:<12} {rows:>12,} {seconds:>9.2f} {rows / seconds:>12,.0f} {baseline / seconds:>7.2f}x")
+    finally:
+        conn.autocommit = True
+        if not args.keep:
+            conn.cursor().execute(f"DROP TABLE IF EXISTS [{TABLE}]")
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
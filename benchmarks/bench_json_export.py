@@ -0,0 +1,114 @@
+"""
+Benchmark: JSON export paths, output size and write throughput.
+
+Writes the same synthetic rows (int, text, DECIMAL, DATETIME2, VARBINARY,
+UNIQUEIDENTIFIER, BIT and NULL columns) with:
+
+    pandas      DataFrame.to_json(orient="records", indent=2), the old
+                ExportWorker path (whole JSON text built in memory)
+    indent=2    json.dumps(record, indent=2, default=str) per record
+    JSON        JsonExportWriter (compact records, fast type handling)
+    JSON Lines  JsonLinesExportWriter
+
+in chunks of --chunk-size rows and prints seconds, rows/sec, MB and MB/sec.
+No database is needed.
+
+Usage:
+    python -m benchmarks.bench_json_export --rows 200000 --chunk-size 10000
+"""
+import argparse
+import datetime
+import decimal
+import json
+import os
+import tempfile
+import time
+import uuid
+
+from core.export_writers import open_export_writer
+
+HEADERS = ["id", "name", "amount", "created", "payload", "guid", "active", "note"]
+
+
+def _make_rows(count):
+    base = datetime.datetime(2024, 1, 1, 8, 30)
+    return [
+        (
+            i,
+            f"Customer {i}",
+            decimal.Decimal(i * 7919 % 1000000) / 100,
+            base + datetime.timedelta(seconds=i * 37),
+            (i % 65536).to_bytes(2, "big") * 8,
+            uuid.UUID(int=i * 2654435761 % (1 << 128)),
+            bool(i % 2),
+            None,
+        )
+        for i in range(count)
+    ]
+
+
+def _chunks(rows, size):
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
+
+def _pandas(rows, path, chunk_size):
+    import pandas as pd
+    df = pd.DataFrame(rows, columns=HEADERS)
+    df["payload"] = df["payload"].map(bytes.hex)   # to_json cannot encode bytes
+    df["guid"] = df["guid"].astype(str)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(df.to_json(orient="records", indent=2))
+
+
+def _indented(rows, path, chunk_size):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        first = True
+        for chunk in _chunks(rows, chunk_size):
+            parts = []
+            for row in chunk:
+                parts.append(("\n" if first else ",\n") + json.dumps(dict(zip(HEADERS, row)), indent=2, default=str))
+                first = False
+            f.write("".join(parts))
+        f.write("\n]\n")
+
+
+def _writer(format_choice):
+    def run(rows, path, chunk_size):
+        writer = open_export_writer(format_choice, path, HEADERS)
+        for chunk in _chunks(rows, chunk_size):
+            writer.write_rows(chunk)
+        writer.close()
+    return run
+
+
+PATHS = [
+    ("pandas", _pandas),
+    ("indent=2", _indented),
+    ("JSON", _writer("JSON")),
+    ("JSON Lines", _writer("JSON Lines")),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--chunk-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    rows = _make_rows(args.rows)
+    print(f"{'path':<11} {'seconds':>8} {'rows/sec':>11} {'MB':>8} {'MB/sec':>8}")
+    with tempfile.TemporaryDirectory(prefix="esqli_bench_") as out_dir:
+        for name, run in PATHS:
+            path = os.path.join(out_dir, "out.json")
+            start = time.perf_counter()
+            run(rows, path, args.chunk_size)
+            seconds = time.perf_counter() - start
+            mb = os.path.getsize(path) / 1e6
+            print(f"{name:<11} {seconds:>8.2f} {len(rows) / seconds:>11,.0f} {mb:>8.1f} {mb / seconds:>8.1f}")
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
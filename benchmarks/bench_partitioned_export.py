@@ -0,0 +1,101 @@
+"""
+Benchmark: key-range parallel export of one large table vs worker count.
+
+Exports the same table once per --workers value with
+iter_table_ranges_parallel() into one file, in key order, and prints time,
+rows/sec and speedup over the first value (normally 1, a single connection).
+
+Without --table a scratch table of --rows rows (INT identity primary key
+plus a few payload columns) is created and dropped afterwards unless
+--keep is given. Output files go to a temp folder that is removed again.
+
+Usage:
+    python -m benchmarks.bench_partitioned_export \\
+        --conn-str "DRIVER={ODBC Driver 17 for SQL Server};SERVER=localhost\\SQLEXPRESS;DATABASE=bench;Trusted_Connection=yes;TrustServerCertificate=yes;" \\
+        --rows 2000000 --workers 1,2,4,8
+"""
+import argparse
+import os
+import shutil
+import tempfile
+import time
+
+from core.database_export import iter_table_ranges_parallel
+from core.export_writers import EXPORT_FORMATS, open_export_writer
+
+TABLE = "bench_partitioned_export"
+
+
+def _create_table(conn, rows):
+    cursor = conn.cursor()
+    cursor.execute(f"DROP TABLE IF EXISTS [{TABLE}]")
+    cursor.execute(
+        f"CREATE TABLE [{TABLE}] (id INT IDENTITY(1,1) PRIMARY KEY, name NVARCHAR(100) NOT NULL, "
+        f"amount DECIMAL(18, 2) NOT NULL, created DATETIME2 NOT NULL)"
+    )
+    cursor.execute(f"""
+        INSERT INTO [{TABLE}] (name, amount, created)
+        SELECT TOP ({int(rows)})
+            CONCAT(N'name ', ROW_NUMBER() OVER (ORDER BY (SELECT NULL))),
+            ABS(CHECKSUM(NEWID())) % 100000 / 100.0,
+            DATEADD(SECOND, ABS(CHECKSUM(NEWID())) % 31536000, '2024-01-01')
+        FROM sys.all_objects a CROSS JOIN sys.all_objects b CROSS JOIN sys.all_objects c
+    """)
+    cursor.execute(f"UPDATE STATISTICS [{TABLE}]")
+    conn.commit()
+
+
+def _run(factory, table, workers, out_dir, format_choice, chunk_size):
+    path = os.path.join(out_dir, f"merged.{EXPORT_FORMATS[format_choice][0]}")
+    writer = None
+    for columns, rows in iter_table_ranges_parallel(factory, table, workers, chunk_size):
+        writer = writer or open_export_writer(format_choice, path, columns)
+        writer.write_rows(rows)
+    writer.close()
+    return writer.rows_written
+
+
+def main():
+    import pyodbc
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conn-str", required=True, help="ODBC connection string")
+    parser.add_argument("--table", help="Existing table to export (default: create a scratch table)")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Rows in the scratch table")
+    parser.add_argument("--workers", default="1,2,4,8", help="Comma-separated worker counts")
+    parser.add_argument("--format", default="CSV", help="Export format (CSV, JSON, JSON Lines, Excel, Parquet, Arrow)")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--keep", action="store_true", help="Do not drop the scratch table")
+    args = parser.parse_args()
+
+    factory = lambda: pyodbc.connect(args.conn_str)
+    setup = pyodbc.connect(args.conn_str)
+    table = args.table
+    if table is None:
+        print(f"Creating {args.rows:,} rows in [{TABLE}]…")
+        _create_table(setup, args.rows)
+        table = TABLE
+
+    workers = [int(w) for w in args.workers.split(",")]
+    out_dir = tempfile.mkdtemp(prefix="esqli_bench_")
+    try:
+        print(f"{'workers':>8} {'rows':>12} {'seconds':>9} {'rows/sec':>12} {'speedup':>8}")
+        baseline = None
+        for n in workers:
+            start = time.perf_counter()
+            rows = _run(factory, table, n, out_dir, args.format, args.chunk_size)
+            seconds = time.perf_counter() - start
+            baseline = baseline or seconds
+            print(f"{n:>8} {rows:>12,} {seconds:>9.2f} {rows / seconds:>12,.0f} {baseline / seconds:>7.2f}x")
+            for name in os.listdir(out_dir):
+                os.remove(os.path.join(out_dir, name))
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+        if args.table is None and not args.keep:
+            setup.cursor().execute(f"DROP TABLE IF EXISTS [{TABLE}]")
+            setup.commit()
+        setup.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Benchmark: pandas SELECT path vs the columnar cursor fetch path.
+
+Compares the old interactive path (pd.read_sql_query + df.values.tolist())
+with ColumnarResult.from_cursor() on a narrow and a wide result set,
+reporting rows/sec and peak Python memory (tracemalloc).
+
+By default an in-memory SQLite database is used so only the client-side
+cost is measured. Pass --conn-str to run the same queries against SQL
+Server through pyodbc (the tables are created in tempdb as #temp tables).
+
+Usage:
+    python -m benchmarks.bench_query_fetch --rows 200000
+"""
+import argparse
+import gc
+import sqlite3
+import time
+import tracemalloc
+
+from db.result_set import ColumnarResult
+
+SHAPES = {
+    "narrow": 4,
+    "wide": 60,
+}
+
+
+def _create_table(conn, name, n_cols, n_rows, temp_prefix=""):
+    cols = ", ".join(
+        f"c{i} INT NULL" if i % 3 == 0 else
+        f"c{i} FLOAT NULL" if i % 3 == 1 else
+        f"c{i} VARCHAR(32) NULL"
+        for i in range(n_cols)
+    )
+    table = f"{temp_prefix}{name}"
+    cursor = conn.cursor()
+    cursor.execute(f"CREATE TABLE {table} ({cols})")
+    placeholders = ", ".join("?" * n_cols)
+
+    def make_row(r):
+        return tuple(
+            (None if r % 10 == 0 else r) if i % 3 == 0 else
+            r * 0.5 if i % 3 == 1 else
+            f"value-{r}-{i}"
+            for i in range(n_cols)
+        )
+
+    batch = [make_row(r) for r in range(n_rows)]
+    if hasattr(cursor, "fast_executemany"):
+        cursor.fast_executemany = True
+    cursor.executemany(f"INSERT INTO {table} VALUES ({placeholders})", batch)
+    conn.commit()
+    return table
+
+
+def _pandas_path(conn, sql):
+    import pandas as pd
+    df = pd.read_sql_query(sql, conn)
+    return list(df.columns), df.values.tolist()
+
+
+def _columnar_path(conn, sql):
+    cursor = conn.cursor()
+    cursor.execute(sql)
+    result = ColumnarResult.from_cursor(cursor)
+    cursor.close()
+    return result.columns, result
+
+
+def _measure(fn, conn, sql):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    _, rows = fn(conn, sql)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n = len(rows)
+    del rows
+    return n, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--conn-str", default=None, help="Optional ODBC connection string for SQL Server")
+    args = parser.parse_args()
+
+    if args.conn_str:
+        import pyodbc
+        conn = pyodbc.connect(args.conn_str, autocommit=False)
+        prefix = "#"
+    else:
+        conn = sqlite3.connect(":memory:")
+        prefix = ""
+
+    print(f"{'shape':<8} {'path':<10} {'rows':>9} {'rows/sec':>12} {'peak MB':>9}")
+    for shape, n_cols in SHAPES.items():
+        table = _create_table(conn, f"bench_{shape}", n_cols, args.rows, prefix)
+        sql = f"SELECT * FROM {table}"
+        for label, fn in (("pandas", _pandas_path), ("columnar", _columnar_path)):
+            n, elapsed, peak = _measure(fn, conn, sql)
+            print(f"{shape:<8} {label:<10} {n:>9} {n / elapsed:>12,.0f} {peak / 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Benchmark: per-table INFORMATION_SCHEMA lookups vs one bulk schema load.
+
+Creates --tables tables (a few columns each, with a primary key and an
+identity column) in a scratch schema, then compares:
+
+    per-table   fetch_table_schema() once per table (the old path)
+    bulk        fetch_database_schema() for the whole database
+
+and prints total time, tables/sec and round trips. The tables are dropped
+afterwards unless --keep is given.
+
+Usage:
+    python -m benchmarks.bench_schema_load \\
+        --conn-str "DRIVER={ODBC Driver 17 for SQL Server};SERVER=localhost\\SQLEXPRESS;DATABASE=bench;Trusted_Connection=yes;TrustServerCertificate=yes;" \\
+        --tables 5000
+"""
+import argparse
+import time
+
+from db.db_utils import fetch_database_schema, fetch_table_schema
+
+PREFIX = "bench_schema_"
+
+
+def _create_tables(conn, count):
+    cursor = conn.cursor()
+    for i in range(count):
+        cursor.execute(
+            f"IF OBJECT_ID('{PREFIX}{i}') IS NULL "
+            f"CREATE TABLE [{PREFIX}{i}] ("
+            f"id INT IDENTITY(1,1) PRIMARY KEY, name NVARCHAR(100) NULL, "
+            f"amount DECIMAL(18, 2) NOT NULL, created DATETIME2 NULL, flag BIT NULL)"
+        )
+    conn.commit()
+
+
+def _drop_tables(conn, count):
+    cursor = conn.cursor()
+    for i in range(count):
+        cursor.execute(f"DROP TABLE IF EXISTS [{PREFIX}{i}]")
+    conn.commit()
+
+
+def main():
+    import pyodbc
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conn-str", required=True, help="ODBC connection string")
+    parser.add_argument("--tables", type=int, default=2000)
+    parser.add_argument("--keep", action="store_true", help="Do not drop the benchmark tables")
+    args = parser.parse_args()
+
+    conn = pyodbc.connect(args.conn_str, autocommit=True)
+    print(f"Creating {args.tables} tables…")
+    _create_tables(conn, args.tables)
+    try:
+        names = [f"{PREFIX}{i}" for i in range(args.tables)]
+
+        start = time.perf_counter()
+        per_table = {name: fetch_table_schema(conn, name) for name in names}
+        t_per_table = time.perf_counter() - start
+
+        start = time.perf_counter()
+        bulk, _ = fetch_database_schema(conn)
+        t_bulk = time.perf_counter() - start
+
+        mismatched = [n for n in names if per_table[n] != bulk.get(n)]
+        print(f"{'path':<10} {'seconds':>9} {'tables/sec':>12} {'round trips':>12}")
+        print(f"{'per-table':<10} {t_per_table:>9.2f} {len(names) / t_per_table:>12,.0f} {len(names):>12}")
+        print(f"{'bulk':<10} {t_bulk:>9.2f} {len(bulk) / t_bulk:>12,.0f} {1:>12}")
+        if mismatched:
+            print(f"[WARN] {len(mismatched)} tables differ between the two paths, e.g. {mismatched[0]}")
+    finally:
+        if not args.keep:
+            _drop_tables(conn, args.tables)
+
+
+if __name__ == "__main__":
+    main()
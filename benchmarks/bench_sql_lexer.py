@@ -0,0 +1,71 @@
+"""
+Benchmark: T-SQL script splitting throughput.
+
+Builds a synthetic script of --statements statements (string literals with
+semicolons, bracketed identifiers, nested comments and GO separators) and
+times the single-pass lexer in db.sql_batch against the old regex split
+(re.split(r';\\s*(?:\\r?\\n)+')), reporting statements/sec and MB/sec.
+The regex path is shown for speed only: it splits the tricky statements
+incorrectly.
+
+Usage:
+    python -m benchmarks.bench_sql_lexer --statements 100000
+"""
+import argparse
+import re
+import time
+
+from db.sql_batch import split_script
+
+TEMPLATES = (
+    "INSERT INTO [dbo].[Orders;Archive] (id, note) VALUES ({i}, 'a;b ''quoted'' {i}');",
+    "/* header /* nested; */ comment */ SELECT [id], [note] FROM [dbo].[Orders] WHERE id = {i};",
+    "UPDATE dbo.Orders SET note = 'x' WHERE id = {i}; -- trailing; comment",
+    "DELETE FROM dbo.Orders WHERE note = \"n;{i}\";",
+)
+
+
+def build_script(n_statements, batch_size=1000):
+    lines = []
+    for i in range(n_statements):
+        lines.append(TEMPLATES[i % len(TEMPLATES)].format(i=i))
+        if (i + 1) % batch_size == 0:
+            lines.append("GO")
+    return "\n".join(lines) + "\n"
+
+
+def _regex_split(script):
+    return [s for s in re.split(r';\s*(?:\r?\n)+', script) if s.strip()]
+
+
+def _lexer_split(script):
+    return [stmt for batch in split_script(script) for stmt in batch.statements]
+
+
+def _measure(fn, script, repeat):
+    best = float("inf")
+    count = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        count = len(fn(script))
+        best = min(best, time.perf_counter() - start)
+    return count, best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--statements", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    script = build_script(args.statements)
+    mb = len(script.encode("utf-8")) / 1e6
+    print(f"Script: {args.statements:,} statements, {mb:.1f} MB")
+    print(f"{'splitter':<8} {'pieces':>9} {'seconds':>9} {'stmts/sec':>12} {'MB/sec':>8}")
+    for label, fn in (("regex", _regex_split), ("lexer", _lexer_split)):
+        count, elapsed = _measure(fn, script, args.repeat)
+        print(f"{label:<8} {count:>9,} {elapsed:>9.3f} {args.statements / elapsed:>12,.0f} {mb / elapsed:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
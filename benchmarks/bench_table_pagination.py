@@ -0,0 +1,70 @@
+"""
+Benchmark: OFFSET/FETCH vs keyset (seek) pagination on a large table.
+
+Walks the whole table page by page with both strategies and prints the
+latency of every N-th page, so the growth of OFFSET cost with depth (and
+the flat cost of keyset seeks) is visible.
+
+Usage:
+    python -m benchmarks.bench_table_pagination \\
+        --conn-str "DRIVER={ODBC Driver 17 for SQL Server};SERVER=localhost\\SQLEXPRESS;DATABASE=bench;Trusted_Connection=yes;TrustServerCertificate=yes;" \\
+        --table big_table --chunk-size 10000 --sample-every 50
+"""
+import argparse
+import time
+
+from db.db_utils import (
+    fetch_table_key_columns,
+    _fetch_table_keyset_pages,
+    _fetch_table_offset_pages,
+)
+
+
+def _time_pages(pages, max_pages):
+    """Return a list of (page_index, rows_before, seconds) for each page."""
+    timings = []
+    rows_before = 0
+    it = iter(pages)
+    for page_index in range(max_pages):
+        start = time.perf_counter()
+        try:
+            _, rows = next(it)
+        except StopIteration:
+            break
+        timings.append((page_index, rows_before, time.perf_counter() - start))
+        rows_before += len(rows)
+    return timings
+
+
+def main():
+    import pyodbc
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--conn-str", required=True, help="ODBC connection string")
+    parser.add_argument("--table", required=True, help="Table with a primary key to page through")
+    parser.add_argument("--chunk-size", type=int, default=10000)
+    parser.add_argument("--max-pages", type=int, default=500)
+    parser.add_argument("--sample-every", type=int, default=25, help="Print every N-th page")
+    args = parser.parse_args()
+
+    conn = pyodbc.connect(args.conn_str, autocommit=True)
+    key_columns = fetch_table_key_columns(conn, args.table)
+    if not key_columns:
+        raise SystemExit(f"Table '{args.table}' has no usable unique key; keyset pagination does not apply.")
+
+    print(f"Key columns: {key_columns}  chunk size: {args.chunk_size}")
+    offset = _time_pages(_fetch_table_offset_pages(conn, args.table, args.chunk_size), args.max_pages)
+    keyset = _time_pages(_fetch_table_keyset_pages(conn, args.table, key_columns, args.chunk_size), args.max_pages)
+
+    print(f"{'page':>6} {'offset_rows':>12} {'OFFSET ms':>10} {'keyset ms':>10}")
+    for (page, rows_before, t_off), (_, _, t_key) in zip(offset, keyset):
+        if page % args.sample_every == 0 or page == len(offset) - 1:
+            print(f"{page:>6} {rows_before:>12} {t_off * 1000:>10.1f} {t_key * 1000:>10.1f}")
+
+    total_off = sum(t for _, _, t in offset)
+    total_key = sum(t for _, _, t in keyset)
+    print(f"\nTotal: OFFSET {total_off:.2f}s, keyset {total_key:.2f}s over {len(keyset)} pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,525 @@
+import collections
+import datetime
+import hashlib
+import json
+import os
+import queue
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from core.export_utils import ExportCancelled
+from core.export_writers import EXPORT_FORMATS, TEXT_FORMATS, compressed_file_path, open_export_writer
+from core.query_worker import _TrackingConnection
+from db.db_utils import (
+    fetch_full_table_paginated, fetch_table_key_ranges, fetch_table_range_paginated
+)
+from db.query_session import _PageSpool
+
+MANIFEST_NAME = "manifest.json"
+
+
+# ---------------------- Connection pool ----------------------
+class ConnectionPool:
+    """
+    Small blocking pool of connections opened lazily with `factory()`.
+    A connection is used by one thread at a time.
+    """
+
+    def __init__(self, factory, size):
+        self._factory = factory
+        self._size = size
+        self._idle = queue.Queue()
+        self._all = []
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if len(self._all) < self._size:
+                conn = self._factory()
+                self._all.append(conn)
+                return conn
+        return self._idle.get()
+
+    def release(self, conn):
+        self._idle.put(conn)
+
+    def close_all(self):
+        for conn in self._all:
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self._all = []
+
+
+# ---------------------- Single table ----------------------
+def file_checksum(path, algorithm="sha256", block_size=1024 * 1024):
+    """Hex digest of a file, read in blocks."""
+    digest = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def table_file_name(table, format_choice, writer_options=None):
+    """Safe file name for a table export ('dbo.My Table' -> 'dbo.My_Table.csv[.gz]')."""
+    stem = re.sub(r"[^\w.\-]+", "_", table).strip("._") or "table"
+    name = f"{stem}.{EXPORT_FORMATS[format_choice][0]}"
+    if format_choice in TEXT_FORMATS:
+        name = compressed_file_path(name, (writer_options or {}).get("compression"))
+    return name
+
+
+def unique_table_file_names(tables, format_choice, writer_options=None):
+    """
+    table -> file name for exporting `tables` into one folder. Names that
+    clean up to the same file ('dbo.[My Table]', 'dbo.My_Table', or names
+    differing only in case) get a suffix: 'dbo.My_Table_2.csv'.
+    """
+    names, used = {}, set()
+    for table in tables:
+        name = table_file_name(table, format_choice, writer_options)
+        suffix = 2
+        while name.lower() in used:   # case-insensitive file systems (Windows)
+            name = table_file_name(f"{table}_{suffix}", format_choice, writer_options)
+            suffix += 1
+        used.add(name.lower())
+        names[table] = name
+    return names
+
+
+def export_table(conn, table, file_path, format_choice, chunk_size=10000, writer_options=None,
+                 cancel_check=None, progress=None):
+    """
+    Stream one table to `file_path` with the shared export writers.
+
+    `progress(rows_written)` is called after each chunk and `cancel_check()`
+    before each one. The partial file is removed on error or cancel.
+    Returns {"table", "file", "rows", "bytes", "sha256", "seconds"}, plus
+    "parts" (file, bytes and sha256 of each) when the writer split its output.
+    """
+    return _write_pages(fetch_full_table_paginated(conn, table, chunk_size), table, file_path,
+                        format_choice, writer_options, cancel_check, progress)
+
+
+def _write_pages(pages, table, file_path, format_choice, writer_options=None, cancel_check=None,
+                 progress=None):
+    """Write (columns, rows) `pages` to one file; see export_table()."""
+    started = time.perf_counter()
+    writer = None
+    try:
+        while True:
+            # Checked before every fetch, so a cancelled export sends no further query
+            if cancel_check is not None and cancel_check():
+                raise ExportCancelled()
+            try:
+                columns, rows = next(pages)
+            except StopIteration:
+                break
+            if writer is None:
+                writer = open_export_writer(format_choice, file_path, columns, **(writer_options or {}))
+            writer.write_rows(rows)
+            if progress is not None:
+                progress(writer.rows_written)
+        if writer is None:
+            # Empty table: still produce a file so the manifest is complete
+            writer = open_export_writer(format_choice, file_path, [], **(writer_options or {}))
+        writer.close()
+    except BaseException:
+        files = [file_path]
+        if writer is not None:
+            files = writer.files
+            try:
+                writer.close()
+            except Exception:
+                pass
+        for path in files:
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    finally:
+        pages.close()
+
+    files = [
+        {"file": os.path.basename(path), "bytes": os.path.getsize(path), "sha256": file_checksum(path)}
+        for path in writer.files
+    ]
+    result = {
+        "table": table,
+        "file": files[0]["file"],
+        "rows": writer.rows_written,
+        "bytes": sum(f["bytes"] for f in files),
+        "sha256": files[0]["sha256"] if len(files) == 1 else None,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+    if len(files) > 1:
+        result["parts"] = files   # split output: checksums per part
+    return result
+
+
+def _result_files(result):
+    return [f["file"] for f in result.get("parts", [result])]
+
+
+# ---------------------- Single table, key ranges in parallel ----------------------
+class _RangeBuffer:
+    """
+    Chunks read for one key range, handed from its reader thread to the
+    merging consumer in order. Up to `depth` chunks stay in memory; the
+    rest are spilled to a temp file until the consumer reaches this range.
+    """
+
+    def __init__(self, depth=2):
+        self._depth = depth
+        self._memory = collections.deque()
+        self._spool = None
+        self._next_spooled = 0
+        self._done = False
+        self._error = None
+        self._cond = threading.Condition()
+
+    def put(self, chunk):
+        with self._cond:
+            spooled = self._spool is not None and self._next_spooled < len(self._spool)
+            if len(self._memory) < self._depth and not spooled:
+                self._memory.append(chunk)
+            else:
+                if self._spool is None:
+                    self._spool = _PageSpool()
+                self._spool.append(chunk)
+            self._cond.notify()
+
+    def finish(self, error=None):
+        with self._cond:
+            self._done = True
+            self._error = error
+            self._cond.notify()
+
+    def get(self):
+        """Next chunk, or None once the range is exhausted; re-raises the reader's error."""
+        with self._cond:
+            while True:
+                if self._memory:
+                    return self._memory.popleft()
+                if self._spool is not None and self._next_spooled < len(self._spool):
+                    chunk = self._spool.get(self._next_spooled)
+                    self._next_spooled += 1
+                    return chunk
+                if self._done:
+                    if self._error is not None:
+                        raise self._error
+                    return None
+                self._cond.wait()
+
+    def close(self):
+        if self._spool is not None:
+            self._spool.close()
+
+
+def iter_table_ranges_parallel(connection_factory, table, partitions=4, chunk_size=10000,
+                               buffer_depth=2):
+    """
+    Yield (columns, rows) chunks of `table` in key order while up to
+    `partitions` key ranges (fetch_table_key_ranges) are read at the same
+    time, each on its own connection from `connection_factory()`.
+
+    Chunks of ranges ahead of the one being consumed are buffered (in
+    memory up to `buffer_depth` per range, then in temp files), so the
+    output equals a serial fetch_full_table_paginated() over a keyed table.
+    Closing the generator stops the readers and closes their connections.
+    """
+    pool = ConnectionPool(connection_factory, max(1, partitions))
+    stop = threading.Event()
+    conn = pool.acquire()
+    try:
+        key_column, ranges = fetch_table_key_ranges(conn, table, partitions)
+    finally:
+        pool.release(conn)
+
+    if key_column is None or len(ranges) == 1:
+        conn = pool.acquire()
+        try:
+            yield from fetch_full_table_paginated(conn, table, chunk_size)
+        finally:
+            pool.close_all()
+        return
+
+    buffers = [_RangeBuffer(buffer_depth) for _ in ranges]
+
+    def read(index, lower, upper):
+        conn = pool.acquire()
+        try:
+            pages = fetch_table_range_paginated(conn, table, key_column, lower, upper, chunk_size)
+            try:
+                for page in pages:
+                    if stop.is_set():
+                        break
+                    buffers[index].put(page)
+            finally:
+                pages.close()
+            buffers[index].finish()
+        except BaseException as e:
+            buffers[index].finish(e)
+        finally:
+            pool.release(conn)
+
+    executor = ThreadPoolExecutor(max_workers=len(ranges), thread_name_prefix="range-export")
+    try:
+        for i, (lower, upper) in enumerate(ranges):
+            executor.submit(read, i, lower, upper)
+        for buffer in buffers:
+            while True:
+                chunk = buffer.get()
+                if chunk is None:
+                    break
+                yield chunk
+    finally:
+        stop.set()
+        executor.shutdown(wait=True)
+        for buffer in buffers:
+            buffer.close()
+        pool.close_all()
+
+
+class ParallelRangeChunks:
+    """
+    iter_table_ranges_parallel() as an iterable that another thread can
+    cancel: cancel() interrupts the statement running on every reader
+    connection, so a Cancel does not wait for the current range pages.
+    Parallel exports are not checkpointed (ranges finish out of order),
+    so they cannot be resumed.
+    """
+
+    def __init__(self, connection_factory, table, partitions=4, chunk_size=10000, buffer_depth=2):
+        self._factory = connection_factory
+        self._connections = []
+        self._lock = threading.Lock()
+        self._chunks = iter_table_ranges_parallel(self._open, table, partitions, chunk_size, buffer_depth)
+
+    def _open(self):
+        conn = _TrackingConnection(self._factory())
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def __iter__(self):
+        return self._chunks
+
+    def cancel(self):
+        with self._lock:
+            cursors = [conn.active_cursor for conn in self._connections]
+        for cursor in cursors:
+            if cursor is not None:
+                try:
+                    cursor.cancel()
+                except Exception as e:
+                    print(f"[WARN] Could not cancel export query: {e}")
+
+    def close(self):
+        self._chunks.close()
+
+# ---------------------- Whole database ----------------------
+def export_database_tables(connection_factory, tables, out_dir, format_choice, parallelism=4,
+                           chunk_size=10000, writer_options=None, cancel_check=None,
+                           on_table_progress=None, on_table_done=None, database=None):
+    """
+    Export `tables` concurrently, one file per table, over a pool of
+    `parallelism` connections from `connection_factory()`, then write
+    manifest.json (row counts, sizes and SHA-256 checksums) to `out_dir`.
+
+    `tables` is a list of names or (name, estimated_rows) pairs; larger
+    tables are started first so the pool stays busy to the end.
+    Callbacks run in pool threads:
+        on_table_progress(table, rows_written)
+        on_table_done(table, result_dict_or_None, error_or_None)
+    Returns the manifest dict. Tables that failed are listed under "errors".
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(t, None) if isinstance(t, str) else tuple(t) for t in tables]
+    file_names = unique_table_file_names([table for table, _ in jobs], format_choice, writer_options)
+    jobs.sort(key=lambda job: job[1] or 0, reverse=True)
+
+    pool = ConnectionPool(connection_factory, max(1, parallelism))
+    started = time.perf_counter()
+    results, errors = [], {}
+
+    def cancelled():
+        return cancel_check is not None and cancel_check()
+
+    def run(table):
+        if cancelled():
+            raise ExportCancelled()   # queued tables do not take a connection
+        conn = pool.acquire()
+        try:
+            return export_table(
+                conn, table, os.path.join(out_dir, file_names[table]),
+                format_choice, chunk_size, writer_options, cancel_check,
+                (lambda rows: on_table_progress(table, rows)) if on_table_progress else None,
+            )
+        except Exception as e:
+            if cancelled() and not isinstance(e, ExportCancelled):
+                raise ExportCancelled() from e   # the fetch was interrupted by cancel
+            raise
+        finally:
+            if isinstance(conn, _TrackingConnection):
+                conn.active_cursor = None   # idle again: nothing to cancel
+            pool.release(conn)
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, parallelism), thread_name_prefix="db-export") as executor:
+            futures = {executor.submit(run, table): table for table, _ in jobs}
+            for future in as_completed(futures):
+                table = futures[future]
+                try:
+                    result = future.result()
+                except ExportCancelled:
+                    errors[table] = "cancelled"
+                    if on_table_done is not None:
+                        on_table_done(table, None, "cancelled")
+                    continue
+                except Exception as e:
+                    errors[table] = str(e)
+                    print(f"[ERROR] Export of '{table}' failed: {e}")
+                    if on_table_done is not None:
+                        on_table_done(table, None, str(e))
+                    continue
+                results.append(result)
+                if on_table_done is not None:
+                    on_table_done(table, result, None)
+    finally:
+        pool.close_all()
+
+    elapsed = time.perf_counter() - started
+    results.sort(key=lambda r: r["table"].lower())
+    manifest = {
+        "database": database,
+        "format": format_choice,
+        "options": writer_options or {},
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "parallelism": parallelism,
+        "elapsed_seconds": round(elapsed, 3),
+        "total_rows": sum(r["rows"] for r in results),
+        "total_bytes": sum(r["bytes"] for r in results),
+        "tables": results,
+        "errors": errors,
+    }
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+
+def verify_manifest(out_dir):
+    """Re-check every file listed in manifest.json; returns a list of problems."""
+    with open(os.path.join(out_dir, MANIFEST_NAME), encoding="utf-8") as f:
+        manifest = json.load(f)
+    problems = []
+    for entry in manifest["tables"]:
+        for item in entry.get("parts", [entry]):
+            path = os.path.join(out_dir, item["file"])
+            if not os.path.exists(path):
+                problems.append(f"{item['file']}: missing")
+            elif file_checksum(path) != item["sha256"]:
+                problems.append(f"{item['file']}: checksum mismatch")
+    return problems
+
+
+# ---------------------- Worker ----------------------
+class DatabaseExportWorker(QThread):
+    tableProgress = pyqtSignal(str, int)          # table, rows written
+    tableFinished = pyqtSignal(str, object, str)  # table, result dict or None, error ("" on success)
+    status = pyqtSignal(str)                      # overall throughput line
+    finished = pyqtSignal(str)                    # summary message
+    failed = pyqtSignal(str)                      # error message
+    cancelled = pyqtSignal(str)
+
+    def __init__(self, connection_factory, tables, out_dir, format_choice, parallelism=4,
+                 chunk_size=10000, writer_options=None, database=None):
+        """
+        :param connection_factory: callable() -> new connection to the database
+        :param tables: names or (name, estimated_rows) pairs
+        """
+        super().__init__()
+        self.connection_factory = connection_factory
+        self.tables = tables
+        self.out_dir = out_dir
+        self.format_choice = format_choice
+        self.parallelism = parallelism
+        self.chunk_size = chunk_size
+        self.writer_options = writer_options
+        self.database = database
+        self._cancelled = False
+        self._rows = {}
+        self._connections = []
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        """Stop every table export; interrupts the fetches that are still running."""
+        self._cancelled = True
+        with self._lock:
+            cursors = [conn.active_cursor for conn in self._connections]
+        for cursor in cursors:
+            if cursor is not None:
+                try:
+                    cursor.cancel()
+                except Exception as e:
+                    print(f"[WARN] Could not cancel export query: {e}")
+
+    def _open_connection(self):
+        conn = _TrackingConnection(self.connection_factory())
+        with self._lock:
+            self._connections.append(conn)
+        return conn
+
+    def _on_progress(self, table, rows):
+        with self._lock:
+            self._rows[table] = rows
+            total = sum(self._rows.values())
+        elapsed = max(time.perf_counter() - self._started, 1e-9)
+        self.tableProgress.emit(table, rows)
+        self.status.emit(f"{total:,} rows exported, {total / elapsed:,.0f} rows/s")
+
+    def _on_done(self, table, result, error):
+        self.tableFinished.emit(table, result, error or "")
+
+    def run(self):
+        self._started = time.perf_counter()
+        try:
+            manifest = export_database_tables(
+                self._open_connection, self.tables, self.out_dir, self.format_choice,
+                self.parallelism, self.chunk_size, self.writer_options,
+                cancel_check=lambda: self._cancelled,
+                on_table_progress=self._on_progress,
+                on_table_done=self._on_done,
+                database=self.database,
+            )
+        except Exception as e:
+            self.failed.emit(str(e))
+            return
+
+        if self._cancelled:
+            self.cancelled.emit(
+                f"Export cancelled after {len(manifest['tables'])} of {len(self.tables)} tables.\n"
+                f"Finished tables are listed in {MANIFEST_NAME}."
+            )
+            return
+
+        elapsed = max(manifest["elapsed_seconds"], 1e-9)
+        summary = (
+            f"Exported {len(manifest['tables'])} tables, {manifest['total_rows']:,} rows "
+            f"({manifest['total_bytes'] / 1e6:.1f} MB) in {elapsed:.1f}s\n"
+            f"{manifest['total_rows'] / elapsed:,.0f} rows/s, "
+            f"{manifest['total_bytes'] / 1e6 / elapsed:.1f} MB/s with {self.parallelism} workers\n"
+            f"Manifest: {os.path.join(self.out_dir, MANIFEST_NAME)}"
+        )
+        if manifest["errors"]:
+            summary += f"\n\n⚠️ {len(manifest['errors'])} table(s) failed: " + ", ".join(manifest["errors"])
+        self.finished.emit(summary)
@@ -0,0 +1,179 @@
+import base64
+import datetime
+import decimal
+import json
+import os
+import uuid
+
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+
+# Formats whose file can be cut back to a chunk boundary and appended to
+RESUMABLE_FORMATS = ("CSV", "JSON", "JSON Lines")
+
+
+def is_resumable(format_choice, writer_options=None):
+    """True if an export with these settings can be checkpointed and resumed."""
+    options = writer_options or {}
+    return (format_choice in RESUMABLE_FORMATS
+            and options.get("compression") in (None, "none")
+            and not options.get("split_size"))
+
+
+# ------- Key values as JSON -------
+def _encode_key_value(value):
+    if isinstance(value, datetime.datetime):
+        return {"datetime": value.isoformat()}
+    if isinstance(value, datetime.date):
+        return {"date": value.isoformat()}
+    if isinstance(value, datetime.time):
+        return {"time": value.isoformat()}
+    if isinstance(value, decimal.Decimal):
+        return {"decimal": str(value)}
+    if isinstance(value, uuid.UUID):
+        return {"uuid": str(value)}
+    if isinstance(value, (bytes, bytearray)):
+        return {"bytes": base64.b64encode(value).decode("ascii")}
+    return value
+
+
+def _decode_key_value(value):
+    if not isinstance(value, dict):
+        return value
+    (kind, text), = value.items()
+    if kind == "datetime":
+        return datetime.datetime.fromisoformat(text)
+    if kind == "date":
+        return datetime.date.fromisoformat(text)
+    if kind == "time":
+        return datetime.time.fromisoformat(text)
+    if kind == "decimal":
+        return decimal.Decimal(text)
+    if kind == "uuid":
+        return uuid.UUID(text)
+    if kind == "bytes":
+        return base64.b64decode(text)
+    raise ValueError(f"Unknown key value type in checkpoint: {kind}")
+
+
+class ExportCheckpoint:
+    """
+    Sidecar file ('<export file>.checkpoint.json') recording how far a table
+    export got: the key of the last exported row, the rows written and the
+    file size at that chunk boundary.
+
+    It is rewritten atomically after every chunk, only once the chunk's bytes
+    have been flushed to the export file, so the file always holds at least
+    `offset` valid bytes. Resuming truncates the file to `offset` and reads
+    on from `last_key` with keyset pagination. When the export completes, the
+    final size and SHA-256 are stored so the file can be verified later.
+    """
+
+    def __init__(self, file_path, table, format_choice, key_columns, chunk_size=10000,
+                 writer_options=None):
+        self.file_path = file_path
+        self.table = table
+        self.format_choice = format_choice
+        self.key_columns = list(key_columns)
+        self.chunk_size = chunk_size
+        self.writer_options = writer_options or {}
+        self.rows = 0
+        self.offset = 0
+        self.last_key = None
+        self.status = "in_progress"
+        self.sha256 = None
+        self.updated = None
+
+    @property
+    def path(self):
+        return self.file_path + CHECKPOINT_SUFFIX
+
+    @property
+    def resumable(self):
+        """True if an unfinished export can continue from this checkpoint."""
+        return (self.status == "in_progress" and self.rows > 0 and self.last_key is not None
+                and os.path.exists(self.file_path) and os.path.getsize(self.file_path) >= self.offset)
+
+    # ------- Persistence -------
+    @classmethod
+    def load(cls, file_path):
+        """Checkpoint of the export at `file_path`, or None if there is none (or it is unreadable)."""
+        try:
+            with open(file_path + CHECKPOINT_SUFFIX, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            print(f"[WARN] Ignoring unreadable export checkpoint: {e}")
+            return None
+        checkpoint = cls(file_path, data["table"], data["format"], data["key_columns"],
+                         data.get("chunk_size", 10000), data.get("options"))
+        checkpoint.rows = data["rows"]
+        checkpoint.offset = data["offset"]
+        last_key = data.get("last_key")
+        checkpoint.last_key = None if last_key is None else [_decode_key_value(v) for v in last_key]
+        checkpoint.status = data.get("status", "in_progress")
+        checkpoint.sha256 = data.get("sha256")
+        checkpoint.updated = data.get("updated")
+        return checkpoint
+
+    def save(self):
+        self.updated = datetime.datetime.now().isoformat(timespec="seconds")
+        data = {
+            "file": os.path.basename(self.file_path),
+            "table": self.table,
+            "format": self.format_choice,
+            "options": self.writer_options,
+            "key_columns": self.key_columns,
+            "chunk_size": self.chunk_size,
+            "rows": self.rows,
+            "offset": self.offset,
+            "last_key": None if self.last_key is None else [_encode_key_value(v) for v in self.last_key],
+            "status": self.status,
+            "sha256": self.sha256,
+            "updated": self.updated,
+        }
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)   # never leaves a half-written checkpoint
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    # ------- Progress -------
+    def update(self, rows, offset, last_key):
+        """Record a chunk boundary (call after the chunk is flushed to the file)."""
+        self.rows = rows
+        self.offset = offset
+        self.last_key = list(last_key)
+        self.save()
+
+    def complete(self):
+        """Mark the export finished and store the final size and checksum."""
+        from core.database_export import file_checksum
+        self.status = "complete"
+        self.offset = os.path.getsize(self.file_path)
+        self.sha256 = file_checksum(self.file_path)
+        self.save()
+
+    def matches(self, table, format_choice, key_columns, writer_options=None):
+        """True if this checkpoint belongs to an export with these settings."""
+        return (self.table == table and self.format_choice == format_choice
+                and self.key_columns == list(key_columns)
+                and (self.writer_options or {}) == (writer_options or {}))
+
+    def verify(self):
+        """Compare a finished export file with the checkpoint; returns a list of problems."""
+        from core.database_export import file_checksum
+        name = os.path.basename(self.file_path)
+        if self.status != "complete":
+            return [f"{name}: export not finished ({self.rows:,} rows so far)"]
+        if not os.path.exists(self.file_path):
+            return [f"{name}: missing"]
+        problems = []
+        if os.path.getsize(self.file_path) != self.offset:
+            problems.append(f"{name}: size {os.path.getsize(self.file_path):,} bytes, expected {self.offset:,}")
+        if file_checksum(self.file_path) != self.sha256:
+            problems.append(f"{name}: checksum mismatch")
+        return problems
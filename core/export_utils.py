@@ -1,71 +1,219 @@
+import os
+import time
+
 import pandas as pd
 from PyQt5.QtWidgets import (
-    QMessageBox, QInputDialog, QFileDialog, QProgressDialog
+    QApplication, QMessageBox, QInputDialog, QFileDialog, QProgressDialog, QDialog
 )
 from PyQt5.QtCore import QThread, pyqtSignal, Qt
-from db.db_utils import get_table_row_count
+from core.export_writers import (
+    EXPORT_FORMATS, TEXT_FORMATS, TEXT_COMPRESSION, available_export_formats, compressed_file_path,
+    export_codecs, open_export_writer
+)
+from core.export_checkpoint import ExportCheckpoint, is_resumable
+from core.query_worker import _TrackingConnection
+from db.db_utils import fetch_table_key_columns, get_table_row_count
+
+# Tables estimated at this many rows or more offer a parallel key-range export
+PARALLEL_EXPORT_MIN_ROWS = 1_000_000
 
 
 # ---------------------- Worker ----------------------
+class ExportCancelled(Exception):
+    """Raised inside ExportWorker when the user cancels."""
+
+
 class ExportWorker(QThread):
     progress = pyqtSignal(int)     # progress percentage
     status = pyqtSignal(str)       # status text updates ("Finalizing...", etc.)
     finished = pyqtSignal(str)     # success message
     failed = pyqtSignal(str)       # error message
-
-    def __init__(self, data, headers, file_path, format_choice):
+    cancelled = pyqtSignal(str)    # cancel confirmation (partial file removed)
+
+    def __init__(self, chunks, file_path, format_choice, total_rows=None, connection=None,
+                 writer_options=None, owns_connection=True, checkpoint=None):
+        """
+        Stream `chunks` to a file in the worker thread.
+
+        :param chunks: iterable of (columns, rows) chunks; it is consumed lazily
+                       here, so the database fetch also runs off the GUI thread
+        :param total_rows: expected row count (may be an estimate) for the progress bar
+        :param connection: connection the chunks are read from; a _TrackingConnection
+                           lets cancel() interrupt the statement in flight
+        :param writer_options: keyword options for the writer (e.g. compression)
+        :param owns_connection: close `connection` when the export ends
+        :param checkpoint: ExportCheckpoint updated after every chunk; if it
+                           already holds rows, `chunks` must continue after its
+                           last key and the file is appended to. A failed
+                           export then keeps its file for a later resume.
+        """
         super().__init__()
-        self.data = data
-        self.headers = headers
+        self.chunks = chunks
         self.file_path = file_path
         self.format_choice = format_choice
-
+        self.total_rows = total_rows or None
+        self.connection = connection
+        self.writer_options = writer_options or {}
+        self.owns_connection = owns_connection
+        self.checkpoint = checkpoint
+        self._cancelled = False
+
+    # ------- Control (GUI thread) -------
+    def cancel(self):
+        """Stop after the current chunk; interrupts a fetch that is still running."""
+        self._cancelled = True
+        cancel_chunks = getattr(self.chunks, "cancel", None)
+        if cancel_chunks is not None:
+            cancel_chunks()   # chunks read on several connections (ParallelRangeChunks)
+        cursor = getattr(self.connection, "active_cursor", None)
+        if cursor is not None:
+            try:
+                cursor.cancel()
+            except Exception as e:
+                print(f"[WARN] Could not cancel export query: {e}")
+
+    def _check_cancelled(self):
+        if self._cancelled:
+            raise ExportCancelled()
+
+    # ------- Thread body -------
     def run(self):
+        writer = None
+        self._started = time.perf_counter()
+        self._fetch_time = self._write_time = 0.0
+        checkpoint = self.checkpoint
+        self._resumed_rows = checkpoint.rows if checkpoint is not None else 0
+        self._resumed_bytes = checkpoint.offset if self._resumed_rows else 0
+        key_positions = None
         try:
-            # Normalize to DataFrame
-            if isinstance(self.data, pd.DataFrame):
-                df = self.data
-            elif self.data and isinstance(self.data[0], dict):
-                df = pd.DataFrame(self.data)
-            else:
-                df = pd.DataFrame(self.data, columns=self.headers)
-
-            total_rows = len(df)
-            if total_rows == 0:
-                raise ValueError("No data to export.")
-
-            # --- Export by format ---
-            if self.format_choice == "CSV":
-                df.to_csv(self.file_path, index=False)
-
-            elif self.format_choice == "JSON":
-                df.to_json(self.file_path, orient="records", indent=2)
-
-            elif self.format_choice == "Excel":
-                writer = pd.ExcelWriter(self.file_path, engine="openpyxl")
-                rows_per_sheet = 10_000
-                total_sheets = (total_rows + rows_per_sheet - 1) // rows_per_sheet
-
-                for idx, start in enumerate(range(0, total_rows, rows_per_sheet)):
-                    end = min(start + rows_per_sheet, total_rows)
-                    chunk = df.iloc[start:end]
-                    sheet_name = f"Sheet{idx + 1}"
-                    chunk.to_excel(writer, index=False, sheet_name=sheet_name)
+            chunks = iter(self.chunks)
+            while True:
+                self._check_cancelled()
+                t0 = time.perf_counter()
+                try:
+                    columns, rows = next(chunks)
+                except StopIteration:
+                    break
+                t1 = time.perf_counter()
+                self._fetch_time += t1 - t0
+                self._check_cancelled()
+
+                if writer is None:
+                    writer = self._open_writer(columns)
+                writer.write_rows(rows)
+                if checkpoint is not None and len(rows):
+                    if key_positions is None:
+                        key_positions = [list(columns).index(c) for c in checkpoint.key_columns]
+                    last_row = rows[-1]
+                    checkpoint.update(writer.rows_written, writer.flush_offset(),
+                                      [last_row[i] for i in key_positions])
+                del rows  # release the chunk before fetching the next one
+                self._write_time += time.perf_counter() - t1
+                self._report(writer)
+
+            if writer is None and self._resumed_rows:
+                writer = self._open_writer([])   # nothing left after the checkpoint
+            if writer is None:
+                raise ValueError("No data to export.")   # a result set without rows still has a header
+
+            # Notify UI we’re finalizing
+            self.status.emit(f"Finalizing {self.format_choice} file…")
+            writer.close()
+            if checkpoint is not None:
+                checkpoint.complete()
+            self.progress.emit(100)
 
-                    # Cap progress at 95%
-                    percent = int((end / total_rows) * 95)
-                    self.progress.emit(min(percent, 95))
+            # Final success
+            elapsed = time.perf_counter() - self._started
+            if len(writer.files) > 1:
+                target = f"{len(writer.files)} parts:\n{writer.files[0]}\n…\n{writer.files[-1]}"
+            else:
+                target = writer.files[0]
+            if self._resumed_rows:
+                target += f"\n(resumed after {self._resumed_rows:,} rows)"
+            if checkpoint is not None:
+                target += f"\nRow count, size and SHA-256 saved to {os.path.basename(checkpoint.path)}"
+            self.finished.emit(
+                f"✅ Exported {writer.rows_written:,} rows successfully to:\n{target}\n\n"
+                f"{elapsed:.1f}s, {(writer.rows_written - self._resumed_rows) / max(elapsed, 1e-9):,.0f} rows/s"
+            )
 
-                # Notify UI we’re finalizing
-                self.status.emit("Finalizing Excel file…")
+        except Exception as e:
+            if not self._cancelled and checkpoint is not None and checkpoint.rows:
+                # Keep the partial file: exporting to it again resumes at the checkpoint
+                self._close_quietly(writer)
+                self.failed.emit(
+                    f"{e}\n\n{checkpoint.rows:,} rows were saved. Export the table to the same "
+                    f"file again to resume from there."
+                )
+                return
+            self._discard(writer)
+            if checkpoint is not None:
+                checkpoint.remove()
+            if self._cancelled:
+                self.cancelled.emit("Export cancelled. The partial file was removed.")
+            else:
+                self.failed.emit(str(e))
+        finally:
+            close = getattr(self.chunks, "close", None)
+            if close is not None:
+                close()   # stops the generator, which closes its cursor
+            if self.connection is not None and self.owns_connection:
+                try:
+                    self.connection.close()
+                except Exception:
+                    pass
+
+    def _open_writer(self, columns):
+        options = dict(self.writer_options)
+        if self.checkpoint is not None and self.checkpoint.rows:
+            options["resume"] = (self.checkpoint.offset, self.checkpoint.rows)
+        return open_export_writer(self.format_choice, self.file_path, columns, **options)
+
+    @staticmethod
+    def _close_quietly(writer):
+        if writer is not None:
+            try:
                 writer.close()
-                self.progress.emit(100)
+            except Exception:
+                pass
+
+    def _discard(self, writer):
+        """Close `writer` quietly and delete the incomplete file(s)."""
+        paths = writer.files if writer is not None else [self.file_path]
+        self._close_quietly(writer)
+        for path in paths:
+            if os.path.exists(path):
+                try:
+                    os.remove(path)
+                except OSError as e:
+                    print(f"[WARN] Could not remove partial export file: {e}")
+
+    def _report(self, writer):
+        rows, mb = writer.rows_written, writer.bytes_written / 1e6
+        elapsed = max(time.perf_counter() - self._started, 1e-9)
+        # Rates count this run only (a resumed export starts with rows already on disk)
+        rate = (rows - self._resumed_rows) / elapsed
+        mb_rate = (writer.bytes_written - self._resumed_bytes) / 1e6 / elapsed
+        busy = max(self._fetch_time + self._write_time, 1e-9)
+        speed = (f"{rate:,.0f} rows/s, {mb_rate:.1f} MB/s  "
+                 f"(fetch {self._fetch_time / busy:.0%}, write {self._write_time / busy:.0%})")
+        if self.total_rows:
+            # Cap progress at 95% (the estimate may be low; finalizing comes last)
+            self.progress.emit(min(int(rows / self.total_rows * 95), 95))
+            remaining = max(self.total_rows - rows, 0) / rate if rate else 0
+            self.status.emit(
+                f"Exported {rows:,} of ~{self.total_rows:,} rows ({mb:.1f} MB)\n"
+                f"{speed}\nETA {_format_duration(remaining)}"
+            )
+        else:
+            self.status.emit(f"Exported {rows:,} rows ({mb:.1f} MB)\n{speed}")
 
-            # Final success
-            self.finished.emit(f"✅ Exported successfully to:\n{self.file_path}")
 
-        except Exception as e:
-            self.failed.emit(str(e))
+def _format_duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
 
 
 # ---------------------- Connection Resolver ----------------------
@@ -82,8 +230,34 @@ def _resolve_conn(self):
 
 
 # ---------------------- Paginated Export ----------------------
-def export_paginated_data(self, fetch_func, identifier, fetch_args=None, is_query=False):
-    """Generic paginated data exporter used by both table and query exports."""
+def _open_export_conn(self):
+    """
+    Return (connection, owned): a dedicated connection from the controller
+    when possible, so the export can read in its worker thread without
+    sharing the GUI's connection; otherwise the shared one.
+    """
+    controller = getattr(self, "controller", None)
+    open_connection = getattr(controller, "open_connection", None)
+    if open_connection is not None:
+        try:
+            conn = open_connection()
+            if conn is not None:
+                return conn, True
+        except Exception as e:
+            print(f"[WARN] Could not open export connection, using shared one: {e}")
+    return _resolve_conn(self), False
+
+
+def export_paginated_data(self, fetch_func, identifier, fetch_args=None, is_query=False, total_rows=None):
+    """
+    Generic paginated data exporter used by both table and query exports.
+    Chunks are streamed from the database to the file writer one at a time.
+
+    `fetch_func(conn, table_or_query, chunk_size)` yields (columns, rows)
+    chunks: fetch_full_table_paginated for tables, stream_query_result for
+    queries (`fetch_args` is then the SQL text and `total_rows` its row
+    count, when already known).
+    """
     try:
         chunk_size, ok = QInputDialog.getInt(
             self,
@@ -94,115 +268,361 @@ def export_paginated_data(self, fetch_func, identifier, fetch_args=None, is_quer
         if not ok:
             return
 
-        conn = _resolve_conn(self)
-        all_data, headers, total_rows, page = [], None, None, 0
-
-        if not is_query:
-            total_rows = get_table_row_count(conn, identifier)
+        if is_query:
+            if not fetch_args or not str(fetch_args).strip():
+                raise ValueError("Empty or invalid SQL query provided for export.")
+        else:
+            # Approximate count from metadata: no COUNT(*) scan before exporting
+            total_rows = get_table_row_count(_resolve_conn(self), identifier)
             if total_rows == 0:
                 QMessageBox.warning(self, "No Data", f"No data found in table '{identifier}'.")
                 return
-            iterator = fetch_func(conn, identifier, chunk_size)
-        else:
-            iterator = None
-
-        while True:
-            if is_query:
-                if not fetch_args or not str(fetch_args).strip():
-                    raise ValueError("Empty or invalid SQL query provided for export.")
-                cols, rows = fetch_func(conn, fetch_args, page, chunk_size)
-                if not cols and not rows:
-                    break
-            else:
-                try:
-                    cols, rows = next(iterator)
-                except StopIteration:
-                    break
 
-            if headers is None:
-                headers = cols
-
-            batch_data = [dict(zip(cols, row)) for row in rows]
-            all_data.extend(batch_data)
+        readers = _ask_parallel_readers(self, total_rows) if not is_query else 1
+        if readers is None:
+            return
 
-            if is_query:
-                if len(rows) < chunk_size:
-                    break
-                page += 1
+        name = "query_results" if is_query else identifier
+        format_choice, file_path, options = _ask_export_target(self, name)
+        if not file_path:
+            return
 
-        if not all_data:
-            QMessageBox.warning(
-                self, "No Data",
-                f"No rows found for {'query' if is_query else f'table {identifier}'}."
+        if readers > 1:
+            # Key ranges are read on their own connections and merged in key order
+            from core.database_export import ParallelRangeChunks
+            controller = self.controller
+            chunks = ParallelRangeChunks(
+                lambda: controller.open_connection(), identifier, readers, chunk_size
             )
+            _start_export(self, chunks, file_path, format_choice, name, total_rows,
+                          writer_options=options)
             return
 
-        export_data_to_file(
-            self,
-            all_data,
-            headers,
-            identifier if not is_query else "query_results",
-        )
+        conn, owned = _open_export_conn(self)
+        conn = _TrackingConnection(conn)   # lets Cancel interrupt the running fetch
+        checkpoint = None
+        if not is_query and is_resumable(format_choice, options):
+            checkpoint, ok = _prepare_checkpoint(self, conn, identifier, file_path, format_choice,
+                                                 chunk_size, options)
+            if not ok:
+                if owned:
+                    conn.close()
+                return
+
+        if checkpoint is not None and checkpoint.rows:
+            chunks = fetch_func(conn, identifier, chunk_size, after_key=checkpoint.last_key)
+        else:
+            chunks = fetch_func(conn, fetch_args if is_query else identifier, chunk_size)
+
+        _start_export(self, chunks, file_path, format_choice, name, total_rows,
+                      connection=conn, writer_options=options, owns_connection=owned,
+                      checkpoint=checkpoint)
 
     except Exception as e:
         QMessageBox.critical(self, "Error", f"Failed to export data:\n{e}")
         print(f"⚠️ Error exporting data from {identifier}: {e}")
 
 
+def export_result_session(self, session, name="query_results"):
+    """
+    Export an open result set (QueryResultSession) without running its
+    query again: the rows not read yet are spooled to a temp file first,
+    then every page is written from the session.
+    """
+    try:
+        format_choice, file_path, options = _ask_export_target(self, name)
+        if not file_path:
+            return
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            session.drain(spool=True)
+        finally:
+            QApplication.restoreOverrideCursor()
+        _start_export(self, _session_chunks(session), file_path, format_choice, name, session.row_count,
+                      writer_options=options)
+    except Exception as e:
+        QMessageBox.critical(self, "Error", f"Failed to export data:\n{e}")
+        print(f"⚠️ Error exporting query results: {e}")
+
+
+def _session_chunks(session):
+    """(columns, rows) pages of a drained QueryResultSession; one empty page for a set without rows."""
+    for page in range(max(session.page_count, 1)):
+        if session.closed:
+            raise ValueError("The results were closed (the query ran again) before the export finished.")
+        yield session.columns, session.fetch_page(page)
+
+
+def _ask_parallel_readers(self, total_rows):
+    """
+    For large tables, ask how many connections should read key ranges in
+    parallel. Returns 1 for small tables or without a connection factory,
+    None if the user cancelled.
+    """
+    controller = getattr(self, "controller", None)
+    if (getattr(controller, "connection_factory", None) is None
+            or not total_rows or total_rows < PARALLEL_EXPORT_MIN_ROWS):
+        return 1
+    readers, ok = QInputDialog.getInt(
+        self,
+        "Parallel Export",
+        f"This table has about {total_rows:,} rows.\n"
+        "Read it in key ranges on separate connections (1 = single connection).\n"
+        "A parallel export cannot be resumed if it is interrupted:",
+        4, 1, 16, 1,
+    )
+    return readers if ok else None
+
+
+def _prepare_checkpoint(self, conn, table, file_path, format_choice, chunk_size, options):
+    """
+    Checkpoint for a table export to `file_path`: the unfinished one found
+    next to the file if the user chooses to resume it, otherwise a fresh one.
+    Returns (checkpoint_or_None, ok); heaps without a unique key get no
+    checkpoint, and ok is False if the user cancelled.
+    """
+    key_columns = fetch_table_key_columns(conn, table)
+    if not key_columns:
+        return None, True
+
+    existing = ExportCheckpoint.load(file_path)
+    if existing is not None:
+        if existing.resumable and existing.matches(table, format_choice, key_columns, options):
+            answer = QMessageBox.question(
+                self, "Resume Export",
+                f"An earlier export of '{table}' to this file stopped after "
+                f"{existing.rows:,} rows ({existing.updated}).\n\n"
+                f"Resume from there? Choose No to start over.",
+                QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel, QMessageBox.Yes,
+            )
+            if answer == QMessageBox.Cancel:
+                return None, False
+            if answer == QMessageBox.Yes:
+                return existing, True
+        existing.remove()
+
+    return ExportCheckpoint(file_path, table, format_choice, key_columns, chunk_size, options), True
+
+
 # ---------------------- Data Export (threaded) ----------------------
+def _ask_export_target(self, name):
+    """
+    Ask for format, writer options and file path.
+    Returns (format_choice, file_path, writer_options), or (None, None, None) if cancelled.
+    """
+    format_options = available_export_formats()
+    format_choice, ok = QInputDialog.getItem(
+        self, "Export Format", "Select the format to export:",
+        format_options, 0, False,
+    )
+    if not ok or not format_choice:
+        return None, None, None
+
+    options = {}
+    codecs = export_codecs(format_choice)
+    if codecs:
+        codec, ok = QInputDialog.getItem(
+            self, "Compression", f"Select the {format_choice} compression codec:",
+            codecs, 0, False,
+        )
+        if not ok:
+            return None, None, None
+        options["compression"] = codec
+
+    if format_choice in TEXT_FORMATS:
+        codec = options.get("compression")
+        if codec in TEXT_COMPRESSION:
+            low, high, default = TEXT_COMPRESSION[codec][1]
+            level, ok = QInputDialog.getInt(
+                self, "Compression Level",
+                f"{codec} level ({low} = fastest, {high} = smallest):",
+                default, low, high, 1,
+            )
+            if not ok:
+                return None, None, None
+            options["level"] = level
+        split_mb, ok = QInputDialog.getInt(
+            self, "Split Output",
+            "Split into parts of about this many MB (0 = single file):",
+            0, 0, 1024 * 1024, 100,
+        )
+        if not ok:
+            return None, None, None
+        if split_mb:
+            options["split_size"] = split_mb * 1024 * 1024
+
+    extension, file_filter = EXPORT_FORMATS[format_choice]
+    suffix = ""
+    if format_choice in TEXT_FORMATS:
+        # Parquet/Arrow compress inside the file; text formats get a codec suffix
+        suffix = TEXT_COMPRESSION.get(options.get("compression"), ("",))[0]
+    if suffix:
+        file_filter = file_filter.replace(f"*.{extension}", f"*.{extension}{suffix}")
+    file_path, _ = QFileDialog.getSaveFileName(
+        self, f"Export {name} as {format_choice}", f"{name}.{extension}{suffix}", file_filter,
+    )
+    if not file_path:
+        return None, None, None  # user cancelled
+    if format_choice in TEXT_FORMATS:
+        file_path = compressed_file_path(file_path, options.get("compression"))
+    return format_choice, file_path, options
+
+
+def _start_export(self, chunks, file_path, format_choice, name, total_rows=None, connection=None,
+                  writer_options=None, owns_connection=True, checkpoint=None):
+    """Run an ExportWorker with a progress dialog."""
+    progress_dialog = QProgressDialog("Exporting data, please wait...", "Cancel", 0, 100, self)
+    progress_dialog.setWindowTitle(f"Exporting {name}")
+    progress_dialog.setWindowModality(Qt.WindowModal)
+    progress_dialog.setAutoClose(False)
+    progress_dialog.setAutoReset(False)
+    if not total_rows:
+        progress_dialog.setRange(0, 0)  # unknown size: busy indicator until finalizing
+    progress_dialog.show()
+
+    worker = ExportWorker(chunks, file_path, format_choice, total_rows, connection, writer_options,
+                          owns_connection, checkpoint)
+    self._export_thread = worker  # Keep reference
+
+    def on_progress(value):
+        if progress_dialog.maximum() == 0:
+            progress_dialog.setRange(0, 100)
+        progress_dialog.setValue(value)
+
+    worker.progress.connect(on_progress)
+    worker.status.connect(progress_dialog.setLabelText)
+    def on_finished(msg):
+        progress_dialog.close()
+        if checkpoint is None:
+            QMessageBox.information(self, "Export Successful", msg)
+            return
+        # The completed checkpoint keeps rows, size and SHA-256 to check the file against later
+        box = QMessageBox(QMessageBox.Information, "Export Successful", msg, QMessageBox.Ok, self)
+        verify_btn = box.addButton("Verify File", QMessageBox.ActionRole)
+        box.exec_()
+        if box.clickedButton() is verify_btn:
+            verify_export_file(self, file_path)
+
+    worker.finished.connect(on_finished)
+    worker.failed.connect(lambda err: (
+        progress_dialog.close(),
+        QMessageBox.critical(self, "Export Failed", f"❌ {err}")
+    ))
+    worker.cancelled.connect(lambda msg: (
+        progress_dialog.close(),
+        QMessageBox.information(self, "Export Cancelled", msg)
+    ))
+    # Cooperative cancel: the worker stops between chunks and cleans up
+    progress_dialog.canceled.connect(worker.cancel)
+
+    worker.start()
+    return worker
+
+
+def verify_export_file(self, file_path):
+    """Check a finished table export against its checkpoint (size and SHA-256) and show the result."""
+    checkpoint = ExportCheckpoint.load(file_path)
+    if checkpoint is None:
+        QMessageBox.warning(self, "Verify Export", f"No export record found for:\n{file_path}")
+        return []
+    QApplication.setOverrideCursor(Qt.WaitCursor)
+    try:
+        problems = checkpoint.verify()
+    finally:
+        QApplication.restoreOverrideCursor()
+    if problems:
+        QMessageBox.warning(self, "Verify Export", "❌ " + "\n".join(problems))
+    else:
+        QMessageBox.information(
+            self, "Verify Export",
+            f"✅ {os.path.basename(file_path)} matches the export: "
+            f"{checkpoint.rows:,} rows, {checkpoint.offset:,} bytes, SHA-256 {checkpoint.sha256[:12]}…"
+        )
+    return problems
+
+
+def _rows_from_data(data, headers):
+    """Normalize a DataFrame, list of dicts or list of rows to (headers, rows)."""
+    if isinstance(data, pd.DataFrame):
+        return list(data.columns), list(data.itertuples(index=False, name=None))
+    if data and isinstance(data[0], dict):
+        headers = list(headers or data[0].keys())
+        return headers, [tuple(record.get(h) for h in headers) for record in data]
+    return list(headers), data
+
+
 def export_data_to_file(self, data, headers, table_name):
-    """Export given data (list of dicts or DataFrame) to CSV, JSON, or Excel — threaded."""
+    """Export given data (list of rows/dicts or DataFrame) to CSV, JSON, JSON Lines, Excel, Parquet or Arrow — threaded."""
     try:
-        if not data:
+        if data is None or len(data) == 0:
             QMessageBox.warning(self, "No Data", "There is no data to export.")
             return
 
-        format_options = ["CSV", "JSON", "Excel"]
-        format_choice, ok = QInputDialog.getItem(
-            self, "Export Format", "Select the format to export:",
-            format_options, 0, False,
-        )
-        if not ok or not format_choice:
+        format_choice, file_path, options = _ask_export_target(self, table_name)
+        if not file_path:
             return
 
-        default_name = f"{table_name}.{format_choice.lower() if format_choice != 'Excel' else 'xlsx'}"
-        file_filter = (
-            "CSV Files (*.csv)" if format_choice == "CSV"
-            else "JSON Files (*.json)" if format_choice == "JSON"
-            else "Excel Files (*.xlsx)"
-        )
+        headers, rows = _rows_from_data(data, headers)
+        _start_export(self, [(headers, rows)], file_path, format_choice, table_name, len(rows),
+                      writer_options=options)
 
-        file_path, _ = QFileDialog.getSaveFileName(
-            self, f"Export {table_name} as {format_choice}", default_name, file_filter,
-        )
-        if not file_path:
-            return  # user cancelled
+    except Exception as e:
+        QMessageBox.critical(self, "Error", f"Failed to export data:\n{e}")
+        print(f"⚠️ Error exporting data: {e}")
 
-        # --- Launch threaded export ---
-        progress_dialog = QProgressDialog("Exporting data, please wait...", "Cancel", 0, 100, self)
-        progress_dialog.setWindowTitle(f"Exporting {table_name}")
-        progress_dialog.setWindowModality(Qt.WindowModal)
-        progress_dialog.setAutoClose(False)
-        progress_dialog.setAutoReset(False)
-        progress_dialog.show()
 
-        worker = ExportWorker(data, headers, file_path, format_choice)
+# ---------------------- Database Export (parallel) ----------------------
+def export_database(self, database, tables, row_counts=None):
+    """Export many tables of `database` concurrently; see core.database_export."""
+    from core.database_export import DatabaseExportWorker
+    from gui.other_windows.export_database_dialog import (
+        ExportDatabaseDialog, DatabaseExportProgressDialog
+    )
+    try:
+        controller = getattr(self, "controller", None)
+        if controller is None or getattr(controller, "connection_factory", None) is None:
+            QMessageBox.warning(
+                self, "Not Available",
+                "Database export needs its own connections; reconnect to the server and try again.",
+            )
+            return
+
+        dialog = ExportDatabaseDialog(self, database, tables, row_counts)
+        if dialog.exec_() != QDialog.Accepted:
+            return
+        selected = dialog.selected_tables()
+        format_choice, writer_options, parallelism, chunk_size, out_dir = dialog.options()
+        row_counts = row_counts or {}
+
+        progress = DatabaseExportProgressDialog(self, selected, row_counts)
+        worker = DatabaseExportWorker(
+            lambda: controller.open_connection(),
+            [(t, row_counts.get(t)) for t in selected],
+            out_dir, format_choice, parallelism, chunk_size, writer_options, database,
+        )
         self._export_thread = worker  # Keep reference
 
-        worker.progress.connect(progress_dialog.setValue)
-        worker.status.connect(progress_dialog.setLabelText)
-        worker.finished.connect(lambda msg: (
-            progress_dialog.close(),
-            QMessageBox.information(self, "Export Successful", msg)
-        ))
+        worker.tableProgress.connect(progress.on_table_progress)
+        worker.tableFinished.connect(progress.on_table_finished)
+        worker.status.connect(progress.status_label.setText)
+        # The progress dialog stays open on success so the files can be verified
+        worker.finished.connect(lambda msg: progress.show_finished(msg, out_dir))
         worker.failed.connect(lambda err: (
-            progress_dialog.close(),
+            progress.reject(),
             QMessageBox.critical(self, "Export Failed", f"❌ {err}")
         ))
-        progress_dialog.canceled.connect(worker.terminate)
+        worker.cancelled.connect(lambda msg: (
+            progress.reject(),
+            QMessageBox.information(self, "Export Cancelled", msg)
+        ))
+        progress.cancel_btn.clicked.connect(lambda: (
+            progress.status_label.setText("Cancelling…"), worker.cancel()
+        ))
+        progress.rejected.connect(worker.cancel)
 
+        progress.show()
         worker.start()
 
     except Exception as e:
-        QMessageBox.critical(self, "Error", f"Failed to export data:\n{e}")
-        print(f"⚠️ Error exporting data: {e}")
+        QMessageBox.critical(self, "Error", f"Failed to export database:\n{e}")
+        print(f"⚠️ Error exporting database {database}: {e}")
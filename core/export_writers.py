@@ -0,0 +1,531 @@
+import base64
+import csv
+import datetime
+import decimal
+import gzip
+import importlib.util
+import io
+import json
+import lzma
+import os
+import uuid
+
+
+# Format name -> (file extension, file dialog filter)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "CSV Files (*.csv)"),
+    "JSON": ("json", "JSON Files (*.json)"),
+    "JSON Lines": ("jsonl", "JSON Lines Files (*.jsonl)"),
+    "Excel": ("xlsx", "Excel Files (*.xlsx)"),
+    "Parquet": ("parquet", "Parquet Files (*.parquet)"),
+    "Arrow": ("arrow", "Arrow IPC Files (*.arrow)"),
+}
+
+# Formats that need pyarrow (optional dependency)
+ARROW_FORMATS = ("Parquet", "Arrow")
+
+# Formats written as text, which can be compressed on the fly and split into parts
+TEXT_FORMATS = ("CSV", "JSON", "JSON Lines")
+
+# Compression codecs offered per format (first entry is the default)
+EXPORT_CODECS = {
+    "CSV": ["none", "gzip", "zstd", "xz"],
+    "JSON": ["none", "gzip", "zstd", "xz"],
+    "JSON Lines": ["none", "gzip", "zstd", "xz"],
+    "Parquet": ["snappy", "zstd", "gzip", "brotli", "lz4", "none"],
+    "Arrow": ["zstd", "lz4", "none"],
+}
+
+# Streaming codecs for text formats: file suffix, (min, max, default) level
+TEXT_COMPRESSION = {
+    "gzip": (".gz", (1, 9, 6)),
+    "zstd": (".zst", (1, 22, 3)),   # needs the zstandard package (optional)
+    "xz": (".xz", (0, 9, 6)),
+}
+
+
+def available_export_formats():
+    """Format names that can be written here (Parquet/Arrow need pyarrow)."""
+    has_arrow = importlib.util.find_spec("pyarrow") is not None
+    return [f for f in EXPORT_FORMATS if has_arrow or f not in ARROW_FORMATS]
+
+
+def export_codecs(format_choice):
+    """Compression codecs usable for `format_choice` here (text zstd needs zstandard)."""
+    codecs = EXPORT_CODECS.get(format_choice, [])
+    if format_choice in TEXT_FORMATS and importlib.util.find_spec("zstandard") is None:
+        codecs = [c for c in codecs if c != "zstd"]
+    return codecs
+
+
+def compressed_file_path(file_path, compression):
+    """`file_path` with the codec's suffix appended ('out.csv' -> 'out.csv.gz')."""
+    suffix = TEXT_COMPRESSION.get(compression, ("",))[0]
+    if suffix and not file_path.lower().endswith(suffix):
+        return file_path + suffix
+    return file_path
+
+
+def part_file_path(file_path, number):
+    """Path of part `number` of a split export ('out.csv.gz' -> 'out.part002.csv.gz')."""
+    root, suffix = file_path, ""
+    for codec_suffix, _ in TEXT_COMPRESSION.values():
+        if root.lower().endswith(codec_suffix):
+            root, suffix = root[:-len(codec_suffix)], root[-len(codec_suffix):]
+            break
+    root, ext = os.path.splitext(root)
+    return f"{root}.part{number:03d}{ext}{suffix}"
+
+
+# ---------------------- Base ----------------------
+class ExportWriter:
+    """
+    Writes rows to an export file chunk by chunk.
+
+    Call write_rows() once per fetched chunk (a sequence of row sequences in
+    `headers` order) and close() at the end. Nothing is buffered beyond the
+    current chunk, so memory stays bounded by the chunk size.
+    """
+
+    def __init__(self, file_path, headers):
+        self.file_path = file_path
+        self.headers = list(headers)
+        self.rows_written = 0
+        self.files = [file_path]   # every file this writer produces
+
+    @property
+    def bytes_written(self):
+        return 0
+
+    def write_rows(self, rows):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+def _compressed_stream(raw, compression, level=None):
+    """Binary stream that compresses into `raw` as it is written (raw itself if no codec)."""
+    if compression is None:
+        return raw
+    if compression == "gzip":
+        return gzip.GzipFile(fileobj=raw, mode="wb", compresslevel=6 if level is None else level)
+    if compression == "xz":
+        return lzma.LZMAFile(raw, "wb", preset=6 if level is None else level)
+    if compression == "zstd":
+        try:
+            import zstandard
+        except ImportError:
+            raise ValueError("zstd compression requires zstandard (pip install zstandard).")
+        return zstandard.ZstdCompressor(level=3 if level is None else level).stream_writer(raw, closefd=False)
+    raise ValueError(f"Unsupported compression: {compression}")
+
+
+class _TextExportWriter(ExportWriter):
+    """
+    Writer over a UTF-8 text stream; tracks bytes via the underlying binary file.
+
+    With `compression` ("gzip", "zstd" or "xz") the text is compressed as it
+    is written, so no uncompressed copy ever reaches the disk. With
+    `split_size` (bytes) output rolls over to a new part file once the current
+    one has reached about that size (compressors buffer, so parts can run a
+    little over). Every part is a complete file with its own header or array
+    brackets. `files` lists the paths written; bytes_written counts bytes on
+    disk, i.e. after compression.
+    """
+
+    def __init__(self, file_path, headers, compression=None, level=None, split_size=None, resume=None):
+        """
+        :param resume: (offset, rows) to continue an interrupted export: the
+                       file is cut back to `offset` bytes, which must end after
+                       `rows` complete records, and appended to. Uncompressed,
+                       unsplit output only.
+        """
+        super().__init__(file_path, headers)
+        self.compression = None if compression in (None, "none") else compression
+        self.level = level
+        self.split_size = split_size or None
+        self.files = []
+        self._closed_bytes = 0
+        self._open = False
+        if resume is not None:
+            if self.compression or self.split_size:
+                raise ValueError("Only uncompressed, unsplit exports can be resumed.")
+            self._resume_part(*resume)
+        else:
+            self._open_part()
+
+    @property
+    def bytes_written(self):
+        current = self._raw.tell() if self._open else 0
+        return self._closed_bytes + current
+
+    # ------- Parts -------
+    def _open_part(self):
+        path = part_file_path(self.file_path, len(self.files) + 1) if self.split_size else self.file_path
+        self.files.append(path)
+        self._raw = open(path, "wb")
+        self._text = io.TextIOWrapper(
+            _compressed_stream(self._raw, self.compression, self.level), encoding="utf-8", newline=""
+        )
+        self._open = True
+        self._part_rows = 0
+        self._start_part(resumed=False)
+
+    def _resume_part(self, offset, rows):
+        self.files.append(self.file_path)
+        self._raw = open(self.file_path, "r+b")
+        self._raw.truncate(offset)
+        self._raw.seek(offset)
+        self._text = io.TextIOWrapper(self._raw, encoding="utf-8", newline="")
+        self._open = True
+        self._part_rows = rows
+        self.rows_written = rows
+        self._start_part(resumed=True)
+
+    def flush_offset(self):
+        """Flush everything written so far to the OS and return the file size."""
+        self._text.flush()
+        self._raw.flush()
+        return self._raw.tell()
+
+    def _close_part(self):
+        self._end_part()
+        self._text.flush()
+        stream = self._text.detach()
+        if stream is not self._raw:
+            stream.close()   # writes the compressed trailer; leaves the file open
+        self._raw.flush()
+        self._closed_bytes += self._raw.tell()
+        self._raw.close()
+        self._open = False
+
+    def _start_part(self, resumed):
+        pass
+
+    def _end_part(self):
+        pass
+
+    # ------- Writing -------
+    def write_rows(self, rows):
+        if self.split_size and self._part_rows and self.bytes_written - self._closed_bytes >= self.split_size:
+            self._close_part()
+            self._open_part()
+        count = self._write_rows(rows)
+        self._part_rows += count
+        self.rows_written += count
+        if self.compression is None:
+            # Flushing a compressor per chunk would hurt its ratio; its size just lags a bit
+            self._text.flush()
+
+    def _write_rows(self, rows):
+        raise NotImplementedError
+
+    def close(self):
+        if self._open:
+            self._close_part()
+
+
+# ---------------------- CSV ----------------------
+class CsvExportWriter(_TextExportWriter):
+    def _start_part(self, resumed):
+        self._csv = csv.writer(self._text)
+        if not resumed:
+            self._csv.writerow(self.headers)
+
+    def _write_rows(self, rows):
+        self._csv.writerows(rows)
+        return len(rows)
+
+
+# ---------------------- JSON ----------------------
+def _json_default(value):
+    """JSON form of the driver types the json module does not know."""
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, decimal.Decimal):
+        return str(value)   # exact; a float would drop digits of DECIMAL(38, x)
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return base64.b64encode(value).decode("ascii")
+    return str(value)       # uniqueidentifier and anything else
+
+
+# Compact C encoder; `default` only runs for the types handled above
+_encode_json = json.JSONEncoder(
+    ensure_ascii=False, check_circular=False, separators=(",", ":"), default=_json_default
+).encode
+
+
+class JsonExportWriter(_TextExportWriter):
+    """Streams a JSON array of records, one compact record per line, chunk by chunk."""
+
+    def _start_part(self, resumed):
+        if not resumed:
+            self._text.write("[")
+
+    def _write_rows(self, rows):
+        if not rows:
+            return 0
+        headers = self.headers
+        records = ",\n".join([_encode_json(dict(zip(headers, row))) for row in rows])
+        self._text.write((",\n" if self._part_rows else "\n") + records)
+        return len(rows)
+
+    def _end_part(self):
+        self._text.write("\n]\n" if self._part_rows else "]\n")
+
+
+class JsonLinesExportWriter(_TextExportWriter):
+    """JSON Lines: one record object per line, no enclosing array."""
+
+    def _write_rows(self, rows):
+        headers = self.headers
+        self._text.write("".join([_encode_json(dict(zip(headers, row))) + "\n" for row in rows]))
+        return len(rows)
+
+
+# ---------------------- Excel ----------------------
+_EXCEL_TYPES = (str, int, float, bool, decimal.Decimal, datetime.date, datetime.time, type(None))
+
+
+def _excel_value(value):
+    """Cell value openpyxl accepts (GUIDs, binary and other driver types become text)."""
+    if isinstance(value, _EXCEL_TYPES):
+        if isinstance(value, (datetime.datetime, datetime.time)) and value.tzinfo is not None:
+            return value.replace(tzinfo=None)
+        return value
+    return str(value)
+
+
+# Hard row limit of an .xlsx worksheet (header row included)
+EXCEL_MAX_ROWS = 1_048_576
+
+
+class ExcelExportWriter(ExportWriter):
+    """
+    Streams rows into a write-only openpyxl workbook.
+
+    Write-only worksheets serialize each appended row to a temporary file
+    straight away, so memory stays flat however many rows are exported and
+    close() only has to zip the sheets up. A new sheet (with the header row)
+    is started when the current one reaches Excel's row limit.
+    """
+
+    rows_per_sheet = EXCEL_MAX_ROWS - 1
+
+    def __init__(self, file_path, headers):
+        from openpyxl import Workbook
+        super().__init__(file_path, headers)
+        self._workbook = Workbook(write_only=True)
+        self._sheet = None
+        self._sheet_rows = 0
+
+    def _new_sheet(self):
+        self._sheet = self._workbook.create_sheet(f"Sheet{len(self._workbook.sheetnames) + 1}")
+        self._sheet.append(self.headers)
+        self._sheet_rows = 0
+
+    def write_rows(self, rows):
+        start = 0
+        while start < len(rows):
+            if self._sheet is None or self._sheet_rows >= self.rows_per_sheet:
+                self._new_sheet()
+            stop = min(len(rows), start + self.rows_per_sheet - self._sheet_rows)
+            append = self._sheet.append
+            for row in rows[start:stop]:
+                append([_excel_value(v) for v in row])
+            self._sheet_rows += stop - start
+            start = stop
+        self.rows_written += len(rows)
+
+    def close(self):
+        if self._workbook is None:
+            return
+        if self._sheet is None:
+            self._new_sheet()
+        self._workbook.save(self.file_path)
+        self._workbook = None
+
+
+# ---------------------- Parquet / Arrow ----------------------
+def _arrow_type(pa, type_code, precision=None, scale=None):
+    """Arrow type for a DB-API description type code (None = infer from values)."""
+    if type_code is bool:
+        return pa.bool_()
+    if type_code is int:
+        return pa.int64()
+    if type_code is float:
+        return pa.float64()
+    if type_code is decimal.Decimal:
+        # DECIMAL/NUMERIC/MONEY keep exact precision; unknown precision falls back to text
+        if precision and 0 < precision <= 38:
+            return pa.decimal128(precision, scale or 0)
+        return pa.string()
+    if type_code is datetime.datetime:
+        return pa.timestamp("us")   # datetime/datetime2 (Python keeps microseconds)
+    if type_code is datetime.date:
+        return pa.date32()
+    if type_code is datetime.time:
+        return pa.time64("us")
+    if type_code in (bytes, bytearray):
+        return pa.binary()          # varbinary / image / rowversion
+    if type_code is uuid.UUID or type_code is str:
+        return pa.string()          # uniqueidentifier as its canonical text form
+    return None
+
+
+def _unique_field_names(headers):
+    """Column names made unique for an Arrow schema ('id', 'id' -> 'id', 'id_2')."""
+    names, seen = [], set()
+    for header in headers:
+        name = base = str(header)
+        n = 1
+        while name in seen:
+            n += 1
+            name = f"{base}_{n}"
+        seen.add(name)
+        names.append(name)
+    return names
+
+
+def _arrow_value(value):
+    if isinstance(value, (uuid.UUID, bytearray)):
+        return str(value) if isinstance(value, uuid.UUID) else bytes(value)
+    return value
+
+
+class _ArrowExportWriter(ExportWriter):
+    """
+    Base for columnar writers: each chunk becomes one Arrow record batch.
+
+    The schema is built from the cursor description of the first chunk
+    (ColumnarResult.description or pyodbc Row.cursor_description); columns
+    without a known type are inferred from the first chunk's values.
+    """
+
+    def __init__(self, file_path, headers, compression=None):
+        import pyarrow
+        super().__init__(file_path, headers)
+        self._pa = pyarrow
+        self.compression = None if compression in (None, "none") else compression
+        self._schema = None
+        self._sink = None
+
+    def _description(self, rows):
+        desc = getattr(rows, "description", None)
+        if desc is None and len(rows):
+            desc = getattr(rows[0], "cursor_description", None)
+        return desc
+
+    def _columns(self, rows):
+        if hasattr(rows, "column") and hasattr(rows, "columns"):
+            return [rows.column(i) for i in range(len(rows.columns))]   # ColumnarResult, by position
+        return list(zip(*rows)) if len(rows) else [() for _ in self.headers]
+
+    def _build_schema(self, rows, columns):
+        pa = self._pa
+        desc = self._description(rows) or []
+        fields = []
+        for i, name in enumerate(_unique_field_names(self.headers)):
+            d = desc[i] if i < len(desc) else ()
+            arrow_type = _arrow_type(
+                pa, d[1] if len(d) > 1 else None,
+                d[4] if len(d) > 4 else None, d[5] if len(d) > 5 else None,
+            )
+            if arrow_type is None:
+                arrow_type = pa.array([_arrow_value(v) for v in columns[i]]).type
+                if pa.types.is_null(arrow_type):
+                    arrow_type = pa.string()
+            fields.append(pa.field(name, arrow_type))
+        return pa.schema(fields)
+
+    def _to_batch(self, rows):
+        pa = self._pa
+        columns = self._columns(rows)
+        if self._schema is None:
+            self._schema = self._build_schema(rows, columns)
+            self._open(self._schema)
+        arrays = []
+        for values, field in zip(columns, self._schema):
+            if pa.types.is_string(field.type):
+                values = [None if v is None else str(v) for v in values]
+            else:
+                values = [_arrow_value(v) for v in values]
+            arrays.append(pa.array(values, type=field.type))
+        return pa.RecordBatch.from_arrays(arrays, schema=self._schema)
+
+    def write_rows(self, rows):
+        batch = self._to_batch(rows)
+        self._write_batch(batch)
+        self.rows_written += batch.num_rows
+
+    @property
+    def bytes_written(self):
+        return self._sink.tell() if self._sink is not None and not self._sink.closed else 0
+
+    def close(self):
+        if self._sink is None:
+            # Nothing written: still produce a valid file with all-text columns
+            self._schema = self._pa.schema(
+                [self._pa.field(name, self._pa.string()) for name in _unique_field_names(self.headers)]
+            )
+            self._open(self._schema)
+        elif self._sink.closed:
+            return
+        self._writer.close()
+        self._sink.close()
+
+    def _open(self, schema):
+        raise NotImplementedError
+
+    def _write_batch(self, batch):
+        raise NotImplementedError
+
+
+class ParquetExportWriter(_ArrowExportWriter):
+    """Parquet file with one row group per fetched chunk."""
+
+    def _open(self, schema):
+        import pyarrow.parquet as pq
+        self._sink = self._pa.OSFile(self.file_path, "wb")
+        self._writer = pq.ParquetWriter(self._sink, schema, compression=self.compression or "none")
+
+    def _write_batch(self, batch):
+        self._writer.write_table(self._pa.Table.from_batches([batch]))
+
+
+class ArrowExportWriter(_ArrowExportWriter):
+    """Arrow IPC (Feather v2) file, one record batch per fetched chunk."""
+
+    def _open(self, schema):
+        options = self._pa.ipc.IpcWriteOptions(compression=self.compression)
+        self._sink = self._pa.OSFile(self.file_path, "wb")
+        self._writer = self._pa.ipc.new_file(self._sink, schema, options=options)
+
+    def _write_batch(self, batch):
+        self._writer.write_batch(batch)
+
+
+_WRITERS = {
+    "CSV": CsvExportWriter,
+    "JSON": JsonExportWriter,
+    "JSON Lines": JsonLinesExportWriter,
+    "Excel": ExcelExportWriter,
+    "Parquet": ParquetExportWriter,
+    "Arrow": ArrowExportWriter,
+}
+
+
+def open_export_writer(format_choice, file_path, headers, **options):
+    """
+    Create the writer for `format_choice` (a key of EXPORT_FORMATS).
+    `options` are passed to the writer: compression="zstd" for Parquet/Arrow,
+    or compression/level/split_size for the text formats.
+    """
+    try:
+        writer_cls = _WRITERS[format_choice]
+    except KeyError:
+        raise ValueError(f"Unsupported export format: {format_choice}")
+    if format_choice in ARROW_FORMATS and importlib.util.find_spec("pyarrow") is None:
+        raise ValueError(f"{format_choice} export requires pyarrow (pip install pyarrow).")
+    return writer_cls(file_path, headers, **options)
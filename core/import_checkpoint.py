@@ -0,0 +1,129 @@
+import datetime
+import hashlib
+import json
+import os
+
+# Import checkpoints live with the user's settings, not next to the (possibly read-only) source file
+CHECKPOINT_DIR = os.path.join(os.path.expanduser("~"), ".esqli", "import_checkpoints")
+
+
+def _file_signature(file_path):
+    """(size, mtime_ns) of the source file; a change means the checkpoint no longer applies."""
+    stat = os.stat(file_path)
+    return stat.st_size, stat.st_mtime_ns
+
+
+class ImportCheckpoint:
+    """
+    Local file recording how far a committed-in-chunks import got: the number
+    of file rows already committed to the table, plus the settings needed to
+    carry on (mapping, chunk size, commit interval). It belongs to one file
+    and one table on one server and database.
+
+    It is rewritten atomically after every commit, only once the rows are
+    committed, so `rows` never counts rows the table does not hold. Resuming
+    skips that many file rows and inserts the rest. The checkpoint is
+    removed when the import completes.
+    """
+
+    def __init__(self, file_path, table, mapping, chunk_size=10000, commit_every=100000,
+                 checkpoint_dir=None, server=None, database=None):
+        self.file_path = os.path.abspath(file_path)
+        self.table = table
+        self.server = server
+        self.database = database
+        self.mapping = dict(mapping)
+        self.chunk_size = chunk_size
+        self.commit_every = commit_every
+        self.checkpoint_dir = checkpoint_dir or CHECKPOINT_DIR
+        self.rows = 0
+        self.updated = None
+        self.file_size, self.file_mtime = _file_signature(file_path)
+
+    @property
+    def path(self):
+        return self.checkpoint_path(self.file_path, self.table, self.checkpoint_dir, self.server, self.database)
+
+    @staticmethod
+    def checkpoint_path(file_path, table, checkpoint_dir=None, server=None, database=None):
+        key = f"{os.path.abspath(file_path)}|{server or ''}|{database or ''}|{table}".lower().encode("utf-8")
+        name = f"{os.path.basename(file_path)}.{hashlib.sha1(key).hexdigest()[:12]}.json"
+        return os.path.join(checkpoint_dir or CHECKPOINT_DIR, name)
+
+    @property
+    def resumable(self):
+        """True if an unfinished import of an unchanged file can continue from this checkpoint."""
+        if self.rows <= 0 or not os.path.exists(self.file_path):
+            return False
+        return _file_signature(self.file_path) == (self.file_size, self.file_mtime)
+
+    # ------- Persistence -------
+    @classmethod
+    def load(cls, file_path, table, checkpoint_dir=None, server=None, database=None):
+        """
+        Checkpoint of importing `file_path` into `table` of `database` on
+        `server`, or None if there is none (or it is unreadable).
+        """
+        try:
+            with open(cls.checkpoint_path(file_path, table, checkpoint_dir, server, database),
+                      encoding="utf-8") as f:
+                data = json.load(f)
+            checkpoint = cls.__new__(cls)
+            checkpoint.file_path = data["file"]
+            checkpoint.table = data["table"]
+            checkpoint.server = data.get("server")
+            checkpoint.database = data.get("database")
+            checkpoint.mapping = data["mapping"]
+            checkpoint.chunk_size = data.get("chunk_size", 10000)
+            checkpoint.commit_every = data.get("commit_every", 100000)
+            checkpoint.checkpoint_dir = checkpoint_dir or CHECKPOINT_DIR
+            checkpoint.rows = data["rows"]
+            checkpoint.updated = data.get("updated")
+            checkpoint.file_size = data["file_size"]
+            checkpoint.file_mtime = data["file_mtime"]
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[WARN] Ignoring unreadable import checkpoint: {e}")
+            return None
+        if not checkpoint.matches(file_path, table, server, database):
+            return None
+        return checkpoint
+
+    def matches(self, file_path, table, server=None, database=None):
+        """True if this checkpoint belongs to importing `file_path` into this table, server and database."""
+        def same(a, b):
+            return (a or "").lower() == (b or "").lower()
+        return (self.file_path == os.path.abspath(file_path) and same(self.table, table)
+                and same(self.server, server) and same(self.database, database))
+
+    def save(self):
+        self.updated = datetime.datetime.now().isoformat(timespec="seconds")
+        data = {
+            "file": self.file_path,
+            "file_size": self.file_size,
+            "file_mtime": self.file_mtime,
+            "server": self.server,
+            "database": self.database,
+            "table": self.table,
+            "mapping": self.mapping,
+            "chunk_size": self.chunk_size,
+            "commit_every": self.commit_every,
+            "rows": self.rows,
+            "updated": self.updated,
+        }
+        os.makedirs(self.checkpoint_dir, exist_ok=True)
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, self.path)   # never leaves a half-written checkpoint
+
+    def remove(self):
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    # ------- Progress -------
+    def update(self, rows):
+        """Record the file rows committed so far (call after the commit)."""
+        self.rows = rows
+        self.save()
@@ -0,0 +1,624 @@
+import io
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from contextlib import closing
+
+import pandas as pd
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from db.bulk_load import column_type_sql, open_bulk_loader
+from db.db_utils import fetch_insert_metadata
+from db.insert_validation import validate_insert_frame
+
+IMPORT_FILE_FILTER = "Data Files (*.csv *.json *.jsonl *.xlsx)"
+
+# Rows parsed, validated and inserted at a time; bounds the import's memory
+IMPORT_CHUNK_SIZE = 10_000
+
+_END = object()   # reader -> inserter: the file is exhausted
+
+
+# ---------------------- Chunked readers ----------------------
+def iter_file_chunks(file_path, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Yield (DataFrame, fraction_read) chunks of at most `chunk_size` rows from
+    a CSV, JSON (array of records), JSON Lines or XLSX file without loading
+    the whole file. `fraction_read` is how far into the file the reader is
+    (0..1), or None when that is not known.
+    """
+    ext = os.path.splitext(file_path)[1].lower()
+    if ext == ".csv":
+        yield from _csv_chunks(file_path, chunk_size)
+    elif ext in (".json", ".jsonl"):
+        yield from _json_chunks(file_path, chunk_size)
+    elif ext == ".xlsx":
+        yield from _xlsx_chunks(file_path, chunk_size)
+    else:
+        raise ValueError("Only CSV, JSON, JSON Lines or XLSX files are supported.")
+
+
+def peek_file(file_path, rows=100):
+    """First rows of a file as a DataFrame (for headers and a preview), or None if it is empty."""
+    with closing(iter_file_chunks(file_path, rows)) as chunks:
+        for df, _ in chunks:
+            return df
+    return None
+
+
+def _fraction(raw, size):
+    return min(raw.tell() / size, 1.0) if size else None
+
+
+def _csv_chunks(file_path, chunk_size):
+    with open(file_path, "rb") as raw:
+        size = os.fstat(raw.fileno()).st_size
+        for df in pd.read_csv(raw, chunksize=chunk_size):
+            yield df, _fraction(raw, size)
+
+
+def _json_chunks(file_path, chunk_size):
+    with open(file_path, "rb") as raw:
+        size = os.fstat(raw.fileno()).st_size
+        text = io.TextIOWrapper(raw, encoding="utf-8-sig")
+        first = text.read(1)
+        while first.isspace():
+            first = text.read(1)
+        if not first:
+            return
+        if first == "[":
+            records = _iter_json_array(text)
+        elif first == "{":
+            records = _iter_json_lines(text, first)   # one object per line
+        else:
+            raise ValueError("JSON import expects an array of records or one record per line.")
+
+        batch = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= chunk_size:
+                yield pd.DataFrame.from_records(batch), _fraction(raw, size)
+                batch = []
+        if batch:
+            yield pd.DataFrame.from_records(batch), 1.0
+
+
+def _iter_json_array(text, block_size=1 << 20):
+    """Yield the elements of a JSON array whose '[' was already read, one block of text at a time."""
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+    while True:
+        # Skip separators, reading on when the buffer runs out
+        while True:
+            while pos < len(buf) and (buf[pos].isspace() or buf[pos] == ","):
+                pos += 1
+            if pos < len(buf) or eof:
+                break
+            block = text.read(block_size)
+            eof = not block
+            buf, pos = buf[pos:] + block, 0
+        if pos >= len(buf):
+            raise ValueError("Unexpected end of file inside the JSON array.")
+        if buf[pos] == "]":
+            return
+        try:
+            value, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            block = text.read(block_size)   # the element continues in the next block
+            eof = not block
+            buf, pos = buf[pos:] + block, 0
+            continue
+        yield value
+        pos = end
+
+
+def _iter_json_lines(text, first=""):
+    line = first + text.readline()
+    while line:
+        if line.strip():
+            yield json.loads(line)
+        line = text.readline()
+
+
+def _xlsx_chunks(file_path, chunk_size):
+    from openpyxl import load_workbook
+
+    # Read-only mode streams the sheet XML instead of building the whole workbook
+    wb = load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        total = ws.max_row
+        rows = ws.iter_rows(values_only=True)
+        header = next(rows, None)
+        if header is None:
+            return
+        columns = [name if name is not None else f"Unnamed: {i}" for i, name in enumerate(header)]
+        read, batch = 1, []
+        for row in rows:
+            read += 1
+            if all(v is None for v in row):
+                continue
+            batch.append(row[:len(columns)])
+            if len(batch) >= chunk_size:
+                yield pd.DataFrame(batch, columns=columns), min(read / total, 1.0) if total else None
+                batch = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns), 1.0
+    finally:
+        wb.close()
+
+
+def apply_mapping(df, mapping):
+    """Keep the mapped file columns of a chunk and rename them to their table columns."""
+    source = [col for col in mapping if mapping[col]]
+    df = df.reindex(columns=source)   # a column missing from this chunk becomes NULL
+    df.columns = [mapping[col] for col in source]
+    return df
+
+
+# ---------------------- Worker ----------------------
+class ImportCancelled(Exception):
+    """Raised inside ImportWorker when the user cancels."""
+
+
+class ImportWorker(QThread):
+    progress = pyqtSignal(int)          # progress percentage
+    status = pyqtSignal(str)            # status text updates
+    finished = pyqtSignal(int, str)     # rows imported, success message
+    failed = pyqtSignal(str)            # error message
+    cancelled = pyqtSignal(str)         # cancel confirmation (transaction rolled back)
+
+    def __init__(self, connection, table_name, file_path, mapping, chunk_size=IMPORT_CHUNK_SIZE,
+                 owns_connection=True, queue_depth=2, strategy="auto", staging_dir=None, tablock=False,
+                 commit_every=None, checkpoint=None):
+        """
+        Import a file into `table_name` chunk by chunk.
+
+        A reader thread parses the file into chunks while this thread maps,
+        validates and inserts the previous one; at most `queue_depth` parsed
+        chunks wait in between, so memory stays bounded by the chunk size.
+        By default all rows go in as one transaction: any error rolls the
+        import back. With `commit_every` the rows are committed in batches,
+        and `checkpoint` records each commit so an interrupted import can be
+        resumed from the last one.
+
+        :param mapping: file column -> table column (None skips the column)
+        :param owns_connection: close `connection` when the import ends
+        :param strategy: bulk-load strategy (see db.bulk_load); "auto" picks one
+                         from the row count estimated after the first chunk
+        :param staging_dir: staging folder for the bulk_insert strategy
+        :param tablock: insert WITH (TABLOCK), which allows minimal logging
+        :param commit_every: commit after (at least) this many rows; None for all or nothing
+        :param checkpoint: ImportCheckpoint updated after every commit; its `rows`
+                           file rows are skipped, resuming an earlier import
+        """
+        super().__init__()
+        self.connection = connection
+        self.table_name = table_name
+        self.file_path = file_path
+        self.mapping = mapping
+        self.chunk_size = chunk_size
+        self.owns_connection = owns_connection
+        self.queue_depth = queue_depth
+        self.strategy = strategy
+        self.staging_dir = staging_dir
+        self.tablock = tablock
+        self.commit_every = commit_every
+        self.checkpoint = checkpoint
+        self.skip_rows = checkpoint.rows if checkpoint is not None else 0
+        self.rows_committed = 0   # rows this run committed to the table (kept even if it fails)
+        self._loader = None
+        self._cancelled = False
+
+    # ------- Control (GUI thread) -------
+    def cancel(self):
+        """Stop after the current chunk; interrupts an insert that is still running."""
+        self._cancelled = True
+        cursor = getattr(self._loader, "cursor", None)
+        if cursor is not None:
+            try:
+                cursor.cancel()
+            except Exception as e:
+                print(f"[WARN] Could not cancel import statement: {e}")
+
+    def _check_cancelled(self):
+        if self._cancelled:
+            raise ImportCancelled()
+
+    # ------- Reader thread -------
+    def _read(self, chunks, stop):
+        """
+        Queue (DataFrame, fraction_read, first_row) chunks, then _END or the
+        read error. The first `skip_rows` rows (already imported) are dropped.
+        """
+        item = _END
+        first_row = 1
+        try:
+            with closing(iter_file_chunks(self.file_path, self.chunk_size)) as source:
+                for df, fraction in source:
+                    rows = len(df)
+                    if first_row + rows <= self.skip_rows + 1:
+                        first_row += rows
+                        continue
+                    if first_row <= self.skip_rows:
+                        df = df.iloc[self.skip_rows + 1 - first_row:]
+                    if not self._put(chunks, (df, fraction, max(first_row, self.skip_rows + 1)), stop):
+                        return
+                    first_row += rows
+        except Exception as e:
+            item = e
+        self._put(chunks, item, stop)
+
+    @staticmethod
+    def _put(chunks, item, stop):
+        """Queue `item` unless the inserter has stopped; False if it has."""
+        while not stop.is_set():
+            try:
+                chunks.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    # ------- Thread body -------
+    def run(self):
+        conn = self.connection
+        chunks = queue.Queue(maxsize=self.queue_depth)
+        stop = threading.Event()
+        reader = threading.Thread(target=self._read, args=(chunks, stop), name="import-reader", daemon=True)
+        self._started = time.perf_counter()
+        self._wait_time = self._insert_time = 0.0
+        rows = committed = 0
+        autocommit = getattr(conn, "autocommit", None)
+        try:
+            if autocommit:
+                conn.autocommit = False   # one transaction for the whole file (or per batch)
+            col_meta = fetch_insert_metadata(conn, self.table_name)
+            reader.start()
+            while True:
+                self._check_cancelled()
+                t0 = time.perf_counter()
+                item = chunks.get()
+                t1 = time.perf_counter()
+                self._wait_time += t1 - t0
+                if item is _END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                self._check_cancelled()
+
+                df, fraction, first_row = item
+                df = apply_mapping(df, self.mapping)
+                df = validate_insert_frame(df, col_meta, first_row=first_row)
+                if self._loader is None:
+                    self._open_loader(list(df.columns), col_meta, len(df), fraction)
+                rows += self._loader.load(df)
+                del df, item  # release the chunk before taking the next one
+                if self.commit_every and rows - committed >= self.commit_every:
+                    committed = self._commit_batch(rows)
+                self._insert_time += time.perf_counter() - t1
+                self._report(rows, fraction)
+
+            if rows == 0 and not self.skip_rows:
+                raise ValueError("The selected file contains no data.")
+            self.status.emit("Committing…")
+            if self._loader is not None:
+                self._loader.flush()
+            conn.commit()
+            self.rows_committed = rows
+            if self.checkpoint is not None:
+                self.checkpoint.remove()
+            self.progress.emit(100)
+            elapsed = time.perf_counter() - self._started
+            resumed = f" (resumed after {self.skip_rows:,} rows)" if self.skip_rows else ""
+            self.finished.emit(rows, (
+                f"✅ Successfully imported {rows:,} rows into '{self.table_name}'{resumed}.\n\n"
+                f"{elapsed:.1f}s, {rows / max(elapsed, 1e-9):,.0f} rows/s"
+            ))
+
+        except Exception as e:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            kept = self.skip_rows + committed
+            if self._cancelled:
+                self.cancelled.emit(f"Import cancelled. {self._kept_message(kept)}")
+            else:
+                self.failed.emit(f"{e}\n\n{self._kept_message(kept)}" if kept else str(e))
+        finally:
+            stop.set()
+            if reader.is_alive():
+                reader.join()
+            if self._loader is not None:
+                self._loader.close()
+                self._loader = None
+            if self.owns_connection:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            elif autocommit:
+                try:
+                    conn.autocommit = True
+                except Exception as e:
+                    print(f"[WARN] Could not restore autocommit: {e}")
+
+    def _commit_batch(self, rows):
+        """Commit the rows loaded so far and record them in the checkpoint; returns `rows`."""
+        self._loader.flush()
+        self.connection.commit()
+        self.rows_committed = rows
+        if self.checkpoint is not None:
+            self.checkpoint.update(self.skip_rows + rows)
+        return rows
+
+    def _kept_message(self, kept):
+        """What an interrupted import left in the table."""
+        if not kept:
+            return "No rows were imported."
+        message = f"{kept:,} rows committed before stopping were kept."
+        if self.checkpoint is not None:
+            message += " Import the same file again to resume from there."
+        return message
+
+    def _open_loader(self, columns, col_meta, first_rows, fraction):
+        # The first chunk's share of the file gives the row count to choose a strategy by
+        estimated = int(first_rows / fraction) if fraction else None
+        self._loader = open_bulk_loader(self.connection, self.table_name, columns, col_meta, self.strategy,
+                                        estimated_rows=estimated, staging_dir=self.staging_dir,
+                                        tablock=self.tablock)
+        self.status.emit(f"Importing with {self._loader.name}…")
+
+    def _report(self, rows, fraction):
+        elapsed = max(time.perf_counter() - self._started, 1e-9)
+        busy = max(self._wait_time + self._insert_time, 1e-9)
+        speed = (f"{rows / elapsed:,.0f} rows/s  "
+                 f"(waiting on file {self._wait_time / busy:.0%}, inserting {self._insert_time / busy:.0%})")
+        if fraction is not None:
+            self.progress.emit(min(int(fraction * 100), 99))
+        self.status.emit(f"Imported {rows:,} rows…\n{speed}")
+
+
+class ParallelImportWorker(ImportWorker):
+    """
+    ImportWorker that spreads the parsed chunks over `workers` connections,
+    each validating and loading the chunks it takes from the shared queue.
+
+    With `atomic` (all-or-nothing) the writers fill a global temp staging
+    table, and one INSERT ... SELECT moves every row into the table at the
+    end, so a failure leaves the table untouched. Without it the writers
+    insert into the table directly and commit every chunk. `tablock` adds
+    WITH (TABLOCK) to the statement(s) writing the table, which allows
+    minimal logging of the final move.
+    """
+
+    def __init__(self, connection, table_name, file_path, mapping, connection_factory, workers=4,
+                 atomic=True, **kwargs):
+        """
+        :param connection: coordinating connection (staging table, final move)
+        :param connection_factory: callable returning a new connection per writer
+        Other arguments as for ImportWorker.
+        """
+        kwargs.setdefault("queue_depth", workers + 1)
+        super().__init__(connection, table_name, file_path, mapping, **kwargs)
+        self.connection_factory = connection_factory
+        self.workers = workers
+        self.atomic = atomic
+        self._loaders = []
+        self._lock = threading.Lock()
+
+    def cancel(self):
+        """Stop after the current chunks; interrupts the inserts still running."""
+        self._cancelled = True
+        for loader in list(self._loaders):
+            try:
+                loader.cursor.cancel()
+            except Exception as e:
+                print(f"[WARN] Could not cancel import statement: {e}")
+
+    # ------- Thread body -------
+    def run(self):
+        conn = self.connection
+        chunks = queue.Queue(maxsize=self.queue_depth)
+        stop = threading.Event()
+        reader = threading.Thread(target=self._read, args=(chunks, stop), name="import-reader", daemon=True)
+        writers = []
+        stage = None
+        self._started = time.perf_counter()
+        self._stats = [{"rows": 0, "chunks": 0, "busy": 0.0, "wait": 0.0, "strategy": None}
+                       for _ in range(self.workers)]
+        self._errors = []
+        self._rows = 0
+        self._fraction = None
+        columns = [col for col in self.mapping.values() if col]
+        try:
+            col_meta = fetch_insert_metadata(conn, self.table_name)
+            target = self.table_name
+            if self.atomic:
+                stage = self._create_stage(columns, col_meta)
+                target = stage
+            reader.start()
+            writers = [
+                threading.Thread(target=self._write, args=(i, target, columns, col_meta, chunks, stop),
+                                 name=f"import-writer-{i + 1}", daemon=True)
+                for i in range(self.workers)
+            ]
+            for writer in writers:
+                writer.start()
+            while any(writer.is_alive() for writer in writers):
+                time.sleep(0.25)
+                self._report(self._rows, self._fraction)
+            if self._errors:
+                raise self._errors[0]
+            self._check_cancelled()
+            if self._rows == 0:
+                raise ValueError("The selected file contains no data.")
+
+            move_time = None
+            if self.atomic:
+                self.status.emit(f"Moving {self._rows:,} rows into '{self.table_name}'…")
+                t0 = time.perf_counter()
+                self._move_stage(stage, columns)
+                move_time = time.perf_counter() - t0
+                self.rows_committed = self._rows
+            self.progress.emit(100)
+            report = self._throughput_report(move_time)
+            print(f"[INFO] Parallel import into [{self.table_name}]:\n{report}")
+            self.finished.emit(self._rows, (
+                f"✅ Successfully imported {self._rows:,} rows into '{self.table_name}' "
+                f"with {self.workers} connections.\n\n{report}"
+            ))
+
+        except Exception as e:
+            stop.set()
+            for writer in writers:
+                writer.join()   # count the chunks still being committed
+            committed = "" if self.atomic or not self._rows else (
+                f"\n\n{self._rows:,} rows were already committed to '{self.table_name}'.")
+            if self._cancelled:
+                self.cancelled.emit("Import cancelled." + (committed or " No rows were imported."))
+            else:
+                self.failed.emit(f"{e}{committed}")
+        finally:
+            stop.set()
+            for writer in writers:
+                writer.join()
+            if reader.is_alive():
+                reader.join()
+            if stage is not None:
+                self._drop_stage(stage)
+            if self.owns_connection:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+    # ------- Writer threads -------
+    def _write(self, index, target, columns, col_meta, chunks, stop):
+        stats = self._stats[index]
+        conn = loader = None
+        try:
+            conn = self.connection_factory()
+            conn.autocommit = False
+            while not stop.is_set():
+                self._check_cancelled()
+                t0 = time.perf_counter()
+                try:
+                    item = chunks.get(timeout=0.1)
+                except queue.Empty:
+                    stats["wait"] += time.perf_counter() - t0
+                    continue
+                t1 = time.perf_counter()
+                stats["wait"] += t1 - t0
+                if item is _END:
+                    self._put(chunks, _END, stop)   # let the other writers see it too
+                    break
+                if isinstance(item, Exception):
+                    raise item
+
+                df, fraction, first_row = item
+                df = validate_insert_frame(apply_mapping(df, self.mapping), col_meta, first_row=first_row)
+                if loader is None:
+                    # Each writer loads about its share of the rows estimated from the first chunk
+                    estimated = int(len(df) / fraction / self.workers) if fraction else None
+                    loader = open_bulk_loader(conn, target, columns, col_meta, self.strategy,
+                                              estimated_rows=estimated, staging_dir=self.staging_dir,
+                                              tablock=self.tablock and not self.atomic)
+                    self._loaders.append(loader)
+                    stats["strategy"] = loader.name
+                rows = loader.load(df)
+                if not self.atomic:
+                    loader.flush()
+                    conn.commit()
+                del df, item
+                stats["rows"] += rows
+                stats["chunks"] += 1
+                stats["busy"] += time.perf_counter() - t1
+                with self._lock:
+                    self._rows += rows
+                    if not self.atomic:
+                        self.rows_committed = self._rows
+                    if fraction is not None:
+                        self._fraction = max(self._fraction or 0, fraction)
+
+            if loader is not None and not stop.is_set():
+                loader.flush()
+                conn.commit()
+        except Exception as e:
+            self._errors.append(e)
+            stop.set()
+            if conn is not None:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+        finally:
+            if loader is not None:
+                loader.close()
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+
+    # ------- Staging table (coordinating connection) -------
+    def _create_stage(self, columns, col_meta):
+        stage = f"##esqli_import_{uuid.uuid4().hex[:12]}"
+        declarations = ", ".join(f"[{c}] {column_type_sql(col_meta[c])} NULL" for c in columns)
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"CREATE TABLE [{stage}] ({declarations})")
+        finally:
+            cursor.close()
+        self._commit_if_needed()
+        return stage
+
+    def _move_stage(self, stage, columns):
+        """Copy the staged rows into the table; a single statement, so all or nothing."""
+        column_list = ", ".join(f"[{c}]" for c in columns)
+        hint = " WITH (TABLOCK)" if self.tablock else ""
+        cursor = self.connection.cursor()
+        try:
+            cursor.execute(f"INSERT INTO [{self.table_name}]{hint} ({column_list}) "
+                           f"SELECT {column_list} FROM [{stage}]")
+        finally:
+            cursor.close()
+        self._commit_if_needed()
+
+    def _drop_stage(self, stage):
+        try:
+            cursor = self.connection.cursor()
+            cursor.execute(f"IF OBJECT_ID('tempdb..{stage}') IS NOT NULL DROP TABLE [{stage}]")
+            cursor.close()
+            self._commit_if_needed()
+        except Exception as e:
+            print(f"[WARN] Could not drop import staging table {stage}: {e}")
+
+    def _commit_if_needed(self):
+        if not getattr(self.connection, "autocommit", True):
+            self.connection.commit()
+
+    # ------- Reporting -------
+    def _report(self, rows, fraction):
+        elapsed = max(time.perf_counter() - self._started, 1e-9)
+        if fraction is not None:
+            self.progress.emit(min(int(fraction * 100), 99))
+        busy = sum(1 for s in self._stats if s["chunks"])
+        self.status.emit(f"Imported {rows:,} rows…\n{rows / elapsed:,.0f} rows/s on {busy}/{self.workers} connections")
+
+    def _throughput_report(self, move_time=None):
+        elapsed = max(time.perf_counter() - self._started, 1e-9)
+        lines = [f"{elapsed:.1f}s, {self._rows / elapsed:,.0f} rows/s overall"]
+        for i, s in enumerate(self._stats, 1):
+            rate = s["rows"] / s["busy"] if s["busy"] else 0
+            lines.append(f"Connection {i} ({s['strategy'] or 'idle'}): {s['rows']:,} rows in {s['chunks']} chunks, "
+                         f"{s['busy']:.1f}s busy ({rate:,.0f} rows/s), {s['wait']:.1f}s waiting for chunks")
+        if move_time is not None:
+            lines.append(f"Staging table → '{self.table_name}': {move_time:.1f}s")
+        return "\n".join(lines)
@@ -1,15 +1,24 @@
 import difflib
-import pandas as pd
+import os
 import re
-from PyQt5.QtWidgets import QFileDialog, QMessageBox
+from PyQt5.QtWidgets import QFileDialog, QMessageBox, QProgressDialog
+from PyQt5.QtCore import Qt
 
-from gui.other_windows.import_dialog import ImportMappingDialog
+from core.import_checkpoint import ImportCheckpoint
+from core.import_pipeline import IMPORT_CHUNK_SIZE, IMPORT_FILE_FILTER, ImportWorker, ParallelImportWorker, peek_file
+from gui.other_windows.import_dialog import ImportMappingDialog, ImportOptionsDialog
+from db.db_utils import fetch_server_and_database
 
+# Files from this size on offer import options (several connections, batch commits)
+LARGE_IMPORT_MIN_BYTES = 100 * 1024 ** 2
 
-def import_data_to_table(parent, controller, table_name):
+
+def import_data_to_table(parent, controller, table_name, on_finished=None):
     """
-    High-level import routine for JSON, CSV, and XLSX.
-    Handles reading, schema validation, and mapping dialog.
+    High-level import routine for CSV, JSON, JSON Lines and XLSX.
+    Handles schema validation and the mapping dialog, then streams the file
+    into the table in a background ImportWorker; `on_finished(rows)` is
+    called once the import has committed. Returns the worker.
     """
 
     if not table_name:
@@ -21,31 +30,34 @@ def import_data_to_table(parent, controller, table_name):
         parent,
         "Select Data File to Import",
         "",
-        "Data Files (*.csv *.json *.xlsx)"
+        IMPORT_FILE_FILTER
     )
     if not file_path:
         return
 
-    # 2️⃣ Read file via pandas
+    # Carry on with an interrupted batch-committed import of this file
+    checkpoint = _resumable_checkpoint(parent, controller, file_path, table_name)
+    if checkpoint is False:
+        return
+    if checkpoint is not None:
+        return _start_import(parent, controller, table_name, file_path, checkpoint.mapping, on_finished,
+                             commit_every=checkpoint.commit_every, checkpoint=checkpoint)
+
+    # 2️⃣ Peek at the first rows only; the import itself streams the file
     try:
-        if file_path.endswith(".csv"):
-            df = pd.read_csv(file_path)
-        elif file_path.endswith(".json"):
-            df = pd.read_json(file_path)
-        elif file_path.endswith(".xlsx"):
-            df = pd.read_excel(file_path)
-        else:
-            QMessageBox.warning(parent, "Invalid File", "Only CSV, JSON or XLSX files are supported.")
-            return
+        sample = peek_file(file_path)
+    except ValueError as e:
+        QMessageBox.warning(parent, "Invalid File", str(e))
+        return
     except Exception as e:
         QMessageBox.critical(parent, "Error", f"Failed to read file:\n{e}")
         return
 
-    if df.empty:
+    if sample is None or sample.empty:
         QMessageBox.warning(parent, "Empty File", "The selected file contains no data.")
         return
 
-    file_headers = list(df.columns)
+    file_headers = list(sample.columns)
     table_schema = controller.fetch_table_schema(table_name)  # [("id","INT",pk), ("name","TEXT",...)]
     table_columns = []
     ignored_columns = []
@@ -129,22 +141,135 @@ def import_data_to_table(parent, controller, table_name):
 
     final_mapping = dialog.get_mapping()
 
-    # Drop ignored columns
-    df = df[[col for col in final_mapping if final_mapping[col]]]
-    df.columns = [final_mapping[col] for col in df.columns]
+    # 6️⃣ Connections and transaction mode for large files
+    options = _ask_import_options(parent, controller, file_path)
+    if options is None:
+        return
+
+    # 7️⃣ Stream the file into the table
+    return _start_import(parent, controller, table_name, file_path, final_mapping, on_finished, **options)
+
 
-    # 6️⃣ Insert into table
+def _ask_import_options(parent, controller, file_path):
+    """
+    For large files, ask how many connections should insert chunks and
+    whether the import must be all or nothing. Returns {} for small files,
+    None if the user cancelled.
+    """
+    if os.path.getsize(file_path) < LARGE_IMPORT_MIN_BYTES:
+        return {}
+    parallel = getattr(controller, "connection_factory", None) is not None
+    dialog = ImportOptionsDialog(parent, os.path.getsize(file_path), parallel=parallel)
+    if dialog.exec_() != dialog.Accepted:
+        return None
+    return dialog.get_options()
+
+
+def _import_target(controller):
+    """(server, database) the import goes to, keying its checkpoint."""
     try:
-        inserted = controller.bulk_insert(table_name, df)
-        QMessageBox.information(
-            parent,
-            "Import Complete",
-            f"✅ Successfully imported {inserted} rows into '{table_name}'."
+        return fetch_server_and_database(controller.conn)
+    except Exception as e:
+        print(f"[WARN] Could not read the server name for the import checkpoint: {e}")
+        return None, controller.current_db
+
+
+def _resumable_checkpoint(parent, controller, file_path, table_name):
+    """
+    Checkpoint of an interrupted import of this file into the table (on the
+    same server and database) if the user chooses to resume it, otherwise
+    None (a stale one is removed). Returns False if the user cancelled.
+    """
+    server, database = _import_target(controller)
+    checkpoint = ImportCheckpoint.load(file_path, table_name, server=server, database=database)
+    if checkpoint is None:
+        return None
+    if checkpoint.resumable:
+        answer = QMessageBox.question(
+            parent, "Resume Import",
+            f"An earlier import of this file into '{table_name}' stopped after "
+            f"{checkpoint.rows:,} committed rows ({checkpoint.updated}).\n\n"
+            f"Resume from there? Choose No to start over.",
+            QMessageBox.Yes | QMessageBox.No | QMessageBox.Cancel, QMessageBox.Yes,
         )
-        return inserted
+        if answer == QMessageBox.Cancel:
+            return False
+        if answer == QMessageBox.Yes:
+            return checkpoint
+    checkpoint.remove()
+    return None
+
+
+def _open_import_conn(controller):
+    """(connection, owned): a dedicated connection when possible, else the shared one."""
+    open_connection = getattr(controller, "open_connection", None)
+    if open_connection is not None:
+        try:
+            conn = open_connection()
+            if conn is not None:
+                return conn, True
+        except Exception as e:
+            print(f"[WARN] Could not open import connection, using shared one: {e}")
+    return controller.conn, False
+
+
+def _start_import(parent, controller, table_name, file_path, mapping, on_finished=None,
+                  workers=1, atomic=True, tablock=False, commit_every=None, checkpoint=None):
+    """
+    Run an ImportWorker with a progress dialog; with workers > 1 a
+    ParallelImportWorker inserts over that many connections. Without
+    `atomic`, a single-connection import commits every `commit_every` rows
+    and records them in an ImportCheckpoint (`checkpoint` resumes one).
+    """
+    conn, owned = _open_import_conn(controller)
+
+    progress_dialog = QProgressDialog("Importing data, please wait...", "Cancel", 0, 100, parent)
+    progress_dialog.setWindowTitle(f"Importing into {table_name}")
+    progress_dialog.setWindowModality(Qt.WindowModal)
+    progress_dialog.setAutoClose(False)
+    progress_dialog.setAutoReset(False)
+    progress_dialog.show()
+
+    if workers > 1:
+        worker = ParallelImportWorker(conn, table_name, file_path, mapping, controller.open_connection,
+                                      workers=workers, atomic=atomic, tablock=tablock,
+                                      owns_connection=owned)
+    else:
+        if commit_every and checkpoint is None:
+            server, database = _import_target(controller)
+            checkpoint = ImportCheckpoint(file_path, table_name, mapping, IMPORT_CHUNK_SIZE, commit_every,
+                                          server=server, database=database)
+        chunk_size = checkpoint.chunk_size if checkpoint is not None else IMPORT_CHUNK_SIZE
+        worker = ImportWorker(conn, table_name, file_path, mapping, chunk_size=chunk_size, owns_connection=owned,
+                              tablock=tablock, commit_every=commit_every, checkpoint=checkpoint)
+    parent._import_thread = worker  # Keep reference
+
+    def on_done(rows, msg):
+        controller.invalidate_caches()
+        progress_dialog.close()
+        QMessageBox.information(parent, "Import Complete", msg)
+        if on_finished is not None:
+            on_finished(rows)
+
+    def on_stopped(title, msg, show):
+        if worker.rows_committed:
+            controller.invalidate_caches()   # committed batches stay in the table
+        progress_dialog.close()
+        show(parent, title, msg)
+
+    worker.progress.connect(progress_dialog.setValue)
+    worker.status.connect(progress_dialog.setLabelText)
+    worker.finished.connect(on_done)
+    worker.failed.connect(lambda err: on_stopped("Import Error", f"Failed to import data:\n{err}",
+                                                 QMessageBox.critical))
+    worker.cancelled.connect(lambda msg: on_stopped("Import Cancelled", msg, QMessageBox.information))
+    # Cooperative cancel: the worker stops between chunks and rolls back
+    # (an import that is not all or nothing keeps the rows it committed)
+    progress_dialog.canceled.connect(worker.cancel)
+
+    worker.start()
+    return worker
 
-    except Exception as e:
-        QMessageBox.critical(parent, "Import Error", f"Failed to import data:\n{e}")
 
 def _normalize_name(name: str) -> str:
     """Normalize column names for case-insensitive fuzzy matching."""
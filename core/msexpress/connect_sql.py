@@ -4,6 +4,8 @@ def connect_to_sql(host, database="master", username=None, password=None,
                    driver="{ODBC Driver 17 for SQL Server}", use_windows_auth=False):
     """
     Connect to a SQL Server instance using either SQL or Windows Authentication.
+    MARS is enabled so an open query result session can keep its cursor
+    while other statements run on the same connection.
 
     :param host: Server address (e.g. localhost\\SQLEXPRESS)
     :param database: Database name (default is master)
@@ -27,6 +29,7 @@ def connect_to_sql(host, database="master", username=None, password=None,
             f"DATABASE={database};"
             "Trusted_Connection=yes;"
             "TrustServerCertificate=yes;"
+            "MARS_Connection=yes;"
         )
     else:
         if not username or not password:
@@ -38,6 +41,7 @@ def connect_to_sql(host, database="master", username=None, password=None,
             f"UID={username};"
             f"PWD={password};"
             "TrustServerCertificate=yes;"
+            "MARS_Connection=yes;"
         )
 
     try:
@@ -0,0 +1,116 @@
+import threading
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+
+class _TrackingConnection:
+    """Connection proxy that remembers the most recently opened cursor (for cancel)."""
+
+    def __init__(self, connection):
+        self._connection = connection
+        self.active_cursor = None
+
+    def cursor(self):
+        cursor = self._connection.cursor()
+        self.active_cursor = cursor
+        return cursor
+
+    def __getattr__(self, name):
+        return getattr(self._connection, name)
+
+
+# ---------------------- Worker ----------------------
+class QueryWorker(QThread):
+    status = pyqtSignal(str)                 # progress text ("Running batch 2/5…")
+    resultReady = pyqtSignal(object, object) # QueryResults or None, stats dict
+    failed = pyqtSignal(str)                 # error / cancel / timeout message
+
+    def __init__(self, connection, query, page_size=500, timeout=None, owns_connection=False):
+        """
+        Run a query batch off the GUI thread.
+
+        :param connection: DB-API connection the batch runs on
+        :param timeout: seconds before the running statement is cancelled (None/0 = no limit)
+        :param owns_connection: close `connection` with the results (or when done)
+        """
+        super().__init__()
+        self.connection = _TrackingConnection(connection)
+        self.query = query
+        self.page_size = page_size
+        self.timeout = timeout or None
+        self.owns_connection = owns_connection
+        self._cancelled = False
+        self._timed_out = False
+
+    # ------- Control (GUI thread) -------
+    def cancel(self):
+        """Stop the batch: cancel the statement in flight and skip the rest."""
+        self._cancelled = True
+        cursor = self.connection.active_cursor
+        if cursor is not None:
+            try:
+                cursor.cancel()
+            except Exception as e:
+                print(f"[WARN] Could not cancel running statement: {e}")
+
+    def is_cancelled(self):
+        return self._cancelled
+
+    def _on_timeout(self):
+        self._timed_out = True
+        print(f"[INFO] Query exceeded {self.timeout}s timeout; cancelling.")
+        self.cancel()
+
+    # ------- Thread body -------
+    def run(self):
+        from db.db_utils import open_query_session
+
+        timer = None
+        if self.timeout:
+            timer = threading.Timer(self.timeout, self._on_timeout)
+            timer.daemon = True
+            timer.start()
+
+        results = None
+        started = time.perf_counter()
+        try:
+            def progress(index, total, _stmt):
+                self.status.emit(f"⏳ Running batch {index + 1}/{total}…")
+
+            results, stats = open_query_session(
+                self.connection, self.query, self.page_size,
+                progress=progress, cancel_check=self.is_cancelled,
+            )
+            if results is not None and not self._cancelled:
+                # Pull the first page here so the GUI thread does not block on it
+                self.status.emit("⏳ Fetching first page…")
+                results.active.fetch_page(0)
+
+            if self._cancelled:
+                raise InterruptedError(
+                    f"Query timed out after {self.timeout}s." if self._timed_out else "Query cancelled."
+                )
+
+            stats["elapsed"] = time.perf_counter() - started
+            if results is not None and self.owns_connection:
+                results.owned_connection = self.connection._connection
+            elif self.owns_connection:
+                self._close_connection()
+            self.resultReady.emit(results, stats)
+
+        except Exception as e:
+            if results is not None:
+                results.close()
+            if self.owns_connection:
+                self._close_connection()
+            self.failed.emit(str(e))
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+    def _close_connection(self):
+        try:
+            self.connection._connection.close()
+        except Exception:
+            pass
@@ -0,0 +1,331 @@
+"""
+Bulk-load strategies: how validated DataFrame chunks get into a table.
+
+    executemany   INSERT ... VALUES (?, ...) with pyodbc's fast_executemany
+    tvp           one INSERT ... SELECT FROM a table-valued parameter per
+                  chunk, typed by a table type created for the load
+    bulk_insert   chunks staged to a CSV file the server reads with
+                  BULK INSERT into a #temp table, then INSERT ... SELECT
+
+open_bulk_loader() picks the fastest one the server, the column types and
+the expected row count allow, falling back to the next one when a strategy
+cannot be set up (no permission, server cannot read the staging folder).
+Loaders never commit; the caller owns the transaction and closes the loader
+after it has committed or rolled back.
+"""
+import os
+import socket
+import tempfile
+import uuid
+
+from pandas.api.types import is_string_dtype
+
+# Loads expected to reach these row counts use the faster set-up-heavy strategies
+TVP_MIN_ROWS = 10_000
+FILE_MIN_ROWS = 250_000
+
+# Rows staged to the file before it is handed to BULK INSERT
+FILE_BATCH_ROWS = 500_000
+
+# Types a table type cannot hold or pyodbc cannot send as TVP values
+_TVP_UNSUPPORTED = {"text", "ntext", "image", "sql_variant", "timestamp", "hierarchyid",
+                    "geometry", "geography"}
+# Types a character data file cannot carry as written by _stage_chunk()
+_FILE_UNSUPPORTED = _TVP_UNSUPPORTED | {"binary", "varbinary", "xml"}
+
+
+class BulkLoadUnavailable(Exception):
+    """A strategy cannot be used for this load; the reason is the message."""
+
+
+def column_type_sql(meta):
+    """T-SQL declaration for a column from fetch_insert_metadata(), e.g. 'nvarchar(50)'."""
+    name = meta["type"]
+    maxlen = meta.get("maxlen")
+    if name in ("char", "varchar", "nchar", "nvarchar", "binary", "varbinary"):
+        return f"{name}({maxlen or 'max'})"
+    if name in ("decimal", "numeric"):
+        return f"{name}({meta['precision']},{meta['scale']})"
+    if name in ("datetime2", "time", "datetimeoffset"):
+        return f"{name}({meta['scale']})"
+    return name
+
+
+def _types_in(col_meta, columns, types):
+    return sorted({col_meta[c]["type"] for c in columns if c in col_meta and col_meta[c]["type"] in types})
+
+
+def _param_rows(df):
+    """Rows of a DataFrame as tuples of Python values, None for NaN/NaT/NA."""
+    params = df.astype(object).where(df.notna(), None)
+    return list(params.itertuples(index=False, name=None))
+
+
+# ---------------------- Strategies ----------------------
+class BulkLoader:
+    """Base class: send chunks of `columns` to `table_name` on `connection`."""
+    name = None
+
+    def __init__(self, connection, table_name, columns, col_meta, tablock=False):
+        self.connection = connection
+        self.table_name = table_name
+        self.columns = list(columns)
+        self.col_meta = col_meta
+        self.rows_loaded = 0
+        self.cursor = connection.cursor()
+        self._column_list = ", ".join(f"[{col}]" for col in self.columns)
+        # TABLOCK allows minimal logging of INSERT ... SELECT, but excludes other writers
+        self._target = f"[{table_name}] WITH (TABLOCK)" if tablock else f"[{table_name}]"
+
+    @classmethod
+    def unsupported_reason(cls, col_meta, columns):
+        """Why the column types rule this strategy out, or None."""
+        return None
+
+    def load(self, df):
+        """Send one chunk (columns in `self.columns` order); returns its row count."""
+        raise NotImplementedError
+
+    def flush(self):
+        """Make every row passed to load() visible in the current transaction."""
+
+    def close(self):
+        """Release server and local resources (after commit or rollback)."""
+        try:
+            self.cursor.close()
+        except Exception:
+            pass
+
+
+class ExecutemanyLoader(BulkLoader):
+    name = "executemany"
+
+    def __init__(self, connection, table_name, columns, col_meta, tablock=False, batch_rows=1000):
+        super().__init__(connection, table_name, columns, col_meta, tablock)
+        self.batch_rows = batch_rows
+        placeholders = ", ".join(["?"] * len(self.columns))
+        self.sql = f"INSERT INTO {self._target} ({self._column_list}) VALUES ({placeholders})"
+        self.cursor.fast_executemany = True   # once per cursor
+
+    def load(self, df):
+        rows = _param_rows(df)
+        for start in range(0, len(rows), self.batch_rows):
+            self.cursor.executemany(self.sql, rows[start:start + self.batch_rows])
+        self.rows_loaded += len(rows)
+        return len(rows)
+
+
+class TvpLoader(BulkLoader):
+    name = "tvp"
+
+    def __init__(self, connection, table_name, columns, col_meta, tablock=False):
+        super().__init__(connection, table_name, columns, col_meta, tablock)
+        self.type_name = f"esqli_load_{uuid.uuid4().hex[:12]}"
+        declarations = ", ".join(f"[{c}] {column_type_sql(col_meta[c])}" for c in self.columns)
+        try:
+            self.cursor.execute(f"CREATE TYPE [dbo].[{self.type_name}] AS TABLE ({declarations})")
+        except Exception as e:
+            self.type_name = None
+            super().close()
+            raise BulkLoadUnavailable(f"cannot create a table type: {e}") from e
+        self.sql = (f"INSERT INTO {self._target} ({self._column_list}) "
+                    f"SELECT {self._column_list} FROM ?")
+
+    @classmethod
+    def unsupported_reason(cls, col_meta, columns):
+        types = _types_in(col_meta, columns, _TVP_UNSUPPORTED)
+        return f"column types {', '.join(types)} cannot be table-valued parameters" if types else None
+
+    def load(self, df):
+        rows = _param_rows(df)
+        if rows:
+            # An explicit type name lets pyodbc bind the TVP outside a stored procedure
+            self.cursor.execute(self.sql, [[self.type_name, "dbo"] + rows])
+        self.rows_loaded += len(rows)
+        return len(rows)
+
+    def close(self):
+        if self.type_name is not None:
+            try:
+                self.cursor.execute(f"IF TYPE_ID('dbo.{self.type_name}') IS NOT NULL "
+                                    f"DROP TYPE [dbo].[{self.type_name}]")
+                if not getattr(self.connection, "autocommit", True):
+                    self.connection.commit()
+            except Exception as e:
+                print(f"[WARN] Could not drop bulk-load table type {self.type_name}: {e}")
+        super().close()
+
+
+class FileBulkLoader(BulkLoader):
+    name = "bulk_insert"
+
+    def __init__(self, connection, table_name, columns, col_meta, tablock=False, staging_dir=None,
+                 batch_rows=FILE_BATCH_ROWS):
+        staging_dir = staging_dir or _local_staging_dir(connection)
+        super().__init__(connection, table_name, columns, col_meta, tablock)
+        self.staging_dir = staging_dir
+        self.batch_rows = batch_rows
+        self.stage_table = f"#esqli_stage_{uuid.uuid4().hex[:12]}"
+        self.path = os.path.join(self.staging_dir, f"esqli_{uuid.uuid4().hex}.csv")
+        self._file = None
+        self._staged = 0
+        declarations = ", ".join(f"[{c}] {column_type_sql(col_meta[c])} NULL" for c in self.columns)
+        try:
+            self.cursor.execute(f"CREATE TABLE [{self.stage_table}] ({declarations})")
+            # Probe: an empty file proves the server can open files in the staging folder
+            open(self.path, "w").close()
+            self._bulk_insert()
+        except Exception as e:
+            self.close()
+            raise BulkLoadUnavailable(f"server cannot BULK INSERT from {self.staging_dir}: {e}") from e
+
+    @classmethod
+    def unsupported_reason(cls, col_meta, columns):
+        types = _types_in(col_meta, columns, _FILE_UNSUPPORTED)
+        return f"column types {', '.join(types)} cannot be staged as text" if types else None
+
+    def load(self, df):
+        if self._file is None:
+            self._file = open(self.path, "w", encoding="utf-8", newline="")
+        _stage_chunk(df, self.col_meta, self._file)
+        self._staged += len(df)
+        self.rows_loaded += len(df)
+        if self._staged >= self.batch_rows:
+            self.flush()
+        return len(df)
+
+    def flush(self):
+        if self._file is None:
+            return
+        self._file.close()
+        self._file = None
+        self._bulk_insert()
+        self.cursor.execute(f"INSERT INTO {self._target} ({self._column_list}) "
+                            f"SELECT {self._column_list} FROM [{self.stage_table}]")
+        self.cursor.execute(f"TRUNCATE TABLE [{self.stage_table}]")
+        self._staged = 0
+
+    def _bulk_insert(self):
+        path = self.path.replace("'", "''")
+        self.cursor.execute(
+            f"BULK INSERT [{self.stage_table}] FROM '{path}' "
+            f"WITH (FORMAT = 'CSV', CODEPAGE = '65001', ROWTERMINATOR = '0x0a', KEEPNULLS, TABLOCK)"
+        )
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        if os.path.exists(self.path):
+            try:
+                os.remove(self.path)
+            except OSError as e:
+                print(f"[WARN] Could not remove bulk-load staging file: {e}")
+        try:
+            self.cursor.execute(f"IF OBJECT_ID('tempdb..{self.stage_table}') IS NOT NULL "
+                                f"DROP TABLE [{self.stage_table}]")
+        except Exception:
+            pass
+        super().close()
+
+
+def _stage_chunk(df, col_meta, f):
+    """
+    Append a chunk to the staging file as RFC 4180 CSV. NULLs are empty
+    fields and text is always quoted, so with KEEPNULLS an empty string
+    ('""') stays an empty string instead of becoming NULL.
+    """
+    fields = []
+    for col in df.columns:
+        series = df[col]
+        meta = col_meta.get(col, {})
+        present = series.notna()
+        if meta.get("type") in ("datetime", "smalldatetime") and hasattr(series, "dt"):
+            # These types reject more than 3 fractional digits
+            text = series.dt.strftime("%Y-%m-%d %H:%M:%S.%f").str[:-3]
+        elif hasattr(series, "dt"):
+            text = series.dt.strftime("%Y-%m-%d %H:%M:%S.%f")
+        elif meta.get("type") == "bit":
+            text = series.map({True: "1", False: "0"})
+        else:
+            text = series.astype(object).where(present, "").astype(str)
+            if series.dtype == object or is_string_dtype(series.dtype):
+                text = '"' + text.str.replace('"', '""', regex=False) + '"'
+        fields.append(text.where(present, ""))
+    if not len(df):
+        return
+    lines = fields[0]
+    for text in fields[1:]:
+        lines = lines + "," + text
+    f.write("\n".join(lines) + "\n")
+
+
+def _local_staging_dir(connection):
+    """The temp folder, when the server runs on this machine and can read it."""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("SELECT CAST(SERVERPROPERTY('MachineName') AS nvarchar(128))")
+        machine = cursor.fetchone()[0]
+    finally:
+        cursor.close()
+    if not machine or machine.lower() != socket.gethostname().split(".")[0].lower():
+        raise BulkLoadUnavailable(f"server {machine} is not this machine and no staging folder was given")
+    return tempfile.gettempdir()
+
+
+BULK_LOAD_STRATEGIES = {
+    ExecutemanyLoader.name: ExecutemanyLoader,
+    TvpLoader.name: TvpLoader,
+    FileBulkLoader.name: FileBulkLoader,
+}
+
+
+# ---------------------- Selection ----------------------
+def bulk_load_candidates(col_meta, columns, estimated_rows=None):
+    """Strategy names worth trying for this load, fastest first."""
+    if estimated_rows is not None and estimated_rows < TVP_MIN_ROWS:
+        return [ExecutemanyLoader.name]
+    names = []
+    if estimated_rows is not None and estimated_rows >= FILE_MIN_ROWS:
+        names.append(FileBulkLoader.name)
+    names += [TvpLoader.name, ExecutemanyLoader.name]
+    return [n for n in names if BULK_LOAD_STRATEGIES[n].unsupported_reason(col_meta, columns) is None]
+
+
+def open_bulk_loader(connection, table_name, columns, col_meta, strategy="auto", estimated_rows=None,
+                     staging_dir=None, tablock=False):
+    """
+    Open a BulkLoader for inserting `columns` into `table_name`.
+
+    :param strategy: "auto" to choose by row count and column types, or a key
+                     of BULK_LOAD_STRATEGIES to force one (no fallback)
+    :param estimated_rows: expected rows of the whole load, if known
+    :param staging_dir: folder both this machine and the server can reach, for
+                        the bulk_insert strategy (default: the temp folder,
+                        only when the server is local)
+    :param tablock: take a table lock for the inserts (WITH (TABLOCK))
+    """
+    if strategy != "auto":
+        cls = BULK_LOAD_STRATEGIES[strategy]
+        reason = cls.unsupported_reason(col_meta, columns)
+        if reason:
+            raise BulkLoadUnavailable(reason)
+        return _open(cls, connection, table_name, columns, col_meta, staging_dir, tablock)
+
+    candidates = bulk_load_candidates(col_meta, columns, estimated_rows)
+    for name in candidates:
+        try:
+            loader = _open(BULK_LOAD_STRATEGIES[name], connection, table_name, columns, col_meta,
+                           staging_dir, tablock)
+        except BulkLoadUnavailable as e:
+            print(f"[INFO] Bulk load: skipping {name} ({e})")
+            continue
+        print(f"[INFO] Bulk load into [{table_name}] using {name}")
+        return loader
+    return ExecutemanyLoader(connection, table_name, columns, col_meta, tablock)
+
+
+def _open(cls, connection, table_name, columns, col_meta, staging_dir, tablock):
+    if cls is FileBulkLoader:
+        return cls(connection, table_name, columns, col_meta, tablock, staging_dir=staging_dir)
+    return cls(connection, table_name, columns, col_meta, tablock)
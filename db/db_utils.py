@@ -1,6 +1,6 @@
 import sys
-import re
-import pandas as pd
+
+from db.result_set import ColumnarResult
 
 def fetch_databases(connection):
     """Return a list of database names."""
@@ -14,6 +14,19 @@ def fetch_tables(connection):
     cursor.execute("SELECT TABLE_NAME FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_TYPE='BASE TABLE'")
     return [row[0] for row in cursor.fetchall()]
 
+def fetch_table_modify_dates(connection):
+    """Return {table_name: modify_date} for the user tables of the current database."""
+    cursor = connection.cursor()
+    cursor.execute("SELECT name, modify_date FROM sys.objects WHERE type = 'U' AND is_ms_shipped = 0")
+    return {row[0]: row[1] for row in cursor.fetchall()}
+
+def fetch_server_and_database(connection):
+    """Return (server name, current database name) of the connection."""
+    cursor = connection.cursor()
+    cursor.execute("SELECT @@SERVERNAME, DB_NAME()")
+    server, database = cursor.fetchone()
+    return server, database
+
 def use_database(connection, database_name):
     """Switch context to a specific database."""
     cursor = connection.cursor()
@@ -56,6 +69,57 @@ def fetch_table_schema(connection, table_name):
         result.append((col_name, data_type, is_primary, is_identity, is_nullable))
     return result
 
+def fetch_database_schema(connection, modified_since=None):
+    """
+    Load the schema of every user table in one set-based query.
+
+    Returns (schemas, modify_dates): {table: [(column_name, data_type,
+    is_primary_key, is_identity, is_nullable), ...]} in column order (the
+    same tuples fetch_table_schema() returns) and {table: modify_date}.
+    With `modified_since`, only tables modified at or after it are returned.
+    """
+    sql = """
+        SELECT
+            t.name,
+            t.modify_date,
+            c.name,
+            TYPE_NAME(c.system_type_id),
+            CASE WHEN pk.column_id IS NOT NULL THEN 1 ELSE 0 END,
+            CASE WHEN ic.column_id IS NOT NULL THEN 1 ELSE 0 END,
+            c.is_nullable
+        FROM sys.tables t
+        JOIN sys.columns c ON c.object_id = t.object_id
+        LEFT JOIN (
+            SELECT ixc.object_id, ixc.column_id
+            FROM sys.indexes ix
+            JOIN sys.index_columns ixc
+                ON ixc.object_id = ix.object_id AND ixc.index_id = ix.index_id
+            WHERE ix.is_primary_key = 1
+        ) pk ON pk.object_id = c.object_id AND pk.column_id = c.column_id
+        LEFT JOIN sys.identity_columns ic
+            ON ic.object_id = c.object_id AND ic.column_id = c.column_id
+        WHERE t.is_ms_shipped = 0
+    """
+    params = ()
+    if modified_since is not None:
+        sql += " AND t.modify_date >= ?"
+        params = (modified_since,)
+    sql += " ORDER BY t.name, c.column_id"
+
+    cursor = connection.cursor()
+    cursor.execute(sql, params)
+    schemas, modify_dates = {}, {}
+    # Type names repeat across thousands of columns; intern them once
+    type_names = {}
+    for table, modified, column, data_type, is_primary, is_identity, is_nullable in cursor.fetchall():
+        columns = schemas.get(table)
+        if columns is None:
+            columns = schemas[table] = []
+            modify_dates[table] = modified
+        data_type = type_names.setdefault(data_type, data_type)
+        columns.append((column, data_type, bool(is_primary), bool(is_identity), bool(is_nullable)))
+    return schemas, modify_dates
+
 def fetch_table_preview(connection, table_name, limit=50):
     """Return up to `limit` rows and column names from a table."""
     cursor = connection.cursor()
@@ -139,13 +203,15 @@ def insert_row(connection, table_name, values):
     cursor.execute(query, list(values.values()))
     connection.commit()
 
-def update_table_cell(connection, table, column, pk_value, new_value, row_values=None, headers=None):
+def update_table_cell(connection, table, column, pk_value, new_value, row_values=None, headers=None,
+                      pk_columns=None):
     """
     Update a cell in a table.
     1. If a PK exists, update using it.
     2. If no PK, find a single exact matching row based on all column values.
        - If multiple matches, deny update.
        - If exactly one match, update that row.
+    `pk_columns` (e.g. from the schema catalog) skips the primary key lookup.
     """
     cursor = connection.cursor()
 
@@ -154,13 +220,16 @@ def update_table_cell(connection, table, column, pk_value, new_value, row_values
         new_value = None
 
     # Step 1: Try primary key update
-    cursor.execute("""
-        SELECT COLUMN_NAME
-        FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
-        WHERE OBJECTPROPERTY(OBJECT_ID(CONSTRAINT_NAME), 'IsPrimaryKey') = 1
-          AND LOWER(TABLE_NAME) = LOWER(?)
-    """, (table,))
-    pk_row = cursor.fetchone()
+    if pk_columns is None:
+        cursor.execute("""
+            SELECT COLUMN_NAME
+            FROM INFORMATION_SCHEMA.KEY_COLUMN_USAGE
+            WHERE OBJECTPROPERTY(OBJECT_ID(CONSTRAINT_NAME), 'IsPrimaryKey') = 1
+              AND LOWER(TABLE_NAME) = LOWER(?)
+        """, (table,))
+        pk_row = cursor.fetchone()
+    else:
+        pk_row = pk_columns[:1]
 
     if pk_row:
         pk_col = pk_row[0]  # tuple-safe
@@ -205,90 +274,83 @@ def update_table_cell(connection, table, column, pk_value, new_value, row_values
     connection.commit()
     return cursor.rowcount
 
-def bulk_insert(connection, table_name, df, chunk_size=1000, parent=None):
+def fetch_insert_metadata(connection, table_name):
+    """
+    Column name -> {"type", "maxlen", "precision", "scale", "nullable"} for
+    validating rows before they are inserted (see db.insert_validation).
+    `maxlen` is in characters for string types and None for (max) columns.
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            SELECT c.name, TYPE_NAME(c.system_type_id), c.max_length, c.precision, c.scale, c.is_nullable
+            FROM sys.columns c
+            WHERE c.object_id = OBJECT_ID(QUOTENAME(?))
+            ORDER BY c.column_id
+        """, (table_name,))
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+    col_meta = {}
+    for name, type_name, max_length, precision, scale, nullable in rows:
+        maxlen = None
+        if max_length and max_length > 0:
+            maxlen = max_length // 2 if type_name in ("nvarchar", "nchar") else max_length
+        col_meta[name] = {
+            "type": type_name,
+            "maxlen": maxlen,
+            "precision": precision,
+            "scale": scale,
+            "nullable": bool(nullable),
+        }
+    return col_meta
+
+
+def bulk_insert(connection, table_name, df, parent=None, strategy="auto", staging_dir=None,
+                commit_every=None):
     """
     Insert many rows into a table efficiently using pyodbc.
     Detects invalid type conversions (e.g., string in numeric column) and reports clearly.
+    The rows go in with the bulk-load `strategy` (see db.bulk_load) as one transaction,
+    or with `commit_every` in transactions of that many rows; a failure then keeps
+    the batches committed before it.
     """
-    import math
-    import pandas as pd
-    import numpy as np
     from PyQt5.QtWidgets import QMessageBox
+    from db.bulk_load import open_bulk_loader
+    from db.insert_validation import validate_insert_frame
 
     if df is None or df.empty:
         return 0
 
-    cursor = connection.cursor()
+    loader = None
+    previous_autocommit = getattr(connection, "autocommit", None)
     try:
-        # 1️⃣ Get metadata (column names and SQL types)
-        cursor.execute(f"SELECT TOP 0 * FROM [{table_name}]")
-        desc = cursor.description
-        col_meta = {
-            d[0]: {
-                "type_code": d[1],
-                "maxlen": d[3] or d[4] or None,
-            }
-            for d in desc
-        }
+        if previous_autocommit:
+            connection.autocommit = False
 
-        # 2️⃣ Validate and sanitize values
-        for col in df.columns:
-            meta = col_meta.get(col, {})
-            sql_type = meta.get("type_code")
-            maxlen = meta.get("maxlen")
-
-            # --- Trim long strings for varchar/nvarchar ---
-            if maxlen and maxlen > 0 and df[col].dtype == object:
-                df[col] = df[col].astype(str).apply(
-                    lambda v: v[:maxlen] if isinstance(v, str) and len(v) > maxlen else v
-                )
-
-            # --- Detect numeric columns ---
-            # SQL numeric type_codes vary by driver: 4=INT, 3=DECIMAL, 5=FLOAT, -5=BIGINT, etc.
-            numeric_codes = {2, 3, 4, 5, 6, 7, -5, -6}
-            if sql_type in numeric_codes:
-                bad_rows = []
-                for idx, v in enumerate(df[col]):
-                    if v in (None, "", np.nan):
-                        continue
-                    try:
-                        float(v)
-                    except Exception:
-                        bad_rows.append((idx + 1, v))
-
-                if bad_rows:
-                    examples = ", ".join(f"'{val}' (row {i})" for i, val in bad_rows[:3])
-                    msg = (
-                        f"❌ Column '{col}' expects numeric data.\n\n"
-                        f"Found invalid values: {examples}"
-                        + (f"\n… and {len(bad_rows) - 3} more." if len(bad_rows) > 3 else "")
-                    )
-                    if parent:
-                        QMessageBox.critical(parent, "Invalid Data Type", msg)
-                    raise ValueError(msg)
-
-        # 3️⃣ Prepare insert query
-        columns = ", ".join(f"[{col}]" for col in df.columns)
-        placeholders = ", ".join(["?"] * len(df.columns))
-        query = f"INSERT INTO [{table_name}] ({columns}) VALUES ({placeholders})"
-
-        values = [
-            tuple(None if pd.isna(v) else v for v in row)
-            for row in df.to_numpy()
-        ]
-        total = len(values)
-        num_chunks = math.ceil(total / chunk_size)
-
-        # 4️⃣ Execute in chunks
-        for i in range(num_chunks):
-            chunk = values[i * chunk_size:(i + 1) * chunk_size]
-            cursor.fast_executemany = True
-            cursor.executemany(query, chunk)
+        # 1️⃣ Get metadata (column names and SQL types)
+        col_meta = fetch_insert_metadata(connection, table_name)
 
-        connection.commit()
+        # 2️⃣ Validate and convert values (one report for every bad value)
+        try:
+            df = validate_insert_frame(df, col_meta)
+        except ValueError as e:
+            if parent:
+                QMessageBox.critical(parent, "Invalid Data Type", str(e))
+            raise
+
+        # 3️⃣ Load with the fastest strategy available for this many rows
+        loader = open_bulk_loader(connection, table_name, list(df.columns), col_meta, strategy,
+                                  estimated_rows=len(df), staging_dir=staging_dir)
+        total = 0
+        step = commit_every or len(df)
+        for start in range(0, len(df), step):
+            total += loader.load(df.iloc[start:start + step])
+            loader.flush()
+            connection.commit()
         return total
 
-    except Exception as e:
+    except Exception:
         if connection:
             try:
                 connection.rollback()
@@ -298,13 +360,10 @@ def bulk_insert(connection, table_name, df, chunk_size=1000, parent=None):
         raise
 
     finally:
-        if cursor:
-            try:
-                cursor.close()
-            except Exception:
-                pass
-
-
+        if loader is not None:
+            loader.close()
+        if previous_autocommit:
+            connection.autocommit = previous_autocommit
 
 
 def rename_column(connection, table_name, old_name, new_name):
@@ -467,104 +526,496 @@ def set_nullable(connection, table, column, enabled):
 
 
 
-def fetch_full_table_paginated(connection, table_name, chunk_size=10000):
-    """Generator that yields rows from a table in chunks."""
+def fetch_table_key_columns(connection, table_name):
+    """
+    Return the ordered key columns that uniquely identify rows of a table.
+
+    Prefers the primary key, then a unique clustered index, then any other
+    unique index whose key columns are all NOT NULL. Returns an empty list
+    for heaps and tables without a usable unique key.
+    """
     cursor = connection.cursor()
-    cursor.execute(f"SELECT COUNT(*) FROM [{table_name}]")
-    total_rows = cursor.fetchone()[0]
-    if total_rows == 0:
-        return [], []
+    cursor.execute("""
+        SELECT i.index_id, c.name, c.is_nullable
+        FROM sys.indexes i
+        JOIN sys.index_columns ic
+            ON ic.object_id = i.object_id AND ic.index_id = i.index_id
+        JOIN sys.columns c
+            ON c.object_id = ic.object_id AND c.column_id = ic.column_id
+        WHERE i.object_id = OBJECT_ID(QUOTENAME(?))
+          AND i.is_unique = 1
+          AND i.is_disabled = 0
+          AND i.has_filter = 0
+          AND ic.key_ordinal > 0
+        ORDER BY
+            CASE WHEN i.is_primary_key = 1 THEN 0 WHEN i.type = 1 THEN 1 ELSE 2 END,
+            i.index_id,
+            ic.key_ordinal
+    """, (table_name,))
 
-    cursor.execute(f"SELECT TOP 0 * FROM [{table_name}]")
-    columns = [desc[0] for desc in cursor.description]
+    # Group columns per index, keeping the preferred index order
+    candidates = {}
+    for index_id, col_name, is_nullable in cursor.fetchall():
+        candidates.setdefault(index_id, []).append((col_name, bool(is_nullable)))
 
-    offset = 0
-    while offset < total_rows:
-        query = f"""
-            SELECT * FROM [{table_name}]
-            ORDER BY (SELECT NULL)
-            OFFSET {offset} ROWS FETCH NEXT {chunk_size} ROWS ONLY;
-        """
-        cursor.execute(query)
-        rows = cursor.fetchall()
-        if not rows:
-            break
-        yield columns, rows
-        offset += len(rows)
+    for cols in candidates.values():
+        if not any(nullable for _, nullable in cols):
+            return [name for name, _ in cols]
+    return []
 
-import pandas as pd
-import re
+def _build_keyset_predicate(key_columns, last_key):
+    """
+    Build a WHERE clause selecting rows strictly after `last_key` in key order.
 
-def fetch_query_with_pagination(connection, query, page=0, page_size=500):
+    For keys (a, b) this yields "([a] > ?) OR ([a] = ? AND [b] > ?)", which
+    SQL Server turns into a single index seek.
     """
-    Execute any SQL query (including multi-statement batches).
-    SELECT queries are paginated; non-SELECT queries execute directly.
-    Returns (columns, rows, stats) where stats is a dict with counts.
+    clauses, params = [], []
+    for i, col in enumerate(key_columns):
+        parts = [f"[{prev}] = ?" for prev in key_columns[:i]]
+        parts.append(f"[{col}] > ?")
+        clauses.append("(" + " AND ".join(parts) + ")")
+        params.extend(last_key[:i + 1])
+    return " OR ".join(clauses), params
+
+def _fetch_table_keyset_pages(connection, table_name, key_columns, chunk_size, lower=None, upper=None,
+                              after_key=None):
     """
-    import re
-    import pandas as pd
+    Yield (columns, rows) pages using WHERE key > @last ORDER BY key.
 
-    if not query or not query.strip():
-        return [], [], {"success": 0, "failed": 0, "total": 0}
+    `lower`/`upper` restrict a single-column key to lower < key <= upper
+    (None = unbounded), which is how partitioned exports read their range.
+    `after_key` (values of all key columns) starts after that row, which is
+    how a checkpointed export resumes.
+    """
+    cursor = connection.cursor()
+    order_by = ", ".join(f"[{c}]" for c in key_columns)
+    last_key = list(after_key) if after_key is not None else (None if lower is None else [lower])
+    key_positions = None
 
-    query = query.strip().strip(';').strip('"').strip("'")
+    try:
+        while True:
+            clauses, params = [], []
+            if last_key is not None:
+                where_sql, params = _build_keyset_predicate(key_columns, last_key)
+                clauses.append(f"({where_sql})" if len(key_columns) > 1 else where_sql)
+            if upper is not None:
+                clauses.append(f"[{key_columns[0]}] <= ?")
+                params.append(upper)
+            sql = f"SELECT TOP {int(chunk_size)} * FROM [{table_name}]"
+            if clauses:
+                cursor.execute(f"{sql} WHERE {' AND '.join(clauses)} ORDER BY {order_by}", params)
+            else:
+                cursor.execute(f"{sql} ORDER BY {order_by}")
+            columns = [desc[0] for desc in cursor.description]
+            rows = cursor.fetchall()
+            if not rows:
+                break
+
+            yield columns, rows
+
+            if len(rows) < chunk_size:
+                break
+            if key_positions is None:
+                key_positions = [columns.index(c) for c in key_columns]
+            last_row = rows[-1]
+            last_key = [last_row[i] for i in key_positions]
+    finally:
+        # Also runs when the consumer stops early (generator.close())
+        cursor.close()
 
-    # Split into SQL statements
-    statements = [s.strip() for s in re.split(r';\s*(?:\r?\n)+', query) if s.strip()]
+def _fetch_table_offset_pages(connection, table_name, chunk_size):
+    """Yield (columns, rows) pages using OFFSET/FETCH (heap tables only)."""
+    cursor = connection.cursor()
+    offset = 0
+    try:
+        while True:
+            cursor.execute(f"""
+                SELECT * FROM [{table_name}]
+                ORDER BY (SELECT NULL)
+                OFFSET {offset} ROWS FETCH NEXT {int(chunk_size)} ROWS ONLY;
+            """)
+            columns = [desc[0] for desc in cursor.description]
+            rows = cursor.fetchall()
+            if not rows:
+                break
+            yield columns, rows
+            if len(rows) < chunk_size:
+                break
+            offset += len(rows)
+    finally:
+        cursor.close()
 
-    all_columns, all_rows = [], []
-    success_count, fail_count = 0, 0
+def fetch_full_table_paginated(connection, table_name, chunk_size=10000, after_key=None):
+    """
+    Generator that yields (columns, rows) from a table in chunks.
+
+    Pages are read with keyset (seek) pagination on the primary key or a
+    unique clustered index, so every page costs the same regardless of how
+    deep into the table it is and the order is stable. Heap tables without
+    a usable key fall back to OFFSET/FETCH. With `after_key` (the key values
+    of a row, in fetch_table_key_columns() order) reading resumes after that
+    row; it requires a keyed table.
+    """
+    key_columns = fetch_table_key_columns(connection, table_name)
+    if after_key is not None and len(after_key) != len(key_columns):
+        raise ValueError(f"Cannot resume [{table_name}]: its key columns changed ({key_columns}).")
+    if key_columns:
+        print(f"[DEBUG] Keyset pagination on [{table_name}] by {key_columns}")
+        yield from _fetch_table_keyset_pages(connection, table_name, key_columns, chunk_size,
+                                             after_key=after_key)
+    else:
+        print(f"[DEBUG] No unique key on [{table_name}]; falling back to OFFSET pagination")
+        yield from _fetch_table_offset_pages(connection, table_name, chunk_size)
 
-    for stmt in statements:
-        # Skip empty/comment-only statements
-        if not re.search(r'\w', stmt):
-            continue
+def _key_type_sql(connection, table_name, key_column):
+    """T-SQL type declaration of a column, e.g. 'decimal(18,2)' or 'nvarchar(50)'."""
+    cursor = connection.cursor()
+    try:
+        cursor.execute("""
+            SELECT TYPE_NAME(c.system_type_id), c.max_length, c.precision, c.scale
+            FROM sys.columns c
+            WHERE c.object_id = OBJECT_ID(QUOTENAME(?)) AND c.name = ?
+        """, (table_name, key_column))
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    if row is None:
+        return None
+    name, max_length, precision, scale = row
+    if name in ("varchar", "char", "varbinary", "binary"):
+        return f"{name}({'max' if max_length == -1 else max_length})"
+    if name in ("nvarchar", "nchar"):
+        return f"{name}({'max' if max_length == -1 else max_length // 2})"
+    if name in ("decimal", "numeric"):
+        return f"{name}({precision},{scale})"
+    if name in ("datetime2", "time", "datetimeoffset"):
+        return f"{name}({scale})"
+    return name
+
+def _histogram_boundaries(connection, table_name, key_column, partitions):
+    """
+    Range boundaries that split the key's statistics histogram into
+    `partitions` parts of about the same row count ([] if there is none).
+    Needs sys.dm_db_stats_histogram (SQL Server 2016 SP1 CU2 and later).
+    """
+    type_sql = _key_type_sql(connection, table_name, key_column)
+    if type_sql is None:
+        return []
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"""
+            SELECT s.stats_id, CAST(h.range_high_key AS {type_sql}), h.range_rows + h.equal_rows
+            FROM sys.stats s
+            JOIN sys.stats_columns sc
+                ON sc.object_id = s.object_id AND sc.stats_id = s.stats_id AND sc.stats_column_id = 1
+            CROSS APPLY sys.dm_db_stats_histogram(s.object_id, s.stats_id) h
+            WHERE s.object_id = OBJECT_ID(QUOTENAME(?))
+              AND sc.column_id = COLUMNPROPERTY(s.object_id, ?, 'ColumnId')
+            ORDER BY s.stats_id, h.step_number
+        """, (table_name, key_column))
+        steps = cursor.fetchall()
+    except Exception as e:
+        print(f"[DEBUG] No histogram for [{table_name}].[{key_column}]: {e}")
+        return []
+    finally:
+        cursor.close()
+    if not steps:
+        return []
+
+    # One statistics object is enough (the first one leading on the key)
+    stats_id = steps[0][0]
+    steps = [(high, rows or 0) for sid, high, rows in steps if sid == stats_id and high is not None]
+    total = sum(rows for _, rows in steps)
+    if total <= 0:
+        return []
+
+    bounds, seen, i = [], 0, 1
+    for high, rows in steps[:-1]:
+        seen += rows
+        while i < partitions and seen >= total * i / partitions:
+            if not bounds or bounds[-1] < high:
+                bounds.append(high)
+            i += 1
+    return bounds
+
+def _min_max_boundaries(connection, table_name, key_column, partitions):
+    """Evenly spaced boundaries between MIN(key) and MAX(key) for numeric and date keys."""
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"SELECT MIN([{key_column}]), MAX([{key_column}]) FROM [{table_name}]")
+        low, high = cursor.fetchone()
+    finally:
+        cursor.close()
+    if low is None or high is None or isinstance(low, bool):
+        return []
+    bounds = []
+    try:
+        for i in range(1, partitions):
+            bound = low + (high - low) * i // partitions
+            if bound >= high:
+                break
+            if not bounds or bounds[-1] < bound:
+                bounds.append(bound)
+    except TypeError:
+        return []   # strings, GUIDs, ... cannot be interpolated
+    return bounds
+
+def fetch_table_key_ranges(connection, table_name, partitions):
+    """
+    Split a table into up to `partitions` contiguous ranges of its key.
+
+    Boundaries come from the key's statistics histogram when available
+    (ranges of similar row count even for skewed keys), otherwise from
+    evenly spaced MIN/MAX values. Returns (key_column, ranges) where each
+    range is (lower, upper) meaning lower < key <= upper and None is
+    unbounded, so the ranges together always cover the whole table.
+    Tables without a single-column unique key come back as one range
+    with key_column None.
+    """
+    key_columns = fetch_table_key_columns(connection, table_name)
+    if len(key_columns) != 1:
+        return None, [(None, None)]
+    key_column = key_columns[0]
+    if partitions <= 1:
+        return key_column, [(None, None)]
+
+    bounds = _histogram_boundaries(connection, table_name, key_column, partitions)
+    source = "histogram"
+    if not bounds:
+        bounds = _min_max_boundaries(connection, table_name, key_column, partitions)
+        source = "min/max"
+    ranges = list(zip([None] + bounds, bounds + [None]))
+    print(f"[DEBUG] [{table_name}] split into {len(ranges)} key ranges on [{key_column}] ({source})")
+    return key_column, ranges
+
+def fetch_table_range_paginated(connection, table_name, key_column, lower=None, upper=None,
+                                chunk_size=10000):
+    """Yield (columns, rows) chunks of lower < key_column <= upper in key order."""
+    yield from _fetch_table_keyset_pages(connection, table_name, [key_column], chunk_size, lower, upper)
+
+def _split_statements(query):
+    """Split a query text into individual SQL statements (T-SQL aware)."""
+    from db.sql_batch import split_statements
+    query = query.strip().strip('"').strip("'")
+    return split_statements(query)
+
+def is_read_only_batch(query):
+    """True if every statement in the batch is a plain SELECT (no SELECT ... INTO)."""
+    from db.sql_batch import is_read_only_select
+    statements = _split_statements(query or "")
+    if not statements:
+        return False
+    return all(is_read_only_select(s) for s in statements)
+
+def stream_query_result(connection, query, chunk_size=10000, result_set=None):
+    """
+    Run a T-SQL script once and yield (columns, rows) chunks of one of its
+    result sets, for exports.
+
+    Batches run in order exactly like open_query_session(). `result_set` is
+    the 1-based number of the row-returning result set to stream, counted
+    over the whole script (QueryResultSession.index); None means the last
+    one. That result set is read with fetchmany(chunk_size) straight from
+    the cursor, so memory stays at one chunk and the statement is never
+    re-executed; once it is exhausted the rest of the script is skipped.
+    When the last result set is wanted but the text does not tell which one
+    it will be (EXEC, control flow, statements without ';'...), each
+    candidate is spooled to a temp file until the next one appears. A result
+    set without rows yields one empty chunk, so its columns still reach the
+    file.
+    """
+    from db.query_session import _PageSpool
+    from db.sql_batch import split_script, expected_result_sets
+
+    def read_chunks(cursor):
+        columns = [desc[0] for desc in cursor.description]
+        first = True
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if rows or first:
+                yield columns, ColumnarResult.from_cursor(cursor, rows)
+            first = False
+            if len(rows) < chunk_size:
+                return
+
+    runs = [batch for batch in split_script(query or "") for _ in range(batch.repeat)]
+    expected = [expected_result_sets(batch.statements) for batch in runs]
+    seen = 0
+    spool = None   # (columns, first chunk, _PageSpool) of the latest candidate for "last result set"
+    try:
+        for run_index, batch in enumerate(runs):
+            target = result_set
+            candidates = False
+            if result_set is None:
+                if any(e for e in expected[run_index + 1:]):
+                    pass   # a later batch surely returns rows: skip these sets
+                elif run_index == len(runs) - 1 and expected[run_index]:
+                    target = seen + expected[run_index]
+                else:
+                    candidates = True
+
+            print(f"[DEBUG] Export: executing batch ({len(batch.statements)} statement(s)):\n{batch.text}\n")
+            cursor = connection.cursor()
+            try:
+                cursor.execute(batch.text)
+                while True:
+                    if cursor.description:
+                        seen += 1
+                        if seen == target:
+                            yield from read_chunks(cursor)
+                            connection.commit()
+                            return
+                        if candidates:
+                            if spool is not None:
+                                spool[2].close()
+                            spool = (None, None, _PageSpool())
+                            for columns, chunk in read_chunks(cursor):
+                                if spool[0] is None:
+                                    spool = (columns, chunk, spool[2])   # kept for a set without rows
+                                if len(chunk):
+                                    spool[2].append(chunk)
+                    if not cursor.nextset():
+                        break
+                connection.commit()
+            finally:
+                cursor.close()
 
-        # Detect SELECT (ignoring comments)
-        is_select = bool(re.match(r'^\s*(?:--[^\n]*\n\s*)*select\b', stmt, flags=re.IGNORECASE))
+        if spool is not None and spool[0] is not None:
+            columns, first_chunk, pages = spool
+            if not len(pages):
+                yield columns, first_chunk
+            for i in range(len(pages)):
+                yield columns, pages.get(i)
+    finally:
+        if spool is not None:
+            spool[2].close()
 
-        if is_select:
-            if not re.search(r'\border\s+by\b', stmt, flags=re.IGNORECASE):
-                stmt += " ORDER BY (SELECT NULL)"
-            paginated = f"{stmt} OFFSET {page * page_size} ROWS FETCH NEXT {page_size} ROWS ONLY"
-            print(f"[DEBUG] Running SELECT via pandas:\n{paginated}\n")
+def open_query_session(connection, query, page_size=500, progress=None, cancel_check=None):
+    """
+    Execute a T-SQL script batch by batch and collect every result set.
+
+    The script is split at GO lines (``GO n`` repeats a batch); each batch is
+    sent in one round trip and every result set it produces is walked with
+    cursor.nextset(). Each row-returning result set becomes one
+    QueryResultSession with its own row count and timing. Earlier result
+    sets are spooled to temp files; when the last statement of the script
+    is a SELECT whose result set can be identified up front (see
+    sql_batch.expected_result_sets), it stays on the live cursor and is
+    paged with fetchmany(). Otherwise every set is spooled and nextset() is
+    called until the batch has no more, so none is dropped.
+
+    `progress(index, total, batch_text)` is called before each batch run and
+    `cancel_check()` is polled between batches and result sets; when it
+    returns True the rest of the script is skipped.
+    Returns (QueryResults_or_None, stats). The caller owns the results.
+    """
+    import time
+    from db.query_session import QueryResultSession, QueryResults
+    from db.sql_batch import split_script, expected_result_sets, is_row_select
 
-            try:
-                df = pd.read_sql_query(paginated, connection)
-                all_columns = list(df.columns)
-                all_rows = df.values.tolist()
-                success_count += 1
-            except Exception as e:
-                print(f"[ERROR] Failed SELECT: {e}")
-                fail_count += 1
-        else:
-            print(f"[DEBUG] Executing non-SELECT SQL directly:\n{stmt}\n")
-            cursor = connection.cursor()
-            try:
-                cursor.execute(stmt)
+    stats = {"success": 0, "failed": 0, "total": 0, "batches": 0, "result_sets": 0}
+    if not query or not query.strip():
+        return None, stats
+
+    runs = [(batch, i) for batch in split_script(query) for i in range(batch.repeat)]
+    results = QueryResults()
+
+    for run_index, (batch, _) in enumerate(runs):
+        if cancel_check is not None and cancel_check():
+            print(f"[INFO] Script cancelled; skipped {len(runs) - run_index} batch run(s).")
+            break
+        if progress is not None:
+            progress(run_index, len(runs), batch.text)
+
+        # Can the final SELECT be streamed from the live cursor?
+        live_index = None
+        if run_index == len(runs) - 1 and is_row_select(batch.statements[-1]):
+            live_index = expected_result_sets(batch.statements)
+
+        print(f"[DEBUG] Executing batch ({len(batch.statements)} statement(s)):\n{batch.text}\n")
+        stats["batches"] += 1
+        cursor = connection.cursor()
+        keep_cursor = False
+        try:
+            started = time.perf_counter()
+            cursor.execute(batch.text)
+            row_sets = 0
+            while True:
+                if cursor.description:
+                    row_sets += 1
+                    stats["result_sets"] += 1
+                    live = row_sets == live_index
+                    session = QueryResultSession(None, batch.text, page_size, cursor=cursor, owns_cursor=live)
+                    if not live:
+                        session.drain(spool=True)
+                    session.elapsed = time.perf_counter() - started
+                    started = time.perf_counter()
+                    results.append(session)
+                    if live:
+                        keep_cursor = True
+                        break
+                elif cursor.rowcount is not None and cursor.rowcount >= 0:
+                    print(f"[DEBUG] ({cursor.rowcount} rows affected)")
+                if cancel_check is not None and cancel_check():
+                    break
+                if not cursor.nextset():
+                    break
+            if not keep_cursor:
                 connection.commit()
-                print(f"[DEBUG] Executed successfully ({cursor.rowcount} rows affected).")
-                success_count += 1
-            except Exception as e:
+            stats["success"] += len(batch.statements)
+        except Exception as e:
+            try:
                 connection.rollback()
-                print(f"[ERROR] Failed to execute statement: {e}")
-                fail_count += 1
-            finally:
+            except Exception:
+                pass
+            print(f"[ERROR] Batch failed: {e}")
+            stats["failed"] += len(batch.statements)
+        finally:
+            if not keep_cursor:
                 cursor.close()
 
-    stats = {
-        "success": success_count,
-        "failed": fail_count,
-        "total": success_count + fail_count,
-    }
+    stats["total"] = stats["success"] + stats["failed"]
+    print(f"[INFO] Query batch complete: {stats['success']} succeeded, {stats['failed']} failed "
+          f"({stats['batches']} batch run(s), {stats['result_sets']} result set(s)).")
+    return (results if len(results) else None), stats
 
-    print(f"[INFO] Query batch complete: {stats['success']} succeeded, {stats['failed']} failed.")
-    return all_columns, all_rows, stats
 
 
+def get_table_row_count(connection, table_name, exact=False):
+    """
+    Return the number of rows in a table.
 
-def get_table_row_count(connection, table_name):
-    """Return total number of rows in a table."""
+    By default the count comes from partition metadata
+    (sys.dm_db_partition_stats, or sys.partitions without VIEW DATABASE STATE
+    permission), which is instant but approximate. Pass exact=True to run
+    COUNT(*), which scans the table.
+    """
     cursor = connection.cursor()
+    if not exact:
+        for source, rows_col in (("sys.dm_db_partition_stats", "row_count"), ("sys.partitions", "rows")):
+            try:
+                cursor.execute(f"""
+                    SELECT SUM({rows_col})
+                    FROM {source}
+                    WHERE object_id = OBJECT_ID(QUOTENAME(?)) AND index_id IN (0, 1)
+                """, (table_name,))
+                row = cursor.fetchone()
+                if row and row[0] is not None:
+                    return int(row[0])
+            except Exception as e:
+                print(f"[DEBUG] Row count from {source} unavailable: {e}")
     cursor.execute(f"SELECT COUNT(*) FROM [{table_name}]")
-    return cursor.fetchone()[0]
\ No newline at end of file
+    return cursor.fetchone()[0]
+
+def fetch_table_row_counts(connection):
+    """Return {table_name: approximate_row_count} for every table, in one query."""
+    cursor = connection.cursor()
+    cursor.execute("""
+        SELECT t.name, SUM(p.rows)
+        FROM sys.tables t
+        JOIN sys.partitions p
+            ON p.object_id = t.object_id AND p.index_id IN (0, 1)
+        GROUP BY t.name
+    """)
+    return {name: int(rows or 0) for name, rows in cursor.fetchall()}
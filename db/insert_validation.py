@@ -0,0 +1,288 @@
+"""
+Vectorized checks and conversions for rows about to be INSERTed.
+
+validate_insert_frame() checks every column of a chunk against the SQL
+Server type of its target column (see db_utils.fetch_insert_metadata) with
+whole-column pandas operations, converts values the driver should not have
+to guess (numbers and dates read as text, yes/no flags, blanks), trims
+over-long strings, and raises one InsertValidationError listing every
+problem found in the chunk.
+"""
+import numpy as np
+import pandas as pd
+from pandas.errors import OutOfBoundsDatetime
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_numeric_dtype, is_string_dtype
+
+INTEGER_RANGES = {
+    "tinyint": (0, 255),
+    "smallint": (-2 ** 15, 2 ** 15 - 1),
+    "int": (-2 ** 31, 2 ** 31 - 1),
+    "bigint": (-2 ** 63, 2 ** 63 - 1),
+}
+FLOAT_LIMITS = {"float": 1.79e308, "real": 3.40e38}
+MONEY_LIMITS = {"money": 922337203685477.5807, "smallmoney": 214748.3647}
+DATETIME_RANGES = {
+    "datetime": (pd.Timestamp("1753-01-01"), pd.Timestamp("9999-12-31 23:59:59.997")),
+    "smalldatetime": (pd.Timestamp("1900-01-01"), pd.Timestamp("2079-06-06 23:59")),
+}
+DATE_TYPES = ("date", "datetime", "datetime2", "smalldatetime", "datetimeoffset", "time")
+STRING_TYPES = ("char", "varchar", "nchar", "nvarchar")
+BIT_VALUES = {"1": True, "0": False, "true": True, "false": False, "yes": True, "no": False,
+              "y": True, "n": False, "t": True, "f": False, True: True, False: False}
+# Text the server converts to decimal as written: no exponents, inf/nan or thousands separators
+DECIMAL_PATTERN = r"[+-]?(?:\d+\.?\d*|\.\d+)"
+GUID_PATTERN = r"\s*\{?[0-9a-fA-F]{8}-(?:[0-9a-fA-F]{4}-){3}[0-9a-fA-F]{12}\}?\s*"
+
+# Examples shown per problem in the report
+MAX_EXAMPLES = 3
+
+
+class InsertValidationError(ValueError):
+    """
+    Every value in a chunk that its target column cannot store.
+    `problems` holds (column, sql_type, reason, count, [(row, value), ...]).
+    """
+
+    def __init__(self, problems):
+        self.problems = problems
+        super().__init__(self._format())
+
+    def _format(self):
+        total = sum(p[3] for p in self.problems)
+        lines = [f"❌ {total:,} value(s) cannot be stored in the table:"]
+        for column, sql_type, reason, count, examples in self.problems:
+            shown = ", ".join(f"'{value}' (row {row})" for row, value in examples)
+            more = f" and {count - len(examples):,} more" if count > len(examples) else ""
+            lines.append(f"• Column '{column}' ({sql_type}): {count:,} {reason}, e.g. {shown}{more}")
+        return "\n".join(lines)
+
+
+def sql_type_label(meta):
+    """'nvarchar(50)', 'decimal(18,2)', 'int', ... for messages."""
+    name = meta["type"]
+    if name in STRING_TYPES:
+        return f"{name}({meta['maxlen'] or 'max'})"
+    if name in ("decimal", "numeric"):
+        return f"{name}({meta['precision']},{meta['scale']})"
+    return name
+
+
+def validate_insert_frame(df, col_meta, first_row=1):
+    """
+    Check and convert one chunk for INSERT; returns the converted DataFrame.
+
+    :param col_meta: column -> {"type", "maxlen", "precision", "scale", "nullable"};
+                     columns without metadata pass through unchanged
+    :param first_row: file row number of the chunk's first row, for the report
+    :raises InsertValidationError: listing every bad value, grouped by column and reason
+    """
+    problems = []
+    converted = {}
+    for col in df.columns:
+        series = df[col]
+        meta = col_meta.get(col)
+        if meta is None:
+            converted[col] = series
+            continue
+        checker = _CHECKERS.get(meta["type"])
+        bad = None
+        if checker is not None:
+            series, bad, reason = checker(series, meta)
+            if bad is not None and bad.any():
+                problems.append(_problem(col, meta, reason, df[col], bad, first_row))
+        if not meta.get("nullable", True):
+            missing = series.isna() if bad is None else series.isna() & ~bad
+            if missing.any():
+                problems.append(_problem(col, meta, "empty value(s) in a NOT NULL column", df[col],
+                                         missing, first_row))
+        converted[col] = series
+    if problems:
+        raise InsertValidationError(problems)
+    return pd.DataFrame(converted, index=df.index)
+
+
+def _problem(column, meta, reason, original, bad, first_row):
+    positions = np.flatnonzero(bad.to_numpy())
+    examples = [(first_row + i, original.iloc[i]) for i in positions[:MAX_EXAMPLES]]
+    return column, sql_type_label(meta), reason, len(positions), examples
+
+
+# ------- Column checkers: (series, meta) -> (converted, bad mask, reason) -------
+def _text(series):
+    """Text column with empty strings as NULL; None for columns that are not text."""
+    if not is_string_dtype(series.dtype):
+        return None
+    return series.mask(series == "")
+
+
+def _as_numbers(series, exact=False):
+    """
+    (numbers, values present): text parsed as numbers, blanks counted as NULL.
+    `exact` keeps integers beyond 2**53 exact (bigint) by skipping the float fast path.
+    """
+    if is_bool_dtype(series.dtype):
+        series = series.astype("Int64")
+    if is_numeric_dtype(series.dtype):
+        return series, series.notna()
+    text = _text(series)
+    if text is None:
+        text = series
+    if not exact:
+        try:
+            # Several times faster than to_numeric, but stops at the first bad value
+            return text.astype("float64"), text.notna()
+        except (TypeError, ValueError):
+            pass
+    return pd.to_numeric(text, errors="coerce"), text.notna()
+
+
+def _check_integer(series, meta):
+    low, high = INTEGER_RANGES[meta["type"]]
+    numbers, present = _as_numbers(series, exact=meta["type"] == "bigint")
+    invalid = present & numbers.isna()
+    fraction = present & ~invalid & (numbers % 1 != 0)
+    outside = present & ~invalid & ((numbers < low) | (numbers > high))
+    bad = invalid | fraction | outside
+    if bad.any():
+        reason = ("value(s) that are not whole numbers" if (invalid | fraction).any()
+                  else f"value(s) outside {low:,}..{high:,}")
+        return series, bad, reason
+    return numbers.astype("Int64"), None, None
+
+
+def _check_float(series, meta):
+    limit = FLOAT_LIMITS[meta["type"]]
+    numbers, present = _as_numbers(series)
+    invalid = present & numbers.isna()
+    bad = invalid | (present & (numbers.abs() > limit))
+    reason = "value(s) that are not numbers" if invalid.any() else f"value(s) outside ±{limit:g}"
+    return numbers.astype("float64"), bad, reason
+
+
+def _check_decimal(series, meta):
+    numbers, present = _as_numbers(series)
+    if meta["type"] in MONEY_LIMITS:
+        limit = MONEY_LIMITS[meta["type"]]
+    else:
+        limit = 10.0 ** ((meta["precision"] or 18) - (meta["scale"] or 0))
+    invalid = present & numbers.isna()
+    text = _text(series)
+    if text is not None and pd.api.types.infer_dtype(text, skipna=True) in ("string", "mixed"):
+        stripped = text.str.strip()   # NaN for values that are not strings
+        plain = stripped.str.fullmatch(DECIMAL_PATTERN).astype(object).fillna(True).astype(bool)
+        invalid |= present & ~plain
+        text = stripped.where(stripped.notna(), text)
+    bad = invalid | (present & (numbers.abs() >= limit))
+    reason = ("value(s) that are not numbers" if invalid.any()
+              else f"value(s) too large for {sql_type_label(meta)}")
+    # Text goes in as written (trimmed) so the server converts every digit exactly
+    return (text if text is not None else numbers), bad, reason
+
+
+def _check_bit(series, meta):
+    if is_bool_dtype(series.dtype):
+        return series, None, None
+    if is_numeric_dtype(series.dtype):
+        bad = series.notna() & ~series.isin([0, 1])
+        return series.map({1: True, 0: False}), bad, "value(s) that are not 0/1"
+    text = _text(series)
+    if text is None:
+        text = series
+    flags = text.map(BIT_VALUES)   # hash lookups; only unusual spellings take the string path
+    retry = text.notna() & flags.isna()
+    if retry.any():
+        flags[retry] = text[retry].astype(str).str.strip().str.lower().map(BIT_VALUES)
+    bad = text.notna() & flags.isna()
+    return flags.astype(object).where(flags.notna(), None), bad, "value(s) that are not true/false"
+
+
+def _check_datetime(series, meta):
+    name = meta["type"]
+    if is_datetime64_any_dtype(series.dtype):
+        parsed, present = series, series.notna()
+    else:
+        text = _text(series)
+        if text is None:
+            text = series
+        utc = name == "datetimeoffset"
+        precise = (meta.get("scale") or 0) >= 7
+        parsed = pd.to_datetime(text, errors="coerce", format="ISO8601", utc=utc)
+        present = text.notna()
+        retry = present & parsed.isna()
+        if retry.any():
+            # Other layouts ('05/01/2024', '08:30') go through the slower per-value parser;
+            # it also picks up dates beyond 2262 that a nanosecond first pass dropped
+            retried = pd.to_datetime(text[retry], errors="coerce", format="mixed", utc=utc)
+            lost = retried.isna()
+            if lost.any():
+                # 7 fractional digits outside 1677..2262: only microseconds fit
+                trimmed = text[retry][lost].astype(str).str.replace(r"(\.\d{6})\d+", r"\1", regex=True)
+                retried, again = _common_unit(
+                    retried, pd.to_datetime(trimmed, errors="coerce", format="mixed", utc=utc))
+                retried = retried.where(~lost, again)
+            parsed, retried = _common_unit(parsed, retried, precise=precise)
+            parsed = parsed.where(~retry, retried)
+        else:
+            parsed, = _common_unit(parsed, precise=precise)
+    bad = present & parsed.isna()
+    reason = "value(s) that are not dates/times"
+    if name in DATETIME_RANGES and not bad.any():
+        low, high = DATETIME_RANGES[name]
+        naive = parsed.dt.tz_localize(None) if parsed.dt.tz is not None else parsed
+        bad = present & ((naive < low) | (naive > high))
+        reason = f"value(s) outside the {name} range"
+    if name == "datetimeoffset":
+        return series, bad, reason   # offsets are kept as written
+    if name == "date":
+        converted = parsed.dt.date
+    elif name == "time":
+        converted = parsed.dt.time
+    else:
+        converted = parsed
+    return converted, bad, reason
+
+
+def _common_unit(*parts, precise=False):
+    """
+    `parts` cast to one datetime64 unit: ns for 7 fractional digits when
+    every value fits (years 1677..2262), else us, which covers years 1..9999.
+    """
+    tz = ", UTC" if any(getattr(p.dt, "tz", None) is not None for p in parts) else ""
+    if precise:
+        try:
+            return [p.astype(f"datetime64[ns{tz}]") for p in parts]
+        except (OverflowError, OutOfBoundsDatetime):
+            pass
+    return [p.astype(f"datetime64[us{tz}]") for p in parts]
+
+
+def _check_string(series, meta):
+    maxlen = meta.get("maxlen")
+    if not maxlen or maxlen < 0 or not is_string_dtype(series.dtype):
+        return series, None, None
+    lengths = series.str.len()   # NaN for NULLs and non-strings
+    long = lengths > maxlen
+    if long.any():
+        print(f"[WARN] Truncating {int(long.sum()):,} value(s) longer than {maxlen} characters in '{series.name}'")
+        series = series.mask(long, series.str.slice(0, maxlen))
+    return series, None, None
+
+
+def _check_guid(series, meta):
+    text = _text(series)
+    if text is None:
+        return series, None, None
+    matches = text.str.fullmatch(GUID_PATTERN)   # NaN for values that are not strings
+    bad = text.notna() & ~matches.astype(object).fillna(True).astype(bool)
+    return text, bad, "value(s) that are not GUIDs"
+
+
+_CHECKERS = {
+    **{name: _check_integer for name in INTEGER_RANGES},
+    **{name: _check_float for name in FLOAT_LIMITS},
+    **{name: _check_decimal for name in ("decimal", "numeric", *MONEY_LIMITS)},
+    "bit": _check_bit,
+    **{name: _check_datetime for name in DATE_TYPES},
+    **{name: _check_string for name in STRING_TYPES},
+    "uniqueidentifier": _check_guid,
+}
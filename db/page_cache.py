@@ -0,0 +1,107 @@
+import re
+import sys
+import threading
+from collections import OrderedDict
+
+
+def normalize_query(query):
+    """Collapse whitespace outside string literals and drop trailing semicolons."""
+    text = re.sub(r"('(?:[^']|'')*')|\s+", lambda m: m.group(1) or " ", query or "")
+    return text.strip().rstrip(";").strip()
+
+
+def estimate_size(value):
+    """Rough deep size in bytes of a cached page (columns, rows, flags)."""
+    seen = set()
+    stack = [value]
+    total = 0
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        total += sys.getsizeof(obj)
+        if isinstance(obj, (list, tuple, set)):
+            stack.extend(obj)
+        elif isinstance(obj, dict):
+            stack.extend(obj.keys())
+            stack.extend(obj.values())
+        elif hasattr(obj, "_data") and hasattr(obj, "columns"):
+            # ColumnarResult
+            stack.append(obj._data)
+            stack.append(obj.columns)
+    return total
+
+
+class PageCache:
+    """
+    Thread-safe LRU cache of result pages, bounded by estimated byte size.
+
+    Keys are (database, normalized query, page, page_size). Entries larger
+    than the whole budget are not stored.
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.size_bytes = 0
+        self._entries = OrderedDict()   # key -> (value, size)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(database, query, page, page_size):
+        return (database, normalize_query(query), page, page_size)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = estimate_size(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.size_bytes -= old[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self.size_bytes += size
+            while self.size_bytes > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.size_bytes -= evicted_size
+
+    def invalidate_query(self, database, query):
+        """Drop every cached page of one query in one database."""
+        prefix = (database, normalize_query(query))
+        with self._lock:
+            for key in [k for k in self._entries if k[:2] == prefix]:
+                self.size_bytes -= self._entries.pop(key)[1]
+
+    def invalidate(self):
+        """Drop every entry (called after any statement that may change data)."""
+        with self._lock:
+            self._entries.clear()
+            self.size_bytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "bytes": self.size_bytes,
+        }
+
+    def describe(self):
+        s = self.stats()
+        return (f"hits={s['hits']}, misses={s['misses']}, "
+                f"entries={s['entries']}, size={s['bytes'] / 1024:.0f} KB")
@@ -0,0 +1,230 @@
+import pickle
+import tempfile
+
+from db.result_set import ColumnarResult
+
+
+class _PageSpool:
+    """Pickled pages in an anonymous temp file; only the last page read stays in memory."""
+
+    def __init__(self):
+        self._file = tempfile.TemporaryFile(prefix="esqli_results_")
+        self._offsets = []
+        self._last = (None, None)   # (page index, page)
+
+    def __len__(self):
+        return len(self._offsets)
+
+    def append(self, page):
+        self._file.seek(0, 2)
+        self._offsets.append(self._file.tell())
+        pickle.dump(page, self._file, protocol=pickle.HIGHEST_PROTOCOL)
+
+    def get(self, index):
+        if self._last[0] == index:
+            return self._last[1]
+        self._file.seek(self._offsets[index])
+        page = pickle.load(self._file)
+        self._last = (index, page)
+        return page
+
+    def close(self):
+        self._last = (None, None)
+        try:
+            self._file.close()
+        except Exception:
+            pass
+
+
+class QueryResultSession:
+    """
+    Keeps one executed SELECT open on its own cursor and serves it page by page.
+
+    The statement runs once. Pages are pulled with fetchmany() only when first
+    requested and are kept, so going back to a page already seen needs no
+    round trip. Pages are stored as ColumnarResult objects.
+    Call close() when the results are no longer shown.
+    """
+
+    def __init__(self, connection, query, page_size=500, cursor=None, owns_cursor=None):
+        """
+        Execute `query` on a new cursor of `connection`, or, when `cursor` is
+        given, attach to that cursor's current result set without executing
+        anything. An attached cursor is only closed by the session when
+        `owns_cursor` is True, so the caller can still call cursor.nextset().
+        """
+        self.query = query
+        self.page_size = page_size
+        self.columns = []
+        self.exhausted = False
+        self.closed = False
+        self.owned_connection = None   # closed together with the session, if set
+        self.index = 1                 # position among the batch's result sets
+        self.elapsed = None            # seconds until the result set was read/ready
+        self._pages = []
+        self._spool = None
+        self._row_count = 0
+        self._owns_cursor = (cursor is None) if owns_cursor is None else owns_cursor
+
+        if cursor is not None:
+            self._cursor = cursor
+        else:
+            self._cursor = connection.cursor()
+            try:
+                self._cursor.execute(query)
+            except Exception:
+                self.close()
+                raise
+
+        if self._cursor.description:
+            self.columns = [desc[0] for desc in self._cursor.description]
+        else:
+            # Statement produced no result set; nothing to page through
+            self.exhausted = True
+            self._release_cursor()
+
+    # ------- Paging -------
+    def fetch_page(self, page):
+        """Return the rows of `page` (0-based), reading from the cursor only if needed."""
+        if page < 0:
+            return []
+        while self.page_count <= page and not self.exhausted:
+            self._read_next_page()
+        if page < self.page_count:
+            return self._spool.get(page) if self._spool is not None else self._pages[page]
+        return []
+
+    @property
+    def page_count(self):
+        return len(self._spool) if self._spool is not None else len(self._pages)
+
+    def has_page(self, page):
+        """True if `page` exists (may read ahead one page from the cursor)."""
+        if page < self.page_count:
+            return True
+        if self.exhausted:
+            return False
+        return bool(self.fetch_page(page))
+
+    def drain(self, spool=False):
+        """
+        Read every remaining row so the cursor can move on to the next result
+        set. With `spool=True` pages go to a temp file instead of memory and
+        are loaded back one at a time by fetch_page().
+        """
+        if spool and self._spool is None:
+            self._spool = _PageSpool()
+            for page in self._pages:
+                self._spool.append(page)
+            self._pages = []
+        while not self.exhausted:
+            self._read_next_page()
+        return self.rows_read
+
+    @property
+    def rows_read(self):
+        return self._row_count
+
+    @property
+    def row_count(self):
+        """Total rows of the result set, or None while more rows are pending."""
+        return self._row_count if self.exhausted else None
+
+    def _read_next_page(self):
+        if self._cursor is None:
+            self.exhausted = True
+            return
+        rows = self._cursor.fetchmany(self.page_size)
+        if rows:
+            page = ColumnarResult.from_cursor(self._cursor, rows)
+            self._row_count += len(page)
+            if self._spool is not None:
+                self._spool.append(page)
+            else:
+                self._pages.append(page)
+        if len(rows) < self.page_size:
+            self.exhausted = True
+            self._release_cursor()
+
+    # ------- Lifetime -------
+    def _release_cursor(self):
+        if self._cursor is not None and self._owns_cursor:
+            try:
+                self._cursor.close()
+            except Exception:
+                pass
+        self._cursor = None
+
+    def close(self):
+        """Close the cursor (and any owned connection) and drop the cached pages."""
+        self._release_cursor()
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+        if self.owned_connection is not None:
+            try:
+                self.owned_connection.close()
+            except Exception:
+                pass
+            self.owned_connection = None
+        self._pages = []
+        self.exhausted = True
+        self.closed = True
+
+
+class QueryResults:
+    """
+    Every row-returning result set of one executed script, in order.
+
+    Each entry is a QueryResultSession. Only the final one may still be
+    streaming from a live cursor; earlier ones were spooled to temp files,
+    so a hidden result set costs no memory until its page is shown.
+    `current` is the index of the result set being displayed.
+    """
+
+    def __init__(self, sessions=None):
+        self.sessions = list(sessions or [])
+        self.current = len(self.sessions) - 1 if self.sessions else 0
+        self.owned_connection = None   # closed together with the results, if set
+        self.closed = False
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __iter__(self):
+        return iter(self.sessions)
+
+    def __getitem__(self, index):
+        return self.sessions[index]
+
+    def append(self, session):
+        session.index = len(self.sessions) + 1
+        self.sessions.append(session)
+        self.current = len(self.sessions) - 1
+
+    @property
+    def active(self):
+        """The result set currently displayed (None when there is none)."""
+        return self.sessions[self.current] if self.sessions else None
+
+    def labels(self):
+        """Tab captions: 'Result 2 (1,234 rows, 0.05s)'."""
+        labels = []
+        for session in self.sessions:
+            rows = session.row_count
+            text = f"{rows:,} rows" if rows is not None else f"{session.rows_read:,}+ rows"
+            if session.elapsed is not None:
+                text += f", {session.elapsed:.2f}s"
+            labels.append(f"Result {session.index} ({text})")
+        return labels
+
+    def close(self):
+        for session in self.sessions:
+            session.close()
+        if self.owned_connection is not None:
+            try:
+                self.owned_connection.close()
+            except Exception:
+                pass
+            self.owned_connection = None
+        self.closed = True
@@ -0,0 +1,84 @@
+class ColumnarResult:
+    """
+    Compact, column-major container for a SELECT result.
+
+    Each column is stored as one tuple of the values exactly as the driver
+    returned them, so nullable INT columns stay int/None (no float upcast)
+    and DECIMAL/DATETIME values keep their Python types. Iterating yields
+    row tuples, so it can be used anywhere a list of rows was expected.
+    """
+
+    __slots__ = ("columns", "types", "nullable", "description", "_data", "_length")
+
+    def __init__(self, columns, types, data, nullable=None, description=None):
+        self.columns = list(columns)
+        self.types = list(types)
+        self.nullable = list(nullable) if nullable is not None else [True] * len(self.columns)
+        self.description = description   # DB-API cursor.description (precision/scale), if known
+        self._data = data
+        self._length = len(data[0]) if data else 0
+
+    # ------- Construction -------
+    @classmethod
+    def from_rows(cls, columns, types, rows, nullable=None, description=None):
+        """Transpose a list of row sequences into columns."""
+        if rows:
+            data = [tuple(col) for col in zip(*rows)]
+        else:
+            data = [() for _ in columns]
+        return cls(columns, types, data, nullable, description)
+
+    @classmethod
+    def from_cursor(cls, cursor, rows=None):
+        """
+        Build from a cursor's description and `rows`
+        (fetches the remaining rows when `rows` is None).
+        """
+        desc = cursor.description or []
+        if rows is None:
+            rows = cursor.fetchall()
+        return cls.from_rows(
+            [d[0] for d in desc],
+            [d[1] if len(d) > 1 else None for d in desc],
+            rows,
+            [bool(d[6]) if len(d) > 6 else True for d in desc],
+            [tuple(d) for d in desc],
+        )
+
+    # ------- Access -------
+    def __len__(self):
+        return self._length
+
+    def __bool__(self):
+        return self._length > 0
+
+    def __iter__(self):
+        return zip(*self._data) if self._data else iter(())
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return list(zip(*(col[index] for col in self._data)))
+        if index < 0:
+            index += self._length
+        return tuple(col[index] for col in self._data)
+
+    def column(self, name):
+        """
+        Return the values of one column as a tuple. `name` may also be the
+        column's position, the only unambiguous key when a join returns two
+        columns with the same name.
+        """
+        if isinstance(name, int):
+            return self._data[name]
+        return self._data[self.columns.index(name)]
+
+    def type_names(self):
+        """Python type names of each column (e.g. 'int', 'Decimal', 'datetime')."""
+        return [getattr(t, "__name__", str(t)) for t in self.types]
+
+    def tolist(self):
+        """Return rows as a list of lists."""
+        return [list(r) for r in self]
+
+    def __repr__(self):
+        return f"ColumnarResult(columns={self.columns!r}, rows={self._length})"
@@ -0,0 +1,116 @@
+import time
+
+
+class SchemaCatalog:
+    """
+    In-memory metadata of the current database: table names and, per table,
+    (column_name, data_type, is_primary_key, is_identity, is_nullable) rows
+    in the same shape fetch_table_schema() returns.
+
+    The first load reads tables, columns, primary keys and identity flags of
+    the whole database in one round trip (fetch_database_schema) and keeps
+    them in memory together with each table's modify_date. refresh()
+    re-reads only the (name, modify_date) list, forgets dropped tables and
+    bulk-reloads just the tables modified since. A refresh happens when the
+    catalog is marked stale (after DDL) or is older than `max_age` seconds.
+    Table names are matched case-insensitively, like SQL Server's default
+    collation.
+    """
+
+    def __init__(self, connection, max_age=60):
+        """
+        :param connection: DB-API connection, or a callable returning the current one
+                           (so the catalog follows a reconnect)
+        """
+        self._connection = connection
+        self.max_age = max_age
+        self.database = None
+        self._modified = {}    # table -> modify_date
+        self._schemas = {}     # table -> list of column tuples
+        self._names = {}       # lower-cased table -> table
+        self._loaded_at = None
+        self._stale = True
+
+    @property
+    def conn(self):
+        return self._connection() if callable(self._connection) else self._connection
+
+    # ------- Loading -------
+    def reset(self, database):
+        """Forget everything; the next lookup loads `database` from scratch."""
+        self.database = database
+        self._modified = {}
+        self._schemas = {}
+        self._names = {}
+        self._loaded_at = None
+        self._stale = True
+
+    def mark_stale(self, table=None):
+        """Force a refresh on the next lookup (and drop `table`'s schema now)."""
+        self._stale = True
+        if table is not None:
+            self._schemas.pop(self._resolve(table), None)
+
+    def refresh(self):
+        """Load the whole schema once; afterwards reload only changed tables."""
+        from db.db_utils import fetch_database_schema, fetch_table_modify_dates
+        if self._loaded_at is None:
+            self._schemas, self._modified = fetch_database_schema(self.conn)
+            print(f"[DEBUG] Schema catalog loaded: {len(self._schemas)} tables")
+        else:
+            current = fetch_table_modify_dates(self.conn)
+            changed = [t for t, d in current.items() if self._modified.get(t) != d]
+            dropped = [t for t in self._modified if t not in current]
+            for table in changed + dropped:
+                self._schemas.pop(table, None)
+            if changed:
+                schemas, _ = fetch_database_schema(self.conn, min(current[t] for t in changed))
+                self._schemas.update(schemas)
+            if changed or dropped:
+                print(f"[DEBUG] Schema catalog refreshed: {len(changed)} changed, {len(dropped)} dropped")
+            self._modified = current
+        self._names = {t.lower(): t for t in self._modified}
+        self._loaded_at = time.monotonic()
+        self._stale = False
+
+    def _resolve(self, table):
+        return self._names.get(table.lower(), table)
+
+    def _ensure_fresh(self):
+        if (self._stale or self._loaded_at is None
+                or time.monotonic() - self._loaded_at > self.max_age):
+            self.refresh()
+
+    # ------- Lookups -------
+    def tables(self):
+        """Names of the base tables in the database, sorted."""
+        self._ensure_fresh()
+        return sorted(self._modified, key=str.lower)
+
+    def table_schema(self, table):
+        """Column tuples of `table` (loaded per table only if the bulk load missed it)."""
+        from db.db_utils import fetch_table_schema
+        self._ensure_fresh()
+        table = self._resolve(table)
+        schema = self._schemas.get(table)
+        if schema is None:
+            schema = fetch_table_schema(self.conn, table)
+            self._schemas[table] = schema
+        return schema
+
+    def column_info(self, table, column):
+        """Metadata dict of one column, or None if the table has no such column."""
+        for name, data_type, is_primary, is_identity, is_nullable in self.table_schema(table):
+            if name.lower() == column.lower():
+                return {
+                    "name": name,
+                    "data_type": data_type,
+                    "is_nullable": "YES" if is_nullable else "NO",
+                    "is_primary": is_primary,
+                    "is_identity": is_identity,
+                }
+        return None
+
+    def primary_key(self, table):
+        """Primary key column names of `table` in column order."""
+        return [col[0] for col in self.table_schema(table) if col[2]]
@@ -0,0 +1,241 @@
+import re
+
+# Characters/sequences that can change lexer state
+_SPECIAL = re.compile(r"'|\"|\[|--|/\*|;|\n")
+_BLOCK_COMMENT = re.compile(r"/\*|\*/")
+# "GO" or "GO 5" alone on a line, optionally followed by a line comment
+_GO_LINE = re.compile(r"[ \t]*GO(?:[ \t]+(\d+))?[ \t]*(?:--[^\n]*)?[ \t]*(?=\r?\n|$)", re.IGNORECASE)
+_LEADING_NOISE = re.compile(r"(?:\s+|--[^\n]*(?:\n|$))*")
+_WORD = re.compile(r"[A-Za-z_]+")
+_SELECT_ASSIGN = re.compile(r"select\s+@\w+\s*=", re.IGNORECASE)
+# Tokens of a statement that matter to find statements run together without ';'
+_TOKEN = re.compile(r"'|\"|\[|--|/\*|[()]|[A-Za-z_@#][\w@#$]*")
+
+# Words that can only start a statement that may return rows (or hide one that does)
+_ROW_STATEMENT_KEYWORDS = {"select", "exec", "execute", "if", "while", "begin"}
+# Words after which SELECT continues the same statement
+_SELECT_CONTINUES_AFTER = {"union", "all", "except", "intersect"}
+
+# Words that only appear in a statement that writes data or schema
+_WRITE_KEYWORDS = {
+    "insert", "update", "delete", "merge", "exec", "execute", "create", "alter", "drop",
+    "truncate", "grant", "revoke", "deny", "use", "dbcc",
+}
+
+# First keywords of statements that never return a result set
+_NO_RESULT_KEYWORDS = {
+    "alter", "commit", "create", "deallocate", "declare", "deny", "drop", "grant",
+    "print", "raiserror", "revoke", "rollback", "save", "set", "throw",
+    "truncate", "use", "waitfor", "close", "open",
+    "insert", "update", "delete", "merge",
+}
+
+
+class SqlBatch:
+    """One GO-delimited batch: its full text, repeat count and statements."""
+
+    __slots__ = ("text", "repeat", "statements")
+
+    def __init__(self, text, repeat, statements):
+        self.text = text
+        self.repeat = repeat
+        self.statements = statements
+
+    def __repr__(self):
+        return f"SqlBatch(statements={len(self.statements)}, repeat={self.repeat})"
+
+
+def _skip_quoted(script, pos, close):
+    """Return the index after the closing `close` (doubled `close` is an escape)."""
+    n = len(script)
+    while True:
+        j = script.find(close, pos)
+        if j == -1:
+            return n
+        if j + 1 < n and script[j + 1] == close:
+            pos = j + 2
+            continue
+        return j + 1
+
+
+def _skip_block_comment(script, pos):
+    """Return the index after a (possibly nested) /* ... */ comment starting at `pos`."""
+    depth = 0
+    for m in _BLOCK_COMMENT.finditer(script, pos):
+        depth += 1 if m.group() == "/*" else -1
+        if depth == 0:
+            return m.end()
+    return len(script)
+
+
+def strip_leading_comments(stmt):
+    """Return `stmt` without leading whitespace and (nested) comments."""
+    pos = _LEADING_NOISE.match(stmt).end()
+    while stmt.startswith("/*", pos):
+        pos = _LEADING_NOISE.match(stmt, _skip_block_comment(stmt, pos)).end()
+    return stmt[pos:]
+
+
+def first_keyword(stmt):
+    """Lower-cased first word of a statement, ignoring leading comments."""
+    m = _WORD.match(strip_leading_comments(stmt))
+    return m.group().lower() if m else ""
+
+
+def _has_code(text):
+    return bool(strip_leading_comments(text).strip())
+
+
+def split_script(script):
+    """
+    Split a T-SQL script into batches and statements in a single pass.
+
+    Batches end at lines containing only ``GO`` or ``GO n`` (n = repeat
+    count). Statements end at top-level semicolons. String literals,
+    quoted/bracketed identifiers and (nested) comments are skipped, so
+    semicolons or GO inside them never split anything.
+    Returns a list of SqlBatch; empty and comment-only batches are dropped.
+    """
+    script = script or ""
+    batches = []
+    statements = []
+    n = len(script)
+    pos = stmt_start = batch_start = 0
+    line_start = True
+
+    def end_statement(end):
+        text = script[stmt_start:end].strip()
+        if text and _has_code(text):
+            statements.append(text)
+
+    def end_batch(end, repeat):
+        if statements:
+            batches.append(SqlBatch(script[batch_start:end].strip(), repeat, list(statements)))
+        statements.clear()
+
+    while pos <= n:
+        if line_start:
+            go = _GO_LINE.match(script, pos)
+            if go:
+                end_statement(pos)
+                end_batch(pos, int(go.group(1) or 1))
+                pos = stmt_start = batch_start = go.end()
+                line_start = False
+                continue
+
+        m = _SPECIAL.search(script, pos)
+        if m is None:
+            break
+        tok, p = m.group(), m.start()
+        line_start = False
+
+        if tok == "\n":
+            pos = p + 1
+            line_start = True
+        elif tok == ";":
+            end_statement(p)
+            pos = stmt_start = p + 1
+        elif tok == "'":
+            pos = _skip_quoted(script, p + 1, "'")
+        elif tok == '"':
+            pos = _skip_quoted(script, p + 1, '"')
+        elif tok == "[":
+            pos = _skip_quoted(script, p + 1, "]")
+        elif tok == "--":
+            nl = script.find("\n", p)
+            pos = n if nl == -1 else nl
+        else:  # "/*"
+            pos = _skip_block_comment(script, p)
+
+    end_statement(n)
+    end_batch(n, 1)
+    return batches
+
+
+def split_statements(script):
+    """Flat list of statements in a script (GO separators removed)."""
+    return [stmt for batch in split_script(script) for stmt in batch.statements]
+
+
+def is_row_select(stmt):
+    """True for a SELECT that returns rows (not SELECT ... INTO or @var assignment)."""
+    body = strip_leading_comments(stmt)
+    if first_keyword(body) != "select" or _SELECT_ASSIGN.match(body):
+        return False
+    return not re.search(r"\binto\b", body, flags=re.IGNORECASE)
+
+
+def _top_level_words(stmt):
+    """Lower-cased words of a statement outside literals, comments, brackets and parentheses."""
+    words = []
+    depth = pos = 0
+    while True:
+        m = _TOKEN.search(stmt, pos)
+        if m is None:
+            return words
+        tok, pos = m.group(), m.end()
+        if tok == "'":
+            pos = _skip_quoted(stmt, pos, "'")
+        elif tok == '"':
+            pos = _skip_quoted(stmt, pos, '"')
+        elif tok == "[":
+            pos = _skip_quoted(stmt, pos, "]")
+        elif tok == "--":
+            nl = stmt.find("\n", pos)
+            pos = len(stmt) if nl == -1 else nl
+        elif tok == "/*":
+            pos = _skip_block_comment(stmt, m.start())
+        elif tok == "(":
+            depth += 1
+        elif tok == ")":
+            depth = max(depth - 1, 0)
+        elif depth == 0:
+            words.append(tok.lower())
+
+
+def _runs_together(stmt):
+    """
+    True if a ';'-delimited statement may really be several (T-SQL does not
+    require semicolons), e.g. 'SELECT a FROM x<newline>SELECT b FROM y'.
+    Conservative: UNION ... SELECT is fine, INSERT ... SELECT is not.
+    """
+    words = _top_level_words(stmt)
+    for i, word in enumerate(words[1:], 1):
+        if word in _ROW_STATEMENT_KEYWORDS and not (
+                word == "select" and words[i - 1] in _SELECT_CONTINUES_AFTER):
+            return True
+    return False
+
+
+def is_read_only_select(stmt):
+    """
+    True for a row-returning SELECT that cannot change anything, also when
+    another statement follows it without ';' (SELECT ...<newline>DELETE ...).
+    """
+    return is_row_select(stmt) and not _WRITE_KEYWORDS.intersection(_top_level_words(stmt))
+
+
+def expected_result_sets(statements):
+    """
+    Number of row-returning result sets a batch will produce, or None when
+    that cannot be known from the text (EXEC, control flow, OUTPUT clauses,
+    statements not separated by ';'...).
+    """
+    count = 0
+    for stmt in statements:
+        body = strip_leading_comments(stmt)
+        if _runs_together(body):
+            return None
+        kw = first_keyword(body)
+        if kw == "select":
+            if is_row_select(body):
+                count += 1
+        elif kw == "begin":
+            if not re.match(r"begin\s+(?:tran|transaction|distributed)\b", body, flags=re.IGNORECASE):
+                return None
+        elif kw in _NO_RESULT_KEYWORDS:
+            if re.search(r"\boutput\b", body, flags=re.IGNORECASE):
+                return None
+        else:
+            return None
+    return count
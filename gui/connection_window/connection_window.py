@@ -1,5 +1,6 @@
 import os
 import webbrowser
+from functools import partial
 from PyQt5.QtWidgets import (
     QWidget, QLabel, QVBoxLayout, QComboBox, QPushButton, QMenu,
     QLineEdit, QSplitter, QMessageBox, QRadioButton, QMenuBar, QAction,
@@ -9,6 +10,7 @@ from PyQt5.QtWidgets import (
 from PyQt5.QtGui import QIcon, QStandardItemModel, QStandardItem
 from PyQt5.QtCore import Qt, QThread, QRect, pyqtSignal, QTimer, QEvent, QSize
 
+import core
 from core import SQLConnectWorker
 from gui.database_explorer.main_window import DatabaseExplorerWindow
 from gui.gui_helpers.window_utils import setup_app_settings, restore_window_settings, save_window_settings
@@ -424,6 +426,12 @@ class ConnectionWindow(QWidget):
 
         self.app_settings.setValue(LAST_USED_HOST_KEY, host)
 
+        # Lets the explorer open extra connections (background queries, exports)
+        self.connection_factory = partial(
+            core.connect_to_sql,
+            host=host, username=username, password=password, use_windows_auth=windows_auth,
+        )
+
         self.thread = QThread()
         self.worker = SQLConnectWorker(host, username, password, windows_auth)
         self.worker.moveToThread(self.thread)
@@ -476,7 +484,7 @@ class ConnectionWindow(QWidget):
             if self.open_explorers:
                 explorer = self.open_explorers[0]
                 
-                explorer.controller.conn = self.db_connection
+                explorer.controller.set_connection(self.db_connection, getattr(self, "connection_factory", None))
                 explorer.selected_database = db_name
                 explorer.connection_window = self
                 explorer.tree_panel.clear()
@@ -489,6 +497,7 @@ class ConnectionWindow(QWidget):
                 explorer = DatabaseExplorerWindow(
                     connection=self.db_connection, database=db_name, connection_window=self
                 )
+                explorer.controller.connection_factory = getattr(self, "connection_factory", None)
                 self.open_explorers.append(explorer)
                 explorer.setEnabled(True)
                 explorer.show()
@@ -1,9 +1,43 @@
+import functools
+
+from db.page_cache import PageCache
+from db.schema_catalog import SchemaCatalog
+
+
+def _modifies_data(method):
+    """Invalidate the controller's caches after a statement that may change data."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.invalidate_caches()
+    return wrapper
+
+
+def _changes_schema(method):
+    """Mark the schema catalog stale after DDL; the first argument names the table."""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            self.schema_catalog.mark_stale(args[0] if args else None)
+    return wrapper
+
+
 class DBController:
     """Thin wrapper around db.db_utils with a bit of state."""
 
-    def __init__(self, conn):
+    def __init__(self, conn, connection_factory=None):
         self.conn = conn
         self.current_db = None
+        # Callable(database=...) -> new connection; set by the connection window
+        self.connection_factory = connection_factory
+        self.query_sessions = {}   # owner (query tab) -> QueryResults
+        self.tab_connections = {}  # owner (query tab) -> [connection, database it is in]
+        self.page_cache = PageCache()
+        self.schema_catalog = SchemaCatalog(lambda: self.conn)
         
         # --- Enable autocommit for DDL operations ---
         try:
@@ -16,6 +50,34 @@ class DBController:
         except Exception as e:
             print(f"[WARN] Could not enable autocommit: {e}")
 
+    # -------- Connections --------
+    def open_connection(self):
+        """
+        Open an extra connection to the current database for background work.
+        Returns None when no connection factory is available.
+        """
+        if self.connection_factory is None:
+            return None
+        conn = self.connection_factory(database=self.current_db or "master")
+        try:
+            conn.autocommit = True
+        except Exception as e:
+            print(f"[WARN] Could not enable autocommit: {e}")
+        return conn
+
+    def set_connection(self, conn, connection_factory=None):
+        """
+        Switch to another server connection (reconnect or disconnect with None).
+        Results, tab connections and cached pages of the old one are dropped.
+        """
+        self.close_all_query_sessions()
+        self.close_all_tab_connections()
+        self.page_cache.invalidate()
+        self.conn = conn
+        self.connection_factory = connection_factory
+        self.current_db = None
+        self.schema_catalog.reset(None)
+
     # -------- DB listing / selection --------
     def fetch_databases(self):
         from db.db_utils import fetch_databases
@@ -25,70 +87,211 @@ class DBController:
         from db.db_utils import use_database
         use_database(self.conn, db_name)
         self.current_db = db_name
+        self.schema_catalog.reset(db_name)
 
     def fetch_tables(self):
-        from db.db_utils import fetch_tables
-        return fetch_tables(self.conn)
+        return self.schema_catalog.tables()
+
+    def get_table_row_count(self, table_name, exact=False):
+        from db.db_utils import get_table_row_count
+        return get_table_row_count(self.conn, table_name, exact)
+
+    def fetch_table_row_counts(self):
+        from db.db_utils import fetch_table_row_counts
+        return fetch_table_row_counts(self.conn)
 
     # -------- Table preview & schema --------
     def fetch_table_preview(self, table_name):
         from db.db_utils import fetch_table_preview
-        return fetch_table_preview(self.conn, table_name)
+        key = PageCache.make_key(self.current_db, f"<table preview> [{table_name}]", 0, 50)
+        cached = self._cache_get(key)
+        if cached is not None:
+            return cached
+        result = fetch_table_preview(self.conn, table_name)
+        self.page_cache.put(key, result)
+        return result
 
     def fetch_table_schema(self, table_name):
-        from db.db_utils import fetch_table_schema
-        return fetch_table_schema(self.conn, table_name)
+        return self.schema_catalog.table_schema(table_name)
 
+    @_changes_schema
+    @_modifies_data
     def add_column(self, table, name, typ):
         from db.db_utils import add_column
         return add_column(self.conn, table, name, typ)
 
+    @_changes_schema
+    @_modifies_data
     def rename_column(self, table, old, new):
         from db.db_utils import rename_column
         return rename_column(self.conn, table, old, new)
 
+    @_changes_schema
+    @_modifies_data
     def alter_column_type(self, table, column, new_type):
         from db.db_utils import alter_column_type
         return alter_column_type(self.conn, table, column, new_type)
     
+    @_changes_schema
+    @_modifies_data
     def set_primary_key(self, table, column, enabled):
         from db.db_utils import set_primary_key
         return set_primary_key(self.conn, table, column, enabled)
 
+    @_changes_schema
+    @_modifies_data
     def set_auto_increment(self, table, column, enabled):
         from db.db_utils import set_auto_increment
         return set_auto_increment(self.conn, table, column, enabled)
     
+    @_changes_schema
+    @_modifies_data
     def set_nullable(self, table, column, enabled):
         from db.db_utils import set_nullable
         return set_nullable(self.conn, table, column, enabled)
     
     def fetch_column_info(self, table_name, column_name):
-        from db.db_utils import fetch_column_info
-        return fetch_column_info(self.conn, table_name, column_name)
+        return self.schema_catalog.column_info(table_name, column_name)
 
+    @_modifies_data
     def update_table_cell(self, table, column, pk_value, new_value, row_values=None, headers=None):
         from db.db_utils import update_table_cell
-        return update_table_cell(self.conn, table, column, pk_value, new_value, row_values, headers)
+        return update_table_cell(self.conn, table, column, pk_value, new_value, row_values, headers,
+                                 pk_columns=self.schema_catalog.primary_key(table))
     
-    def bulk_insert(self, table_name, df):
+    @_modifies_data
+    def bulk_insert(self, table_name, df, strategy="auto", commit_every=None):
         from db.db_utils import bulk_insert
-        return bulk_insert(self.conn, table_name, df)
+        return bulk_insert(self.conn, table_name, df, strategy=strategy, commit_every=commit_every)
 
     # -------- DDL --------
+    @_changes_schema
+    @_modifies_data
     def create_table(self, name, columns):
         from db.db_utils import create_table
         return create_table(self.conn, name, columns)
 
+    @_modifies_data
     def create_database(self, name):
         from db.db_utils import create_database
         return create_database(self.conn, name)
     
+    @_modifies_data
     def add_table_item(self, table, values):
         from db.db_utils import insert_row
         return insert_row(self.conn, table, values)
 
+    # -------- Result cache --------
+    def invalidate_schema(self):
+        """Refresh the schema catalog on next use (e.g. after a DDL query batch)."""
+        self.schema_catalog.mark_stale()
+
+    def invalidate_caches(self):
+        if len(self.page_cache):
+            print(f"[DEBUG] Page cache invalidated ({self.page_cache.describe()})")
+        self.page_cache.invalidate()
+
+    def _cache_get(self, key):
+        value = self.page_cache.get(key)
+        print(f"[DEBUG] Page cache {'hit' if value is not None else 'miss'} ({self.page_cache.describe()})")
+        return value
+
+    def forget_query_pages(self, query):
+        """Drop the cached pages of `query` (it is being run again explicitly)."""
+        self.page_cache.invalidate_query(self.current_db, query)
+
+    def get_cached_query_page(self, query, page, page_size):
+        """Return (columns, rows, has_next) for a read-only query page, or None."""
+        from db.db_utils import is_read_only_batch
+        if not is_read_only_batch(query):
+            return None
+        return self._cache_get(PageCache.make_key(self.current_db, query, page, page_size))
+
+    def cache_query_page(self, query, page, page_size, columns, rows, has_next):
+        from db.db_utils import is_read_only_batch
+        if is_read_only_batch(query):
+            key = PageCache.make_key(self.current_db, query, page, page_size)
+            self.page_cache.put(key, (columns, rows, has_next))
+
     # -------- Query --------
-    def fetch_query_with_pagination(self, query, page, page_size):
-        from db.db_utils import fetch_query_with_pagination
-        return fetch_query_with_pagination(self.conn, query, page, page_size)
\ No newline at end of file
+    def open_query_session(self, query, page_size, owner=None):
+        """Run a query batch once; closes the owner's previous results first."""
+        from db.db_utils import open_query_session, is_read_only_batch
+        self.close_query_session(owner)
+        if not is_read_only_batch(query):
+            self.invalidate_caches()
+        results, stats = open_query_session(self.conn, query, page_size)
+        if results is not None:
+            self.query_sessions[owner] = results
+        return results, stats
+
+    def set_query_session(self, owner, results):
+        """Adopt results opened elsewhere (e.g. by a QueryWorker)."""
+        self.close_query_session(owner)
+        if results is not None:
+            self.query_sessions[owner] = results
+
+    def query_session_for(self, owner=None):
+        return self.query_sessions.get(owner)
+
+    def close_query_session(self, owner=None):
+        results = self.query_sessions.pop(owner, None)
+        if results is not None:
+            results.close()
+
+    def close_all_query_sessions(self):
+        for owner in list(self.query_sessions):
+            self.close_query_session(owner)
+
+    def create_query_worker(self, query, page_size, timeout=None, owner=None):
+        """
+        Build a QueryWorker for `query` on the owner's (query tab's) own
+        connection, so several tabs can execute at once while #temp tables,
+        SET options and open transactions carry over between runs in a tab.
+        Returns None when no connection can be opened for the tab; the
+        shared connection is never used from a worker thread.
+        """
+        from core.query_worker import QueryWorker
+        from db.db_utils import is_read_only_batch
+        conn = self.tab_connection(owner)
+        if conn is None:
+            return None
+        if not is_read_only_batch(query):
+            self.invalidate_caches()
+        return QueryWorker(conn, query, page_size, timeout=timeout)
+
+    # -------- Query tab connections --------
+    def tab_connection(self, owner):
+        """
+        The owner's dedicated connection, opened on first use and kept until
+        close_tab_connection(). It follows the explorer into the current
+        database with USE. Returns None without a connection factory.
+        """
+        from db.db_utils import use_database
+        entry = self.tab_connections.get(owner)
+        if entry is None:
+            try:
+                conn = self.open_connection()
+            except Exception as e:
+                print(f"[WARN] Could not open query tab connection: {e}")
+                return None
+            if conn is None:
+                return None
+            entry = self.tab_connections[owner] = [conn, self.current_db or "master"]
+        conn, database = entry
+        if self.current_db and database != self.current_db:
+            use_database(conn, self.current_db)
+            entry[1] = self.current_db
+        return conn
+
+    def close_tab_connection(self, owner):
+        entry = self.tab_connections.pop(owner, None)
+        if entry is not None:
+            try:
+                entry[0].close()
+            except Exception:
+                pass
+
+    def close_all_tab_connections(self):
+        for owner in list(self.tab_connections):
+            self.close_tab_connection(owner)
@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QHeaderView,
-    QPushButton, QTableWidget, QTableWidgetItem, QMessageBox
+    QPushButton, QTableWidget, QTableWidgetItem, QMessageBox, QTabBar
 )
 from PyQt5.QtCore import pyqtSignal, Qt, QTimer
 
@@ -11,6 +11,7 @@ class DataPreviewPanel(QWidget):
     exportFullQueryRequested = pyqtSignal(str)            # full SQL text
     addTableItemRequested = pyqtSignal(str)               # add item to table
     pageChangeRequested = pyqtSignal(int, int)            # new_page, page_size
+    resultSetChangeRequested = pyqtSignal(int)            # index of the result set to show
     cellUpdateRequested = pyqtSignal(str, str, object, 
                                      object, list, list)  # table_name, column_name, pk_value, new_value, row_values, headers
 
@@ -23,6 +24,9 @@ class DataPreviewPanel(QWidget):
         self._page = 0
         self._page_size = 500
         self._current_query = None
+        self._has_next = None
+        self._result_sets = []
+        self._current_set = 0
         self._table_widget = None
         self._pk_index = 0
         self._has_primary_key = False  # <-- new flag
@@ -52,9 +56,18 @@ class DataPreviewPanel(QWidget):
         self._current_query = None
         self._render(columns, rows, label, query_mode=False)
 
-    def show_query_results(self, columns, rows, page, page_size, query=None):
+    def show_query_results(self, columns, rows, page, page_size, query=None, has_next=None,
+                           result_sets=None, current_set=0):
+        """
+        Show one page of a query result. `result_sets` lists one caption per
+        result set of the batch; with more than one, a tab bar lets the user
+        switch between them (see resultSetChangeRequested).
+        """
         self._page, self._page_size = page, page_size
         self._current_query = query
+        self._has_next = has_next
+        self._result_sets = list(result_sets or [])
+        self._current_set = current_set
         self._render(columns, rows, label="query_results", query_mode=True)
 
     # ------- Internals -------
@@ -87,6 +100,16 @@ class DataPreviewPanel(QWidget):
         br.addStretch()
         self.layout_.addWidget(btn_row)
 
+        # --- Result set tabs (query mode, several result sets) ---
+        if query_mode and len(self._result_sets) > 1:
+            set_bar = QTabBar()
+            set_bar.setExpanding(False)
+            for caption in self._result_sets:
+                set_bar.addTab(caption)
+            set_bar.setCurrentIndex(self._current_set)
+            set_bar.currentChanged.connect(self.resultSetChangeRequested.emit)
+            self.layout_.addWidget(set_bar)
+
         # --- Table setup ---
         table = QTableWidget()
         table.setColumnCount(len(columns))
@@ -132,7 +155,10 @@ class DataPreviewPanel(QWidget):
             next_btn = QPushButton("➡️ Next")
 
             prev_btn.setEnabled(self._page > 0)
-            next_btn.setEnabled(len(rows) == self._page_size)
+            if self._has_next is None:
+                next_btn.setEnabled(len(rows) == self._page_size)
+            else:
+                next_btn.setEnabled(self._has_next)
 
             prev_btn.clicked.connect(lambda: self.pageChangeRequested.emit(self._page - 1, self._page_size))
             next_btn.clicked.connect(lambda: self.pageChangeRequested.emit(self._page + 1, self._page_size))
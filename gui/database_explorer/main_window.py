@@ -1,8 +1,9 @@
 import sys
+import time
 from PyQt5.QtWidgets import (
     QWidget, QVBoxLayout, QSplitter, QMessageBox, 
     QPushButton, QHBoxLayout, QDesktopWidget, QSizePolicy,
-    QCheckBox
+    QCheckBox, QApplication
 )
 from PyQt5.QtCore import Qt
 
@@ -30,6 +31,10 @@ class DatabaseExplorerWindow(QWidget):
         self.last_table_preview = None
         self.last_query_results = None
         self.last_executed_query = None
+        self._results_tab = None       # query tab whose results are shown
+        self._query_workers = {}       # query tab -> running QueryWorker
+        self._query_threads = set()
+        self._tab_queries = {}         # query tab -> batch text behind its results
         self.current_mode = "table"   # <--- new mode tracker
         debug_enabled = self.app_settings.value("debug_enabled", False, type=bool)
 
@@ -189,6 +194,7 @@ class DatabaseExplorerWindow(QWidget):
         self.tree_panel.requestAddDatabase.connect(self._add_database)
         self.tree_panel.requestAddTable.connect(self._add_table)
         self.tree_panel.exportTableRequested.connect(self._export_full_table)
+        self.tree_panel.exportDatabaseRequested.connect(self._export_database)
         self.tree_panel.importTableRequested.connect(self._import_data_to_table)
 
         self.table_panel.addColumnRequested.connect(self._add_column)
@@ -200,12 +206,16 @@ class DatabaseExplorerWindow(QWidget):
 
         self.query_panel.runQueryRequested.connect(self._run_query)
         self.query_panel.openCommonQueriesRequested.connect(self._open_common_queries)
+        self.query_panel.tabClosed.connect(self._on_query_tab_closed)
+        self.query_panel.cancelQueryRequested.connect(self._cancel_query)
+        self.query_panel.tabs.currentChanged.connect(self._on_query_tab_changed)
 
         self.data_panel.exportCurrentRequested.connect(self._export_current)
         self.data_panel.exportFullTableRequested.connect(self._export_full_table)
         self.data_panel.exportFullQueryRequested.connect(self._export_full_query)
         self.data_panel.addTableItemRequested.connect(self._add_table_item)
         self.data_panel.pageChangeRequested.connect(self._change_query_page)
+        self.data_panel.resultSetChangeRequested.connect(self._change_result_set)
         self.data_panel.cellUpdateRequested.connect(self._update_cell_value)
 
         self.back_btn.clicked.connect(self._handle_back_button)
@@ -276,7 +286,7 @@ class DatabaseExplorerWindow(QWidget):
             self.setWindowTitle(f"Database Explorer - {db_name}")
 
             tables = self.controller.fetch_tables()
-            self.tree_panel.show_database_objects(tables)
+            self._show_database_objects(tables)
 
             # Update query context
             self.query_panel.set_context(db_name=db_name, table_name=None, tables=tables)
@@ -286,6 +296,15 @@ class DatabaseExplorerWindow(QWidget):
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Failed to load database '{db_name}':\n{e}")
 
+    def _show_database_objects(self, tables):
+        """Populate the tree with tables and their approximate row counts."""
+        try:
+            row_counts = self.controller.fetch_table_row_counts()
+        except Exception as e:
+            print(f"[WARN] Could not load row counts: {e}")
+            row_counts = None
+        self.tree_panel.show_database_objects(tables, row_counts)
+
     def _open_table(self, table_name: str):
         if self.current_mode != "table":
             self._switch_mode("table")
@@ -606,89 +625,311 @@ class DatabaseExplorerWindow(QWidget):
                 QMessageBox.critical(self, "Error", f"Failed to create database:\n{e}")
 
     # ---------------- Query actions ----------------
-    def _run_query(self, query: str, page: int, page_size: int):
+    def _run_query(self, query: str, page: int, page_size: int, use_cache=False):
+        """
+        Run `query` in the current tab. An explicit Run always goes to the
+        server; only paging (`use_cache`) may be served from cached pages.
+        """
         if not query.strip():
             self.query_panel.show_message("⚠️ Please enter a SQL query to run.", kind="warn")
             return
-        try:
-            result = self.controller.fetch_query_with_pagination(query, page, page_size)
-            if len(result) == 3:
-                columns, rows, stats = result
-            else:
-                columns, rows = result
-                stats = {"success": 1, "failed": 0, "total": 1}
 
+        tab = self.query_panel.tabs.currentWidget()
+        if tab in self._query_workers:
+            self.query_panel.show_message("⏳ A query is already running in this tab.", kind="warn")
+            return
+
+        # Read-only pages already seen are served from the controller's cache when paging
+        cached = self.controller.get_cached_query_page(query, page, page_size) if use_cache else None
+        if not use_cache:
+            self.controller.forget_query_pages(query)
+        if cached is not None:
+            columns, rows, has_next = cached
+            self.controller.close_query_session(tab)
+            self._results_tab = tab
             self.last_executed_query = query
             self.last_query_results = (columns, rows, query, page, page_size)
+            self.data_panel.show_query_results(columns, rows, page, page_size, query, has_next=has_next)
+            self.query_panel.show_message(
+                f"✅ Showing rows {page*page_size+1}–{page*page_size+len(rows)} (page {page+1}, cached)",
+                kind="ok",
+            )
+            return
 
-            stats_msg = (
-                f"Statements executed: {stats['total']} "
-                f"(✅ {stats['success']} succeeded, ❌ {stats['failed']} failed)"
+        try:
+            # The next query replaces this tab's previous result session
+            self.controller.close_query_session(tab)
+            worker = self.controller.create_query_worker(
+                query, page_size, timeout=self.query_panel.query_timeout(), owner=tab
             )
+        except Exception as e:
+            self.query_panel.show_message(f"❌ Failed to execute query: {e}", kind="err")
+            return
+        if worker is None:
+            self._run_query_blocking(tab, query, page, page_size)
+            return
 
-            if columns and len(rows) > 0:
-                # Has a SELECT result set
-                self.data_panel.show_query_results(columns, rows, page, page_size, query)
-                self.query_panel.show_message(
-                    f"✅ Showing rows {page*page_size+1}–{page*page_size+len(rows)} (page {page+1})\n{stats_msg}",
-                    kind="ok",
-                )
-            else:
-                # No result rows — likely DDL or multi-statement batch
-                self.data_panel.clear()
+        self._query_workers[tab] = worker
+        worker.status.connect(lambda msg, t=tab: self._on_query_status(t, msg))
+        worker.resultReady.connect(
+            lambda results, stats, t=tab: self._on_query_finished(t, query, page, page_size, results, stats)
+        )
+        worker.failed.connect(lambda err, t=tab: self._on_query_failed(t, query, err))
+        # Keep a reference until the thread has really stopped
+        self._query_threads.add(worker)
+        worker.finished.connect(lambda w=worker: (self._query_threads.discard(w), w.deleteLater()))
+
+        self.query_panel.set_running(True)
+        self.query_panel.show_message("⏳ Running query…", kind="info")
+        worker.start()
+
+    def _run_query_blocking(self, tab, query, page, page_size):
+        """Without a tab connection the batch runs on the shared connection, on the GUI thread."""
+        self.query_panel.show_message("⏳ Running query…", kind="info")
+        QApplication.processEvents()
+        started = time.perf_counter()
+        try:
+            results, stats = self.controller.open_query_session(query, page_size, owner=tab)
+        except Exception as e:
+            self._on_query_failed(tab, query, str(e))
+            return
+        stats["elapsed"] = time.perf_counter() - started
+        self._on_query_finished(tab, query, page, page_size, results, stats)
+
+    def _on_query_status(self, tab, msg):
+        if tab is self.query_panel.tabs.currentWidget():
+            self.query_panel.show_message(msg, kind="info")
+
+    def _on_query_finished(self, tab, query, page, page_size, results, stats):
+        self._query_workers.pop(tab, None)
+        self._invalidate_after(query)
+        if tab is self.query_panel.tabs.currentWidget():
+            self.query_panel.set_running(False)
+
+        if self.query_panel.tabs.indexOf(tab) == -1:
+            # Tab was closed while the query ran
+            if results is not None:
+                results.close()
+            self.controller.close_tab_connection(tab)
+            return
+
+        self.controller.set_query_session(tab, results)
+        self._tab_queries[tab] = query
 
-                if stats["failed"] > 0:
-                    msg = f"⚠️ Some statements failed.\n{stats_msg}"
-                    kind = "warn"
-                else:
-                    msg = f"✅ Query executed successfully (no result to show).\n{stats_msg}"
-                    kind = "ok"
+        stats_msg = (
+            f"Statements executed: {stats['total']} "
+            f"(✅ {stats['success']} succeeded, ❌ {stats['failed']} failed)"
+        )
+        if "elapsed" in stats:
+            stats_msg += f" in {stats['elapsed']:.2f}s"
+        if stats.get("result_sets", 0) > 1:
+            stats_msg += f", {stats['result_sets']} result sets"
 
-                self.query_panel.show_message(msg, kind=kind)
+        session = results.active if results else None
+        columns = session.columns if session else []
+        rows = session.fetch_page(page) if session else []
 
-                # Refresh DB structure (useful after DDL)
-                tables = self.controller.fetch_tables()
-                self.tree_panel.show_database_objects(tables)
+        if tab is not self.query_panel.tabs.currentWidget():
+            print(f"[INFO] Query in tab '{self._tab_title(tab)}' finished. {stats_msg}")
+            return
 
-        except Exception as e:
-            self.query_panel.show_message(f"❌ Failed to execute query: {e}", kind="err")
+        self.last_executed_query = query
+        self.last_query_results = (columns, rows, query, page, page_size)
+        if columns and (len(rows) > 0 or len(results) > 1):
+            # Has at least one SELECT result set
+            self._results_tab = tab
+            self._show_query_page(results, page, page_size, stats_msg)
+        else:
+            # No result rows — likely DDL or multi-statement batch
+            self.controller.close_query_session(tab)
+            self.data_panel.clear()
 
+            if stats["failed"] > 0:
+                msg = f"⚠️ Some statements failed.\n{stats_msg}"
+                kind = "warn"
+            else:
+                msg = f"✅ Query executed successfully (no result to show).\n{stats_msg}"
+                kind = "ok"
+
+            self.query_panel.show_message(msg, kind=kind)
+
+            # Refresh DB structure (useful after DDL)
+            try:
+                tables = self.controller.fetch_tables()
+                self._show_database_objects(tables)
+            except Exception as e:
+                print(f"[WARN] Could not refresh tables: {e}")
+
+    def _on_query_failed(self, tab, query, err):
+        self._query_workers.pop(tab, None)
+        self._invalidate_after(query)
+        if self.query_panel.tabs.indexOf(tab) == -1:
+            self.controller.close_tab_connection(tab)
+        if tab is self.query_panel.tabs.currentWidget():
+            self.query_panel.set_running(False)
+            self.query_panel.show_message(f"❌ Failed to execute query: {err}", kind="err")
+        else:
+            print(f"[ERROR] Query in tab '{self._tab_title(tab)}' failed: {err}")
+
+    def _invalidate_after(self, query):
+        """Drop cached pages (and recheck the schema) once a batch that may have changed data has run."""
+        from db.db_utils import is_read_only_batch
+        if not is_read_only_batch(query):
+            self.controller.invalidate_caches()
+            self.controller.invalidate_schema()
+
+    def _cancel_query(self):
+        worker = self._query_workers.get(self.query_panel.tabs.currentWidget())
+        if worker is not None:
+            self.query_panel.show_message("⏹️ Cancelling query…", kind="warn")
+            worker.cancel()
+
+    def _cancel_all_queries(self):
+        for worker in list(self._query_workers.values()):
+            worker.cancel()
+
+    def _on_query_tab_changed(self, _index):
+        tab = self.query_panel.tabs.currentWidget()
+        self.query_panel.set_running(tab in self._query_workers)
+        results = self.controller.query_session_for(tab)
+        if results is not None and results.active.columns and tab is not self._results_tab:
+            self._results_tab = tab
+            self.last_executed_query = self._tab_queries.get(tab)
+            self._show_query_page(results, 0, results.active.page_size)
+
+    def _tab_title(self, tab):
+        index = self.query_panel.tabs.indexOf(tab)
+        return self.query_panel.tabs.tabText(index) if index != -1 else "?"
+
+    def _show_query_page(self, results, page, page_size, stats_msg=""):
+        """Render one page of the displayed result set of `results`."""
+        session = results.active
+        rows = session.fetch_page(page)
+        has_next = session.has_page(page + 1)
+        self.last_query_results = (session.columns, rows, self.last_executed_query, page, page_size)
+        if len(results) == 1:
+            # Cache keys identify a query, not one of its result sets
+            self.controller.cache_query_page(self.last_executed_query, page, page_size, session.columns, rows, has_next)
+        self.data_panel.show_query_results(
+            session.columns, rows, page, page_size, self.last_executed_query,
+            has_next=has_next, result_sets=results.labels(), current_set=results.current,
+        )
+        prefix = f"Result {session.index}: " if len(results) > 1 else ""
+        self.query_panel.show_message(
+            f"✅ {prefix}Showing rows {page*page_size+1}–{page*page_size+len(rows)} (page {page+1})"
+            + (f"\n{stats_msg}" if stats_msg else ""),
+            kind="ok",
+        )
 
     def _change_query_page(self, new_page: int, page_size: int):
-        if not self.last_query_results:
+        if not self.last_query_results or new_page < 0:
+            return
+        results = self.controller.query_session_for(self._results_tab)
+        if results is None or results.closed:
+            # Results were closed (tab closed); run the query again
+            _, _, query, _, _ = self.last_query_results
+            self._run_query(self.last_executed_query or query, new_page, page_size, use_cache=True)
             return
-        _, _, query, _, _ = self.last_query_results
-        self._run_query(query, new_page, page_size)
+        try:
+            self._show_query_page(results, new_page, page_size)
+        except Exception as e:
+            self.query_panel.show_message(f"❌ Failed to fetch page: {e}", kind="err")
+
+    def _change_result_set(self, index: int):
+        """Show another result set of the batch; its first page is loaded on demand."""
+        results = self.controller.query_session_for(self._results_tab)
+        if results is None or results.closed or not 0 <= index < len(results):
+            return
+        results.current = index
+        try:
+            self._show_query_page(results, 0, results.active.page_size)
+        except Exception as e:
+            self.query_panel.show_message(f"❌ Failed to load result set: {e}", kind="err")
+
+    def _on_query_tab_closed(self, tab):
+        """Cancel the tab's running query and release its results and connection."""
+        worker = self._query_workers.get(tab)
+        if worker is not None:
+            worker.cancel()   # the connection is closed once the worker reports back
+        self.controller.close_query_session(tab)
+        if worker is None:
+            self.controller.close_tab_connection(tab)
+        self._tab_queries.pop(tab, None)
+        if tab is self._results_tab:
+            self._results_tab = None
 
     # ---------------- Export actions ----------------
     def _export_current(self, headers, rows, label):
         from core.export_utils import export_data_to_file
-        # Convert rows + headers into list of dicts
-        data = [dict(zip(headers, r)) for r in rows]
-        export_data_to_file(self, data, headers, label)
+        export_data_to_file(self, rows, headers, label)
 
     def _export_full_table(self, table_name):
         from core.export_utils import export_paginated_data
         from db.db_utils import fetch_full_table_paginated
         export_paginated_data(self, fetch_full_table_paginated, table_name)
 
+    def _export_database(self, db_name):
+        """Export many or all tables of a database in parallel."""
+        from core.export_utils import export_database
+        if db_name and db_name != self.selected_database:
+            self._enter_database(db_name)
+            if self.selected_database != db_name:
+                return
+        try:
+            tables = self.controller.fetch_tables()
+            row_counts = self.controller.fetch_table_row_counts()
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Failed to load tables:\n{e}")
+            return
+        export_database(self, self.selected_database, tables, row_counts)
+
     def _export_full_query(self, _ignored_query):
-        """Export using the last executed query, not the current editor contents."""
-        from core.export_utils import export_paginated_data
-        from db.db_utils import fetch_query_with_pagination
+        """
+        Export the displayed result set of the last executed query (not the
+        current editor contents). A read-only script runs once more and that
+        result set is streamed to the file; a script that changes data is not
+        run again: the displayed result set is exported from its open results.
+        """
+        from functools import partial
+        from core.export_utils import export_paginated_data, export_result_session
+        from db.db_utils import is_read_only_batch, stream_query_result
+        from db.sql_batch import split_script
         query = self.last_executed_query
         if not query or not query.strip():
             QMessageBox.warning(self, "No Query", "Run a query before exporting.")
             return
 
-        export_paginated_data(self, fetch_query_with_pagination, "query_results", fetch_args=query, is_query=True)
+        result_set, total_rows = None, None
+        results = self.controller.query_session_for(self._results_tab)
+        active = results.active if results is not None else None
+        if active is not None:
+            result_set = active.index
+            total_rows = active.row_count   # exact once the result set was read to the end
+
+        if not all(is_read_only_batch(batch.text) for batch in split_script(query)):
+            if active is not None and not active.closed:
+                export_result_session(self, active)
+                return
+            answer = QMessageBox.question(
+                self, "Export Full Result",
+                "This query changes data (INSERT, UPDATE, DELETE, EXEC, ...). Exporting runs the "
+                "whole script again on a new connection, which applies those changes a second time.\n\n"
+                "Run it again for the export?",
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No,
+            )
+            if answer != QMessageBox.Yes:
+                return
+
+        export_paginated_data(
+            self, partial(stream_query_result, result_set=result_set), "query_results",
+            fetch_args=query, is_query=True, total_rows=total_rows,
+        )
 
     # ---------------- Import actions ----------------
     def _import_data_to_table(self, table_name):
         from core.import_utils import import_data_to_table
-        inserted = import_data_to_table(self, self.controller, table_name)
-        if inserted:
-            self._open_table(table_name)
+        import_data_to_table(self, self.controller, table_name,
+                             on_finished=lambda rows: self._open_table(table_name))
 
     # ---------------- Common queries ----------------
     def _open_common_queries(self):
@@ -714,12 +955,13 @@ class DatabaseExplorerWindow(QWidget):
                 return
         self.setEnabled(False)
         try:
+            self._cancel_all_queries()
             if self.controller.conn:
                 try:
                     self.controller.conn.close()
                 except Exception:
                     pass
-            self.controller.conn = None
+            self.controller.set_connection(None)
             self.selected_database = None
             self.current_table = None
 
@@ -754,6 +996,7 @@ class DatabaseExplorerWindow(QWidget):
         save_window_settings(self)
         
         if self._safe_to_close():
+            self._cancel_all_queries()
             event.accept()
             return
 
@@ -766,6 +1009,7 @@ class DatabaseExplorerWindow(QWidget):
         )
 
         if reply == QMessageBox.Yes:
+            self._cancel_all_queries()
             event.accept()   # Allow window to close
         else:
             event.ignore()   # Cancel the close action
@@ -2,7 +2,7 @@ from PyQt5.QtWidgets import (
 QWidget, QVBoxLayout, QHBoxLayout, 
 QPushButton, QLabel, QTabWidget, 
 QWidget as QtWidget, QCheckBox,
-QSizePolicy)
+QSizePolicy, QSpinBox)
 from PyQt5.QtCore import pyqtSignal, Qt
 from gui.gui_helpers.query_editor_utils import SQLHighlighter, SQLEditor
 from core.file_utils import save_query_to_file, open_query_from_file
@@ -11,6 +11,8 @@ from core.file_utils import save_query_to_file, open_query_from_file
 class QueryEditorPanel(QWidget):
     runQueryRequested = pyqtSignal(str, int, int)  # query, page, page_size
     openCommonQueriesRequested = pyqtSignal()
+    tabClosed = pyqtSignal(object)                 # closed tab widget
+    cancelQueryRequested = pyqtSignal()
 
     def __init__(self):
         super().__init__()
@@ -25,14 +27,22 @@ class QueryEditorPanel(QWidget):
         # Buttons
         btn_row = QHBoxLayout()
         run_btn = QPushButton("▶️ Run Query")
+        self.run_btn = run_btn
+        self.cancel_btn = QPushButton("⏹️ Cancel")
+        self.cancel_btn.setEnabled(False)
+        self.cancel_btn.setToolTip("Cancel the query running in this tab")
+        self.timeout_spin = QSpinBox()
+        self.timeout_spin.setRange(0, 86400)
+        self.timeout_spin.setSuffix(" s")
+        self.timeout_spin.setSpecialValueText("No timeout")
+        self.timeout_spin.setToolTip("Cancel the query automatically after this many seconds (0 = no timeout)")
         new_tab_btn = QPushButton("➕ New Query Tab")
         common_btn = QPushButton("❔ Common SQL Queries")
         warning_label = QPushButton("⚠️")
         warning_label.setToolTip(
-            "Queries may execute in parts.\n"
-            "If one statement fails (like dropping a table twice), others may still run successfully.\n"
-            "The output may show as failed even if earlier statements executed.\n"
-            "Make sure to separate statements with ';'"
+            "Scripts run batch by batch: put GO on its own line to end a batch (GO 5 repeats it).\n"
+            "If one batch fails (like dropping a table twice), other batches may still run successfully.\n"
+            "The output may show as failed even if earlier batches executed."
         )
         warning_label.setFlat(True)
         warning_label.setFocusPolicy(Qt.NoFocus)
@@ -54,6 +64,8 @@ class QueryEditorPanel(QWidget):
         self.auto_context_chk.setToolTip("When enabled, automatically update editors with the active database and table context")
         self.auto_context_chk.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
         btn_row.addWidget(run_btn)
+        btn_row.addWidget(self.cancel_btn)
+        btn_row.addWidget(self.timeout_spin)
         btn_row.addWidget(new_tab_btn)
         btn_row.addWidget(warning_label)
         btn_row.addStretch()
@@ -74,6 +86,7 @@ class QueryEditorPanel(QWidget):
 
         # Connections
         run_btn.clicked.connect(self._emit_run)
+        self.cancel_btn.clicked.connect(self.cancelQueryRequested.emit)
         new_tab_btn.clicked.connect(lambda: self.add_tab("New Query"))
         common_btn.clicked.connect(self.openCommonQueriesRequested.emit)
 
@@ -127,6 +140,15 @@ class QueryEditorPanel(QWidget):
         self.message.setStyleSheet(f"color: {color}; font-weight: bold;")
         self.message.setText(text)
 
+    def set_running(self, running: bool):
+        """Toggle Run/Cancel for the current tab while its query executes."""
+        self.run_btn.setEnabled(not running)
+        self.cancel_btn.setEnabled(running)
+
+    def query_timeout(self):
+        """Per-query timeout in seconds (None when disabled)."""
+        return self.timeout_spin.value() or None
+
     # ------- Internals -------
     def add_tab(self, title="Query"):
         # Create a new SQL query editor tab, like the original UI.
@@ -175,10 +197,12 @@ class QueryEditorPanel(QWidget):
     def _close_tab(self, index):
         if self.tabs.count() > 1:
             w = self.tabs.widget(index)
+            self.tabClosed.emit(w)
             w.deleteLater()
             self.tabs.removeTab(index)
         else:
             tab = self.tabs.widget(0)
+            self.tabClosed.emit(tab)
             tab.editor.clear()
         self.tabs.setTabsClosable(self.tabs.count() > 1)
 
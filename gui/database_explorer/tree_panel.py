@@ -14,6 +14,7 @@ class DatabaseTreePanel(QWidget):
     requestAddTable = pyqtSignal()
     importTableRequested = pyqtSignal(str)
     exportTableRequested = pyqtSignal(str)
+    exportDatabaseRequested = pyqtSignal(str)   # database name ("" = current database)
 
     def __init__(self):
         super().__init__()
@@ -62,11 +63,17 @@ class DatabaseTreePanel(QWidget):
 
         self.tree.expandAll()
 
-    def show_database_objects(self, tables):
+    def show_database_objects(self, tables, row_counts=None):
+        """Show the tables of a database; `row_counts` maps table -> approximate rows."""
         self.tree.clear()
-        self.tree.setHeaderLabels(["Database Objects"])
+        self.tree.setHeaderLabels(["Database Objects", "Rows"])
+        header = self.tree.header()
+        header.setSectionResizeMode(0, QHeaderView.Stretch)
+        header.setSectionResizeMode(1, QHeaderView.ResizeToContents)
+        row_counts = row_counts or {}
 
         tables_item = QTreeWidgetItem(["Tables"])
+        tables_item.setData(0, Qt.UserRole, "tables")
         self.tree.addTopLevelItem(tables_item)
 
         add_tbl = QTreeWidgetItem(tables_item, ["➕ Add new table..."])
@@ -76,8 +83,12 @@ class DatabaseTreePanel(QWidget):
         add_tbl.setFont(0, f)
 
         for t in tables:
-            ti = QTreeWidgetItem(tables_item, [t])
+            count = row_counts.get(t)
+            ti = QTreeWidgetItem(tables_item, [t, f"~{count:,}" if count is not None else ""])
             ti.setData(0, Qt.UserRole, "table")
+            if count is not None:
+                ti.setTextAlignment(1, Qt.AlignRight | Qt.AlignVCenter)
+                ti.setToolTip(1, "Approximate row count from partition metadata")
 
         self.tree.expandAll()
 
@@ -108,7 +119,16 @@ class DatabaseTreePanel(QWidget):
         item_type = item.data(0, Qt.UserRole)
         item_name = item.text(0)
 
-        # Only show menu for table items
+        # Database items and the "Tables" node: export the whole database
+        if item_type in ("database", "tables"):
+            menu = QMenu(self)
+            export_db_action = QAction(export_icon, "Export database…", self)
+            db_name = item_name if item_type == "database" else ""
+            export_db_action.triggered.connect(lambda: self.exportDatabaseRequested.emit(db_name))
+            menu.addAction(export_db_action)
+            menu.exec_(self.tree.viewport().mapToGlobal(pos))
+
+        # Table items: import / export one table
         if item_type == "table":
             menu = QMenu(self)
 
@@ -0,0 +1,245 @@
+from PyQt5.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QLabel, QComboBox,
+    QPushButton, QListWidget, QListWidgetItem, QSpinBox, QLineEdit,
+    QFileDialog, QTreeWidget, QTreeWidgetItem, QProgressBar, QHeaderView,
+    QMessageBox
+)
+from PyQt5.QtCore import Qt
+
+from core.export_writers import TEXT_COMPRESSION, TEXT_FORMATS, available_export_formats, export_codecs
+
+
+class ExportDatabaseDialog(QDialog):
+    """Choose tables, format, parallelism and output folder for a database export."""
+
+    def __init__(self, parent, database, tables, row_counts=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"Export database '{database}'")
+        self.resize(520, 560)
+        row_counts = row_counts or {}
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel("Tables to export:"))
+
+        self.table_list = QListWidget()
+        for name in tables:
+            count = row_counts.get(name)
+            item = QListWidgetItem(f"{name}  (~{count:,} rows)" if count is not None else name)
+            item.setData(Qt.UserRole, name)
+            item.setFlags(item.flags() | Qt.ItemIsUserCheckable)
+            item.setCheckState(Qt.Checked)
+            self.table_list.addItem(item)
+        layout.addWidget(self.table_list)
+
+        select_row = QHBoxLayout()
+        all_btn = QPushButton("Select all")
+        none_btn = QPushButton("Select none")
+        all_btn.clicked.connect(lambda: self._set_all(Qt.Checked))
+        none_btn.clicked.connect(lambda: self._set_all(Qt.Unchecked))
+        select_row.addWidget(all_btn)
+        select_row.addWidget(none_btn)
+        select_row.addStretch()
+        layout.addLayout(select_row)
+
+        form = QFormLayout()
+        self.format_combo = QComboBox()
+        self.format_combo.addItems(available_export_formats())
+        self.codec_combo = QComboBox()
+        self.level_spin = QSpinBox()
+        self.level_spin.setToolTip("Higher levels write smaller files but take longer")
+        self.split_spin = QSpinBox()
+        self.split_spin.setRange(0, 1024 * 1024)
+        self.split_spin.setSingleStep(100)
+        self.split_spin.setSuffix(" MB")
+        self.split_spin.setSpecialValueText("No split")
+        self.split_spin.setToolTip("Roll each table over to a new part file at about this size")
+        self.format_combo.currentTextChanged.connect(self._on_format_changed)
+        self.codec_combo.currentTextChanged.connect(self._on_codec_changed)
+        self._on_format_changed(self.format_combo.currentText())
+
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, 16)
+        self.workers_spin.setValue(4)
+        self.workers_spin.setToolTip("Tables exported at the same time (one connection each)")
+
+        self.chunk_spin = QSpinBox()
+        self.chunk_spin.setRange(1000, 1000000)
+        self.chunk_spin.setSingleStep(1000)
+        self.chunk_spin.setValue(10000)
+
+        folder_row = QHBoxLayout()
+        self.folder_edit = QLineEdit()
+        browse_btn = QPushButton("Browse…")
+        browse_btn.clicked.connect(self._browse)
+        folder_row.addWidget(self.folder_edit)
+        folder_row.addWidget(browse_btn)
+
+        form.addRow("Format:", self.format_combo)
+        form.addRow("Compression:", self.codec_combo)
+        form.addRow("Level:", self.level_spin)
+        form.addRow("Split files:", self.split_spin)
+        form.addRow("Parallel workers:", self.workers_spin)
+        form.addRow("Rows per chunk:", self.chunk_spin)
+        form.addRow("Output folder:", folder_row)
+        layout.addLayout(form)
+
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        export_btn = QPushButton("Export")
+        cancel_btn = QPushButton("Cancel")
+        export_btn.clicked.connect(self._on_accept)
+        cancel_btn.clicked.connect(self.reject)
+        buttons.addWidget(export_btn)
+        buttons.addWidget(cancel_btn)
+        layout.addLayout(buttons)
+
+    # ------- Internals -------
+    def _set_all(self, state):
+        for i in range(self.table_list.count()):
+            self.table_list.item(i).setCheckState(state)
+
+    def _on_format_changed(self, format_choice):
+        self.codec_combo.clear()
+        codecs = export_codecs(format_choice)
+        self.codec_combo.addItems(codecs)
+        self.codec_combo.setEnabled(bool(codecs))
+        self.split_spin.setEnabled(format_choice in TEXT_FORMATS)
+        self._on_codec_changed(self.codec_combo.currentText())
+
+    def _on_codec_changed(self, codec):
+        # Levels apply to the streaming codecs of text formats only
+        text = self.format_combo.currentText() in TEXT_FORMATS and codec in TEXT_COMPRESSION
+        if text:
+            low, high, default = TEXT_COMPRESSION[codec][1]
+            self.level_spin.setRange(low, high)
+            self.level_spin.setValue(default)
+        self.level_spin.setEnabled(text)
+
+    def _browse(self):
+        folder = QFileDialog.getExistingDirectory(self, "Select output folder", self.folder_edit.text())
+        if folder:
+            self.folder_edit.setText(folder)
+
+    def _on_accept(self):
+        if not self.selected_tables():
+            QMessageBox.warning(self, "No Tables", "Select at least one table to export.")
+            return
+        if not self.folder_edit.text().strip():
+            QMessageBox.warning(self, "No Folder", "Choose an output folder.")
+            return
+        self.accept()
+
+    # ------- Results -------
+    def selected_tables(self):
+        return [
+            self.table_list.item(i).data(Qt.UserRole)
+            for i in range(self.table_list.count())
+            if self.table_list.item(i).checkState() == Qt.Checked
+        ]
+
+    def options(self):
+        """(format_choice, writer_options, parallelism, chunk_size, out_dir)"""
+        writer_options = {}
+        if self.codec_combo.isEnabled():
+            writer_options["compression"] = self.codec_combo.currentText()
+        if self.level_spin.isEnabled():
+            writer_options["level"] = self.level_spin.value()
+        if self.split_spin.isEnabled() and self.split_spin.value():
+            writer_options["split_size"] = self.split_spin.value() * 1024 * 1024
+        return (
+            self.format_combo.currentText(),
+            writer_options,
+            self.workers_spin.value(),
+            self.chunk_spin.value(),
+            self.folder_edit.text().strip(),
+        )
+
+
+class DatabaseExportProgressDialog(QDialog):
+    """Per-table progress of a running DatabaseExportWorker."""
+
+    def __init__(self, parent, tables, row_counts=None):
+        super().__init__(parent)
+        self.setWindowTitle("Exporting database")
+        self.resize(560, 420)
+        self.setWindowModality(Qt.WindowModal)
+        self._row_counts = row_counts or {}
+        self._items = {}
+        self._done = 0
+
+        layout = QVBoxLayout(self)
+        self.tree = QTreeWidget()
+        self.tree.setHeaderLabels(["Table", "Rows", "Status"])
+        self.tree.header().setSectionResizeMode(0, QHeaderView.Stretch)
+        for name in tables:
+            item = QTreeWidgetItem([name, "", "Waiting"])
+            item.setTextAlignment(1, Qt.AlignRight | Qt.AlignVCenter)
+            self.tree.addTopLevelItem(item)
+            self._items[name] = item
+        layout.addWidget(self.tree)
+
+        self.overall = QProgressBar()
+        self.overall.setRange(0, len(tables))
+        layout.addWidget(self.overall)
+        self.status_label = QLabel("Starting…")
+        layout.addWidget(self.status_label)
+
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        self.verify_btn = QPushButton("Verify files")
+        self.verify_btn.setToolTip("Re-read every exported file and compare it with the manifest checksums")
+        self.verify_btn.setVisible(False)
+        self.cancel_btn = QPushButton("Cancel")
+        buttons.addWidget(self.verify_btn)
+        buttons.addWidget(self.cancel_btn)
+        layout.addLayout(buttons)
+        self._out_dir = None
+
+    def on_table_progress(self, table, rows):
+        item = self._items.get(table)
+        if item is None:
+            return
+        estimate = self._row_counts.get(table)
+        item.setText(1, f"{rows:,}")
+        item.setText(2, f"{min(rows / estimate, 1):.0%}" if estimate else "Exporting")
+
+    def show_finished(self, message, out_dir):
+        """Keep the dialog open after a successful export and offer to verify the files."""
+        self._out_dir = out_dir
+        self.status_label.setText(message)
+        try:
+            self.cancel_btn.clicked.disconnect()   # no more cancelling
+        except TypeError:
+            pass
+        self.cancel_btn.setText("Close")
+        self.cancel_btn.clicked.connect(self.accept)
+        self.verify_btn.clicked.connect(self._verify)
+        self.verify_btn.setVisible(True)
+
+    def _verify(self):
+        from PyQt5.QtWidgets import QApplication
+        from core.database_export import verify_manifest
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            problems = verify_manifest(self._out_dir)
+        except Exception as e:
+            problems = [f"manifest: {e}"]
+        finally:
+            QApplication.restoreOverrideCursor()
+        if problems:
+            QMessageBox.warning(self, "Verification Failed",
+                                f"❌ {len(problems)} problem(s) found:\n" + "\n".join(problems))
+        else:
+            QMessageBox.information(self, "Verification Passed",
+                                    "✅ Every exported file matches the checksum in manifest.json.")
+
+    def on_table_finished(self, table, result, error):
+        item = self._items.get(table)
+        if item is not None:
+            if error:
+                item.setText(2, "Cancelled" if error == "cancelled" else f"❌ {error}")
+            else:
+                item.setText(1, f"{result['rows']:,}")
+                item.setText(2, f"✅ {result['seconds']:.1f}s")
+        self._done += 1
+        self.overall.setValue(self._done)
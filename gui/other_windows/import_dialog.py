@@ -1,6 +1,6 @@
 from PyQt5.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QComboBox,
-    QPushButton, QScrollArea, QWidget
+    QPushButton, QScrollArea, QWidget, QFormLayout, QSpinBox, QCheckBox
 )
 from PyQt5.QtCore import Qt
 
@@ -57,3 +57,74 @@ class ImportMappingDialog(QDialog):
             val = combo.currentText()
             result[fh] = None if val == "(ignore)" else val
         return result
+
+
+
+class ImportOptionsDialog(QDialog):
+    """Connections and transaction settings for importing a large file."""
+
+    def __init__(self, parent, file_size, workers=4, parallel=True):
+        super().__init__(parent)
+        self.setWindowTitle("Import Options")
+
+        layout = QVBoxLayout(self)
+        layout.addWidget(QLabel(
+            f"This file is {file_size / 1024 ** 2:,.0f} MB.\n"
+            "Chunks can be inserted over several connections at once, "
+            "or committed in batches so a failed import can be resumed."
+        ))
+
+        form = QFormLayout()
+        self.workers_spin = QSpinBox()
+        self.workers_spin.setRange(1, 16 if parallel else 1)
+        self.workers_spin.setValue(workers if parallel else 1)
+        self.workers_spin.setEnabled(parallel)
+        form.addRow("Connections:", self.workers_spin)
+
+        self.atomic_check = QCheckBox("All or nothing (one transaction)")
+        self.atomic_check.setChecked(True)
+        self.atomic_check.setToolTip(
+            "Any error rolls the whole import back. Over several connections the rows\n"
+            "are staged first and moved into the table in one statement."
+        )
+        form.addRow(self.atomic_check)
+
+        self.commit_spin = QSpinBox()
+        self.commit_spin.setRange(10_000, 10_000_000)
+        self.commit_spin.setSingleStep(10_000)
+        self.commit_spin.setValue(100_000)
+        self.commit_spin.setGroupSeparatorShown(True)
+        self.commit_spin.setToolTip(
+            "Rows committed before an error are kept. With one connection the progress\n"
+            "is saved, and importing the same file again resumes after the last commit."
+        )
+        form.addRow("Commit every (rows):", self.commit_spin)
+        self.atomic_check.toggled.connect(lambda checked: self.commit_spin.setEnabled(not checked))
+        self.commit_spin.setEnabled(False)
+
+        self.tablock_check = QCheckBox("Lock the table while loading (TABLOCK)")
+        self.tablock_check.setToolTip(
+            "Allows minimally logged inserts; other sessions cannot write to the table meanwhile."
+        )
+        form.addRow(self.tablock_check)
+        layout.addLayout(form)
+
+        btn_layout = QHBoxLayout()
+        ok = QPushButton("Import")
+        cancel = QPushButton("Cancel")
+        ok.clicked.connect(self.accept)
+        cancel.clicked.connect(self.reject)
+        btn_layout.addStretch()
+        btn_layout.addWidget(ok)
+        btn_layout.addWidget(cancel)
+        layout.addLayout(btn_layout)
+
+    def get_options(self):
+        """{"workers", "atomic", "tablock", "commit_every"} as chosen (commit_every None when atomic)."""
+        atomic = self.atomic_check.isChecked()
+        return {
+            "workers": self.workers_spin.value(),
+            "atomic": atomic,
+            "tablock": self.tablock_check.isChecked(),
+            "commit_every": None if atomic else self.commit_spin.value(),
+        }
@@ -427,4 +427,1445 @@ def test_get_table_definition_returns_expected(add_new_dialog_table):
     table_name, cols = add_new_dialog_table.get_table_definition()
     assert isinstance(cols, list)
     assert cols[0][0] == "id"
-    assert cols[0][2]  # is_pk
\ No newline at end of file
+    assert cols[0][2]  # is_pk
+
+# ============================================================
+#  Keyset pagination tests
+# ============================================================
+
+class FakeKeysetCursor:
+    """Serves key metadata and a sorted in-memory table to fetch_full_table_paginated."""
+    def __init__(self, rows, key_meta):
+        self.rows = rows
+        self.key_meta = key_meta
+        self.description = None
+        self.executed = []
+        self._result = []
+
+    def execute(self, sql, params=()):
+        self.executed.append((sql, list(params)))
+        if "sys.indexes" in sql:
+            self._result = list(self.key_meta)
+            return
+        self.description = [("id",), ("name",)]
+        limit = int(sql.split("TOP ")[1].split()[0])
+        rows = self.rows
+        if params:
+            rows = [r for r in rows if r[0] > params[0]]
+        self._result = rows[:limit]
+
+    def fetchall(self):
+        return self._result
+
+    def close(self):
+        self.closed = True
+
+
+class FakeKeysetConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+    def cursor(self):
+        return self._cursor
+
+
+def test_build_keyset_predicate_composite_key():
+    from db.db_utils import _build_keyset_predicate
+    sql, params = _build_keyset_predicate(["a", "b"], [1, 2])
+    assert sql == "([a] > ?) OR ([a] = ? AND [b] > ?)"
+    assert params == [1, 1, 2]
+
+
+def test_fetch_full_table_paginated_uses_keyset():
+    from db.db_utils import fetch_full_table_paginated
+    rows = [(i, f"n{i}") for i in range(1, 8)]
+    cursor = FakeKeysetCursor(rows, key_meta=[(1, "id", False)])
+    pages = list(fetch_full_table_paginated(FakeKeysetConnection(cursor), "people", chunk_size=3))
+
+    assert [len(r) for _, r in pages] == [3, 3, 1]
+    assert [row for _, r in pages for row in r] == rows
+    assert not any("OFFSET" in sql for sql, _ in cursor.executed)
+    assert cursor.executed[-1][1] == [6]
+
+
+def test_fetch_table_key_columns_skips_nullable_unique_index():
+    from db.db_utils import fetch_table_key_columns
+    meta = [(2, "email", True), (3, "code", False), (3, "region", False)]
+    cursor = FakeKeysetCursor([], key_meta=meta)
+    assert fetch_table_key_columns(FakeKeysetConnection(cursor), "people") == ["code", "region"]
+
+
+# ============================================================
+#  QueryResultSession tests
+# ============================================================
+
+class FakeStreamCursor:
+    """Cursor over a fixed result set that counts executes and fetchmany calls."""
+    def __init__(self, rows, columns=("id",)):
+        self.rows = list(rows)
+        self.description = [(c,) for c in columns]
+        self.executed = []
+        self.fetch_calls = 0
+        self.closed = False
+        self._pos = 0
+
+    def execute(self, sql, params=()):
+        self.executed.append(sql)
+        self._pos = 0
+
+    def fetchmany(self, size):
+        self.fetch_calls += 1
+        chunk = self.rows[self._pos:self._pos + size]
+        self._pos += len(chunk)
+        return chunk
+
+    def close(self):
+        self.closed = True
+
+
+class FakeStreamConnection:
+    def __init__(self, cursor):
+        self._cursor = cursor
+    def cursor(self):
+        return self._cursor
+    def commit(self):
+        pass
+    def rollback(self):
+        pass
+
+
+def test_query_session_pages_without_reexecuting():
+    from db.query_session import QueryResultSession
+    cursor = FakeStreamCursor([(i,) for i in range(5)])
+    session = QueryResultSession(FakeStreamConnection(cursor), "SELECT id FROM t", page_size=2)
+
+    assert list(session.fetch_page(1)) == [(2,), (3,)]
+    assert list(session.fetch_page(0)) == [(0,), (1,)]
+    assert list(session.fetch_page(2)) == [(4,)]
+    assert list(session.fetch_page(3)) == []
+    assert cursor.executed == ["SELECT id FROM t"]
+    assert cursor.fetch_calls == 3
+    assert session.exhausted and cursor.closed
+
+
+def test_open_query_session_keeps_original_select():
+    from db.db_utils import open_query_session
+    cursor = FakeStreamCursor([(1,)])
+    results, stats = open_query_session(FakeStreamConnection(cursor), "SELECT TOP 5 id FROM t ORDER BY id", 500)
+
+    assert cursor.executed == ["SELECT TOP 5 id FROM t ORDER BY id"]
+    assert len(results) == 1 and results.active.columns == ["id"]
+    assert (stats["success"], stats["failed"], stats["total"]) == (1, 0, 1)
+    results.close()
+    assert results.closed and results.active.closed
+
+
+# ============================================================
+#  ColumnarResult tests
+# ============================================================
+
+def test_columnar_result_keeps_nullable_ints():
+    from db.result_set import ColumnarResult
+    cursor = FakeStreamCursor([(1, "a"), (None, "b")], columns=("qty", "name"))
+    cursor.description = [("qty", int, None, 10, 10, 0, True), ("name", str, None, 50, 50, 0, False)]
+    result = ColumnarResult.from_cursor(cursor, cursor.fetchmany(10))
+
+    assert len(result) == 2
+    assert result.column("qty") == (1, None)
+    assert result[1] == (None, "b")
+    assert list(result) == [(1, "a"), (None, "b")]
+    assert result.type_names() == ["int", "str"]
+    assert result.nullable == [True, False]
+
+
+def test_columnar_result_empty():
+    from db.result_set import ColumnarResult
+    result = ColumnarResult.from_rows(["id"], [int], [])
+    assert len(result) == 0
+    assert list(result) == []
+
+
+# ============================================================
+#  QueryWorker tests
+# ============================================================
+
+class BlockingCursor(FakeStreamCursor):
+    """execute() blocks until cancel() is called, like a long-running statement."""
+    def __init__(self):
+        super().__init__([])
+        import threading
+        self._released = threading.Event()
+
+    def execute(self, sql, params=()):
+        super().execute(sql, params)
+        if not self._released.wait(5):
+            raise AssertionError("statement was never cancelled")
+        raise RuntimeError("Operation canceled")
+
+    def cancel(self):
+        self._released.set()
+
+
+def test_query_worker_cancel_stops_batch(qtbot):
+    from core.query_worker import QueryWorker
+    cursor = BlockingCursor()
+    worker = QueryWorker(FakeStreamConnection(cursor), "SELECT 1;\nSELECT 2\nGO\nSELECT 3", page_size=10)
+
+    with qtbot.waitSignal(worker.failed, timeout=3000) as blocker:
+        worker.start()
+        qtbot.waitUntil(lambda: bool(cursor.executed), timeout=1000)
+        worker.cancel()
+    worker.wait()
+
+    assert blocker.args == ["Query cancelled."]
+    assert cursor.executed == ["SELECT 1;\nSELECT 2"]
+
+
+def test_query_worker_timeout(qtbot):
+    from core.query_worker import QueryWorker
+    worker = QueryWorker(FakeStreamConnection(BlockingCursor()), "SELECT 1", timeout=0.2)
+
+    with qtbot.waitSignal(worker.failed, timeout=3000) as blocker:
+        worker.start()
+    worker.wait()
+    assert "timed out" in blocker.args[0]
+
+
+def test_query_tab_keeps_its_own_connection():
+    from gui.database_explorer.controller import DBController
+    opened = []
+    def factory(database):
+        conn = FakeStreamConnection(FakeStreamCursor([]))
+        opened.append((database, conn))
+        return conn
+
+    controller = DBController(None, connection_factory=factory)
+    controller.current_db = "db1"
+    tab = object()
+    first = controller.create_query_worker("CREATE TABLE #t (x int)", 10, owner=tab)
+    second = controller.create_query_worker("SELECT * FROM #t", 10, owner=tab)
+    other = controller.create_query_worker("SELECT 1", 10, owner=object())
+
+    # One connection per tab, reused across runs so #temp tables and SET options survive
+    assert first.connection._connection is second.connection._connection is opened[0][1]
+    assert other.connection._connection is opened[1][1]
+    assert not first.owns_connection and len(opened) == 2
+
+    # It follows the explorer into another database and closes with the tab
+    controller.current_db = "db2"
+    controller.create_query_worker("SELECT 1", 10, owner=tab)
+    assert opened[0][1]._cursor.executed[-1] == "USE [db2]"
+    controller.close_tab_connection(tab)
+    assert tab not in controller.tab_connections
+
+    # Without a factory there is no worker: the shared connection stays on the GUI thread
+    assert DBController(None).create_query_worker("SELECT 1", 10, owner=tab) is None
+
+
+# ============================================================
+#  PageCache tests
+# ============================================================
+
+def test_page_cache_lru_by_bytes():
+    from db.page_cache import PageCache, estimate_size
+    page = (["id"], [(i,) for i in range(100)], True)
+    cache = PageCache(max_bytes=estimate_size(page) * 2 + 10)
+
+    keys = [PageCache.make_key("db", "SELECT * FROM t", p, 100) for p in range(3)]
+    cache.put(keys[0], page)
+    cache.put(keys[1], page)
+    assert cache.get(keys[0]) is page          # touch 0 so 1 becomes LRU
+    cache.put(keys[2], page)
+
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is page
+    assert cache.stats()["hits"] == 2 and cache.stats()["misses"] == 1
+    assert cache.size_bytes <= cache.max_bytes
+
+
+def test_page_cache_key_normalizes_whitespace_not_literals():
+    from db.page_cache import PageCache
+    a = PageCache.make_key("db", "SELECT *\n  FROM t WHERE x = 'a  b';", 0, 500)
+    b = PageCache.make_key("db", "SELECT * FROM t WHERE x = 'a  b'", 0, 500)
+    c = PageCache.make_key("db", "SELECT * FROM t WHERE x = 'a b'", 0, 500)
+    assert a == b
+    assert a != c
+
+
+def test_controller_invalidates_cache_on_write():
+    from gui.database_explorer.controller import DBController
+    controller = DBController(None)
+    controller.current_db = "db"
+    controller.cache_query_page("SELECT 1", 0, 500, ["x"], [(1,)], False)
+    controller.cache_query_page("UPDATE t SET x = 1", 0, 500, [], [], False)
+    controller.cache_query_page("SELECT x FROM t\nDELETE FROM t", 0, 500, ["x"], [(1,)], False)
+    assert len(controller.page_cache) == 1
+    assert controller.get_cached_query_page("SELECT 1", 0, 500) == (["x"], [(1,)], False)
+
+    try:
+        controller.add_table_item("t", {"x": 1})
+    except Exception:
+        pass  # no connection; the cache must still be dropped
+    assert len(controller.page_cache) == 0
+
+
+def test_controller_drops_stale_pages_on_rerun_and_reconnect():
+    from gui.database_explorer.controller import DBController
+    controller = DBController(None)
+    controller.current_db = "db"
+    for page in (0, 1):
+        controller.cache_query_page("SELECT 1", page, 500, ["x"], [(page,)], True)
+    controller.cache_query_page("SELECT 2", 0, 500, ["x"], [(2,)], False)
+
+    # An explicit Run forgets every page of that query only
+    controller.forget_query_pages("SELECT  1;")
+    assert controller.get_cached_query_page("SELECT 1", 1, 500) is None
+    assert controller.get_cached_query_page("SELECT 2", 0, 500) is not None
+
+    # Another server with the same database name must not see the old rows
+    controller.set_connection(object())
+    controller.current_db = "db"
+    assert len(controller.page_cache) == 0
+
+
+# ============================================================
+#  Row count tests
+# ============================================================
+
+class FakeCountCursor:
+    def __init__(self, metadata_rows=None, fail_metadata=False):
+        self.metadata_rows = metadata_rows
+        self.fail_metadata = fail_metadata
+        self.executed = []
+    def execute(self, sql, params=()):
+        self.executed.append(sql)
+        if "sys." in sql and self.fail_metadata:
+            raise RuntimeError("VIEW DATABASE STATE permission denied")
+    def fetchone(self):
+        if "COUNT(*)" in self.executed[-1]:
+            return (7,)
+        return (self.metadata_rows,)
+
+
+def test_row_count_uses_metadata_without_scan():
+    from db.db_utils import get_table_row_count
+    cursor = FakeCountCursor(metadata_rows=123456)
+    assert get_table_row_count(FakeKeysetConnection(cursor), "big") == 123456
+    assert "sys.dm_db_partition_stats" in cursor.executed[0]
+    assert not any("COUNT(*)" in sql for sql in cursor.executed)
+
+
+def test_row_count_exact_and_fallback():
+    from db.db_utils import get_table_row_count
+    assert get_table_row_count(FakeKeysetConnection(FakeCountCursor(5)), "t", exact=True) == 7
+    cursor = FakeCountCursor(fail_metadata=True)
+    assert get_table_row_count(FakeKeysetConnection(cursor), "t") == 7
+    assert len(cursor.executed) == 3
+
+
+def test_tree_shows_row_counts(qtbot):
+    from gui.database_explorer.tree_panel import DatabaseTreePanel
+    panel = DatabaseTreePanel()
+    qtbot.addWidget(panel)
+    panel.show_database_objects(["users", "orders"], {"users": 1500})
+    tables_item = panel.tree.topLevelItem(0)
+    assert tables_item.child(1).text(1) == "~1,500"
+    assert tables_item.child(2).text(1) == ""
+
+
+# ============================================================
+#  T-SQL batch lexer tests
+# ============================================================
+
+def test_split_script_respects_strings_comments_and_brackets():
+    from db.sql_batch import split_script
+    script = (
+        "SELECT 'a;b' AS [x;y]]z];\n"
+        "/* outer /* nested; */ still; */ SELECT \"q;\" FROM t; -- trailing; comment\n"
+        "PRINT 'it''s; fine'"
+    )
+    (batch,) = split_script(script)
+    assert len(batch.statements) == 3
+    assert batch.statements[0] == "SELECT 'a;b' AS [x;y]]z]"
+    assert batch.statements[2] == "-- trailing; comment\nPRINT 'it''s; fine'"
+
+
+def test_split_script_go_batches_and_repeat():
+    from db.sql_batch import split_script
+    script = "CREATE TABLE t (a INT)\ngo\nINSERT t VALUES (1)\nGO 3 -- three times\nSELECT 'x\nGO\n' FROM t\n  GO  \n"
+    batches = split_script(script)
+    assert [b.repeat for b in batches] == [1, 3, 1]
+    assert batches[1].text == "INSERT t VALUES (1)"
+    assert batches[2].statements == ["SELECT 'x\nGO\n' FROM t"]
+
+
+def test_expected_result_sets():
+    from db.sql_batch import expected_result_sets
+    assert expected_result_sets(["DECLARE @x INT", "SELECT @x = 1", "SELECT @x", "SELECT * INTO t2 FROM t"]) == 1
+    assert expected_result_sets(["EXEC sp_who"]) is None
+    assert expected_result_sets(["UPDATE t SET a = 1 OUTPUT inserted.a"]) is None
+    # T-SQL does not need ';': statements run together cannot be counted
+    assert expected_result_sets(["SELECT a FROM x\nSELECT b FROM y"]) is None
+    assert expected_result_sets(["UPDATE t SET a = 1\nSELECT a FROM t"]) is None
+    assert expected_result_sets(["SELECT a FROM x UNION ALL SELECT b FROM y", "SELECT '(select' FROM [exec]"]) == 2
+
+
+class FakeMultiSetCursor(FakeStreamCursor):
+    """Cursor that returns several result sets (None = rowcount-only set)."""
+    def __init__(self, sets):
+        super().__init__([])
+        self.sets = sets
+        self._set = 0
+        self.rowcount = -1
+
+    def execute(self, sql, params=()):
+        self.executed.append(sql)
+        self._set = 0
+        self._load()
+
+    def _load(self):
+        rows = self.sets[self._set]
+        self.description = None if rows is None else [("c",)]
+        self.rows, self._pos = list(rows or []), 0
+        self.rowcount = 1 if rows is None else -1
+
+    def nextset(self):
+        if self._set + 1 >= len(self.sets):
+            return False
+        self._set += 1
+        self._load()
+        return True
+
+
+def test_write_script_result_is_exported_from_the_open_session(tmp_path):
+    from core.export_utils import ExportWorker, _session_chunks
+    from db.db_utils import is_read_only_batch, open_query_session
+
+    cursor = FakeMultiSetCursor([None, [(1,), (2,), (3,)]])
+    script = "INSERT INTO t VALUES (1);\nSELECT c FROM t"
+    assert not is_read_only_batch(script)   # re-running it would insert again
+    results, _ = open_query_session(FakeStreamConnection(cursor), script, 2)
+    session = results.active
+    assert list(session.fetch_page(0)) == [(1,), (2,)]
+
+    session.drain(spool=True)
+    path = tmp_path / "out.csv"
+    worker = ExportWorker(_session_chunks(session), str(path), "CSV", session.row_count)
+    done = []
+    worker.finished.connect(done.append)
+    worker.run()
+    assert done and cursor.executed == [script]   # exported without running the script again
+    assert path.read_text(encoding="utf-8").split() == ["c", "1", "2", "3"]
+
+    results.close()
+    with pytest.raises(ValueError):
+        list(_session_chunks(session))
+
+
+def test_open_query_session_walks_result_sets_in_one_round_trip():
+    from db.db_utils import open_query_session
+    cursor = FakeMultiSetCursor([[(1,)], None, [(2,), (3,)]])
+    script = "SELECT 1;\nUPDATE t SET c = 1;\nSELECT c FROM t"
+    results, stats = open_query_session(FakeStreamConnection(cursor), script, 1)
+
+    assert cursor.executed == [script]
+    assert stats["result_sets"] == 2 and stats["success"] == 3
+    assert len(results) == 2 and results.current == 1
+    assert list(results[0].fetch_page(0)) == [(1,)]
+    assert list(results.active.fetch_page(0)) == [(2,)]
+    assert not cursor.closed  # final result set is still streamed from the live cursor
+    assert list(results.active.fetch_page(1)) == [(3,)]
+    results.close()
+    assert cursor.closed
+
+
+def test_open_query_session_keeps_every_set_of_a_batch_without_semicolons():
+    from db.db_utils import open_query_session
+    cursor = FakeMultiSetCursor([[(1,)], [(2,), (3,)]])
+    results, stats = open_query_session(FakeStreamConnection(cursor), "SELECT a FROM x\nSELECT b FROM y", 10)
+
+    assert stats["result_sets"] == 2 and len(results) == 2
+    assert list(results[0].fetch_page(0)) == [(1,)]
+    assert list(results[1].fetch_page(0)) == [(2,), (3,)]
+    results.close()
+
+
+def test_drained_result_sets_are_spooled_to_disk():
+    from db.db_utils import open_query_session
+    first = [(i,) for i in range(25)]
+    cursor = FakeMultiSetCursor([first, [(100,)]])
+    results, _ = open_query_session(FakeStreamConnection(cursor), "SELECT 1;\nEXEC sp_who", 10)
+
+    hidden = results[0]
+    assert hidden._pages == [] and hidden.page_count == 3  # nothing held in memory
+    assert hidden.row_count == 25
+    assert list(hidden.fetch_page(2)) == first[20:]
+    assert results.labels()[0].startswith("Result 1 (25 rows")
+    results.close()
+    assert hidden._spool is None
+
+
+def test_stream_query_result_runs_script_once():
+    from db.db_utils import stream_query_result
+    rows = [(i,) for i in range(25)]
+    cursor = FakeMultiSetCursor([None, rows])
+    script = "UPDATE t SET c = 1;\nSELECT c FROM t"
+    chunks = list(stream_query_result(FakeStreamConnection(cursor), script, 10))
+
+    assert cursor.executed == [script]
+    assert [len(chunk) for _, chunk in chunks] == [10, 10, 5]
+    assert [r for _, chunk in chunks for r in chunk] == rows
+    assert chunks[0][0] == ["c"]
+
+    # A specific result set; later ones are never read
+    cursor = FakeMultiSetCursor([[(1,), (2,)], [(3,)]])
+    chunks = list(stream_query_result(FakeStreamConnection(cursor), "SELECT 1;\nSELECT 2", 10, result_set=1))
+    assert [list(chunk) for _, chunk in chunks] == [[(1,), (2,)]]
+
+    # Last result set of a script whose shape is unknown up front (spooled candidates)
+    cursor = FakeMultiSetCursor([[(1,)], [(2,), (3,)]])
+    chunks = list(stream_query_result(FakeStreamConnection(cursor), "EXEC sp_who", 1))
+    assert [r for _, chunk in chunks for r in chunk] == [(2,), (3,)]
+
+    # Statements without ';' cannot be counted: still the last set, not the first
+    cursor = FakeMultiSetCursor([[(1,)], [(2,)]])
+    chunks = list(stream_query_result(FakeStreamConnection(cursor), "SELECT a FROM x\nSELECT b FROM y", 10))
+    assert [r for _, chunk in chunks for r in chunk] == [(2,)]
+
+    # A result set without rows still yields its columns (header-only file)
+    for script, sets in (("SELECT c FROM t WHERE 1 = 0", [[]]), ("EXEC sp_who", [[(1,)], []])):
+        chunks = list(stream_query_result(FakeStreamConnection(FakeMultiSetCursor(sets)), script, 10))
+        assert [(columns, len(chunk)) for columns, chunk in chunks] == [(["c"], 0)]
+
+
+def test_data_panel_shows_result_set_tabs(qtbot):
+    from PyQt5.QtWidgets import QTabBar
+    from gui.database_explorer.data_preview import DataPreviewPanel
+    panel = DataPreviewPanel()
+    qtbot.addWidget(panel)
+    panel.show_query_results(["id"], [(1,)], 0, 500, "SELECT 1; SELECT 2",
+                             has_next=False, result_sets=["Result 1", "Result 2"], current_set=1)
+
+    bar = panel.findChild(QTabBar)
+    assert bar.count() == 2 and bar.currentIndex() == 1
+    with qtbot.waitSignal(panel.resultSetChangeRequested) as blocker:
+        bar.setCurrentIndex(0)
+    assert blocker.args == [0]
+
+    # One tab per result set the server returned, also when the batch has no ';'
+    from db.db_utils import open_query_session
+    cursor = FakeMultiSetCursor([[(1,)], None, [(2,)], [(3,)]])
+    script = "SELECT a FROM x\nUPDATE t SET a = 1\nSELECT b FROM y\nSELECT c FROM z"
+    results, _ = open_query_session(FakeStreamConnection(cursor), script, 500)
+    panel.show_query_results(["c"], list(results.active.fetch_page(0)), 0, 500, script,
+                             has_next=False, result_sets=results.labels(), current_set=results.current)
+    bar = panel.findChildren(QTabBar)[-1]
+    assert bar.count() == 3 and bar.currentIndex() == 2
+    results.close()
+
+
+# ============================================================
+#  SchemaCatalog tests
+# ============================================================
+
+class FakeCatalogCursor:
+    """Answers the modify-date, bulk schema and per-table schema queries from dicts."""
+    def __init__(self, modified, schemas):
+        self.modified = modified
+        self.schemas = schemas
+        self.executed = []
+        self._rows = []
+
+    def execute(self, sql, params=()):
+        from collections import namedtuple
+        self.executed.append(sql)
+        if "sys.tables" in sql:
+            since = params[0] if params else None
+            self._rows = [
+                (t, self.modified[t], *col)
+                for t, cols in self.schemas.items() if t in self.modified
+                if since is None or self.modified[t] >= since
+                for col in cols
+            ]
+        elif "modify_date" in sql:
+            self._rows = list(self.modified.items())
+        else:
+            Row = namedtuple("Row", "COLUMN_NAME DATA_TYPE is_primary is_identity IS_NULLABLE")
+            self._rows = [Row(*col) for col in self.schemas[params[0]]]
+
+    def fetchall(self):
+        return self._rows
+
+
+def test_schema_catalog_serves_metadata_from_memory():
+    from gui.database_explorer.controller import DBController
+    cursor = FakeCatalogCursor(
+        {"orders": 1, "Customers": 1},
+        {"orders": [("id", "int", 1, 1, 0), ("note", "varchar", 0, 0, 1)],
+         "Customers": [("id", "int", 0, 0, 1)]},
+    )
+    controller = DBController(FakeKeysetConnection(cursor))
+    controller.schema_catalog.reset("db")
+
+    assert controller.fetch_tables() == ["Customers", "orders"]
+    for _ in range(3):
+        controller.fetch_tables()
+        schema = controller.fetch_table_schema("ORDERS")
+    assert schema[0] == ("id", "int", True, True, False)
+    assert controller.fetch_column_info("orders", "NOTE")["is_nullable"] == "YES"
+    assert controller.schema_catalog.primary_key("orders") == ["id"]
+    assert len(cursor.executed) == 1   # one bulk load for the whole database
+
+    # After a reconnect the catalog reads through the new connection
+    new_cursor = FakeCatalogCursor({"items": 1}, {"items": [("id", "int", 1, 0, 0)]})
+    controller.set_connection(FakeKeysetConnection(new_cursor))
+    controller.schema_catalog.reset("db")
+    assert controller.fetch_tables() == ["items"]
+    assert len(cursor.executed) == 1 and len(new_cursor.executed) == 1
+
+
+def test_schema_catalog_reloads_only_changed_tables():
+    from db.schema_catalog import SchemaCatalog
+    cursor = FakeCatalogCursor(
+        {"a": 1, "b": 1},
+        {"a": [("id", "int", 1, 0, 0)], "b": [("id", "int", 0, 0, 1)]},
+    )
+    catalog = SchemaCatalog(FakeKeysetConnection(cursor))
+    catalog.table_schema("a"), catalog.table_schema("b")
+
+    cursor.modified = {"a": 2, "c": 2}          # a altered, b dropped, c created
+    cursor.schemas["a"] = [("id", "bigint", 1, 0, 0)]
+    cursor.schemas["c"] = [("x", "int", 0, 0, 1)]
+    catalog.mark_stale()
+    assert catalog.tables() == ["a", "c"]
+    assert catalog.table_schema("a")[0][1] == "bigint"
+    assert catalog.table_schema("c") == [("x", "int", False, False, True)]
+    assert len(cursor.executed) == 3   # bulk load, modify dates, bulk reload of a and c
+
+
+def test_update_cell_uses_known_primary_key():
+    from db.db_utils import update_table_cell
+    cursor = FakeCountCursor()
+    cursor.rowcount = 1
+    update_table_cell(FakeStreamConnection(cursor), "t", "name", 5, "x", pk_columns=["id"])
+    assert cursor.executed == ["UPDATE [t] SET [name] = ? WHERE [id] = ?"]
+
+
+# ============================================================
+#  Streaming export tests
+# ============================================================
+
+def test_export_writers_stream_chunks(tmp_path):
+    import csv, json
+    from core.export_writers import open_export_writer
+    chunks = [[(1, "a"), (2, None)], [(3, "c")]]
+
+    csv_path, json_path = tmp_path / "out.csv", tmp_path / "out.json"
+    for fmt, path in (("CSV", csv_path), ("JSON", json_path)):
+        writer = open_export_writer(fmt, str(path), ["id", "name"])
+        for rows in chunks:
+            writer.write_rows(rows)
+        writer.close()
+        assert writer.rows_written == 3
+        assert writer.bytes_written == path.stat().st_size
+
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        assert list(csv.reader(f)) == [["id", "name"], ["1", "a"], ["2", ""], ["3", "c"]]
+    assert json.loads(json_path.read_text(encoding="utf-8"))[1] == {"id": 2, "name": None}
+
+
+def test_export_worker_consumes_chunks_lazily(tmp_path):
+    from core.export_utils import ExportWorker
+    fetched = []
+
+    def chunks():
+        for start in range(0, 30, 10):
+            fetched.append(start)
+            yield ["id"], [(i,) for i in range(start, start + 10)]
+
+    path = tmp_path / "t.xlsx"
+    worker = ExportWorker(chunks(), str(path), "Excel", total_rows=30)
+    messages, progress = [], []
+    worker.finished.connect(messages.append)
+    worker.progress.connect(progress.append)
+    worker.run()  # run synchronously in the test thread
+
+    assert fetched == [0, 10, 20]
+    assert "30 rows" in messages[0]
+    assert progress[-1] == 100 and progress[0] < 50
+    from openpyxl import load_workbook
+    assert load_workbook(path).active.max_row == 31
+
+
+def test_excel_writer_streams_and_rolls_sheets_at_limit(tmp_path):
+    from openpyxl import load_workbook
+    from core.export_writers import EXCEL_MAX_ROWS, ExcelExportWriter
+
+    assert ExcelExportWriter.rows_per_sheet == EXCEL_MAX_ROWS - 1
+    writer = ExcelExportWriter(str(tmp_path / "t.xlsx"), ["id"])
+    writer.rows_per_sheet = 4   # same rollover logic, small numbers
+    writer.write_rows([(i,) for i in range(6)])
+    writer.write_rows([(i,) for i in range(6, 10)])
+    writer.close()
+
+    book = load_workbook(tmp_path / "t.xlsx")
+    assert book.sheetnames == ["Sheet1", "Sheet2", "Sheet3"]
+    assert [c.value for c in book["Sheet1"]["A"]] == ["id", 0, 1, 2, 3]
+    assert [c.value for c in book["Sheet3"]["A"]] == ["id", 8, 9]
+
+
+def test_parquet_and_arrow_export_map_sql_types(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    import datetime, decimal, uuid
+    import pyarrow.parquet as pq
+    from core.export_writers import open_export_writer
+    from db.result_set import ColumnarResult
+
+    desc = [
+        ("amount", decimal.Decimal, None, 10, 10, 2, True),
+        ("created", datetime.datetime, None, 27, 27, 7, True),
+        ("guid", uuid.UUID, None, 36, 36, 0, True),
+        ("blob", bytearray, None, 8, 8, 0, True),
+    ]
+    guid = uuid.uuid4()
+    chunk = ColumnarResult.from_rows(
+        [d[0] for d in desc], [d[1] for d in desc],
+        [(decimal.Decimal("1.5"), datetime.datetime(2024, 1, 2, 3, 4, 5, 678901), guid, b"\x00\x01"),
+         (None, None, None, None)],
+        description=desc,
+    )
+
+    for fmt, codec in (("Parquet", "zstd"), ("Arrow", "lz4")):
+        path = tmp_path / f"out.{fmt.lower()}"
+        writer = open_export_writer(fmt, str(path), chunk.columns, compression=codec)
+        writer.write_rows(chunk)
+        writer.write_rows(chunk)
+        writer.close()
+        table = pq.read_table(path) if fmt == "Parquet" else pa.ipc.open_file(str(path)).read_all()
+        assert table.num_rows == 4
+        assert str(table.schema.field("amount").type) == "decimal128(10, 2)"
+        assert table.schema.field("created").type == pa.timestamp("us")
+        assert table.column("guid")[0].as_py() == str(guid)
+        assert table.column("blob")[0].as_py() == b"\x00\x01"
+    assert pq.ParquetFile(tmp_path / "out.parquet").metadata.num_row_groups == 2
+
+    # A join returning two columns named 'id' keeps both columns' own values
+    joined = ColumnarResult.from_rows(["id", "id"], [int, int], [(1, 10), (2, 20)])
+    assert joined.column(1) == (10, 20)
+    for fmt in ("Parquet", "Arrow"):
+        path = tmp_path / f"joined.{fmt.lower()}"
+        writer = open_export_writer(fmt, str(path), joined.columns)
+        writer.write_rows(joined)
+        writer.close()
+        table = pq.read_table(path) if fmt == "Parquet" else pa.ipc.open_file(str(path)).read_all()
+        assert table.column_names == ["id", "id_2"]
+        assert table.column("id_2").to_pylist() == [10, 20]
+
+
+def test_export_worker_cancel_removes_partial_file(tmp_path):
+    from core.export_utils import ExportWorker
+    from core.query_worker import _TrackingConnection
+    from db.db_utils import fetch_full_table_paginated
+
+    cursor = FakeKeysetCursor([(i, f"n{i}") for i in range(100)], key_meta=[(1, "id", False)])
+    conn = _TrackingConnection(FakeKeysetConnection(cursor))
+    path = tmp_path / "t.csv"
+    worker = ExportWorker(fetch_full_table_paginated(conn, "t", 10), str(path), "CSV",
+                          total_rows=100, connection=conn, owns_connection=False)
+    cursor.cancel = lambda: None
+    outcome, statuses = [], []
+    worker.cancelled.connect(outcome.append)
+    worker.failed.connect(outcome.append)
+    worker.status.connect(statuses.append)
+    worker.status.connect(lambda _msg: worker.cancel())   # cancel after the first chunk
+    worker.run()
+
+    assert outcome and "cancelled" in outcome[0]
+    assert not path.exists()
+    assert cursor.closed
+    assert "rows/s" in statuses[0] and "ETA" in statuses[0]
+
+
+# ============================================================
+#  Database export tests
+# ============================================================
+
+def test_export_database_tables_writes_manifest(tmp_path):
+    import json, threading
+    from core.database_export import export_database_tables, verify_manifest, MANIFEST_NAME
+
+    opened = []
+    lock = threading.Lock()
+
+    def factory():
+        with lock:
+            opened.append(1)
+        rows = [(i, f"n{i}") for i in range(25)]
+        return FakeKeysetConnection(FakeKeysetCursor(rows, key_meta=[(1, "id", False)]))
+
+    done = []
+    manifest = export_database_tables(
+        factory, [("a", 25), ("b", 25), ("c", 25)], str(tmp_path), "CSV",
+        parallelism=2, chunk_size=10, on_table_done=lambda t, r, e: done.append((t, e)),
+    )
+
+    assert len(opened) <= 2
+    assert sorted(done) == [("a", None), ("b", None), ("c", None)]
+    assert [t["rows"] for t in manifest["tables"]] == [25, 25, 25]
+    assert json.loads((tmp_path / MANIFEST_NAME).read_text())["total_rows"] == 75
+    assert verify_manifest(str(tmp_path)) == []
+    (tmp_path / "a.csv").write_text("tampered")
+    assert verify_manifest(str(tmp_path)) == ["a.csv: checksum mismatch"]
+
+
+def test_database_export_keeps_colliding_file_names_apart(tmp_path):
+    from core.database_export import export_database_tables, unique_table_file_names, verify_manifest
+
+    tables = ["dbo.[My Table]", "dbo.My_Table", "dbo.MY_TABLE", "dbo.Other"]
+    assert list(unique_table_file_names(tables, "CSV").values()) == [
+        "dbo._My_Table.csv", "dbo.My_Table.csv", "dbo.MY_TABLE_2.csv", "dbo.Other.csv"]
+
+    names = {"a b": "a_b.csv", "a_b": "a_b_2.csv", "A_B": "A_B_3.csv"}
+    assert unique_table_file_names(list(names), "CSV") == names
+    rows = [(i, f"n{i}") for i in range(5)]
+    manifest = export_database_tables(
+        lambda: FakeKeysetConnection(FakeKeysetCursor(rows, key_meta=[(1, "id", False)])),
+        list(names), str(tmp_path), "CSV", parallelism=3,
+    )
+    assert sorted(t["file"] for t in manifest["tables"]) == sorted(names.values())
+    assert verify_manifest(str(tmp_path)) == []
+
+
+def test_cancelled_database_export_sends_no_more_queries(tmp_path):
+    from core.database_export import DatabaseExportWorker, export_database_tables
+
+    class CancellableCursor(FakeKeysetCursor):
+        cancelled = 0
+        def cancel(self):
+            self.cancelled += 1
+
+    cursor = CancellableCursor([(i, f"n{i}") for i in range(25)], key_meta=[(1, "id", False)])
+    done = []
+    manifest = export_database_tables(
+        lambda: FakeKeysetConnection(cursor), ["a", "b", "c"], str(tmp_path), "CSV",
+        parallelism=1, chunk_size=10, cancel_check=lambda: len(cursor.executed) >= 2,
+        on_table_done=lambda t, r, e: done.append((t, e)),
+    )
+    # Key lookup + first page of "a", then nothing: the queued tables never query
+    assert len(cursor.executed) == 2
+    assert done == [("a", "cancelled"), ("b", "cancelled"), ("c", "cancelled")]
+    assert manifest["tables"] == [] and list(tmp_path.iterdir()) == [tmp_path / "manifest.json"]
+
+    # Cancel interrupts the statement running on each pooled connection
+    worker = DatabaseExportWorker(lambda: FakeKeysetConnection(cursor), ["a"], str(tmp_path), "CSV")
+    worker._open_connection().cursor()
+    worker.cancel()
+    assert cursor.cancelled == 1
+
+
+def test_export_progress_dialog_verifies_files(qtbot, tmp_path, monkeypatch):
+    from PyQt5.QtWidgets import QMessageBox
+    from core.database_export import export_database_tables
+    from gui.other_windows.export_database_dialog import DatabaseExportProgressDialog
+
+    rows = [(i, f"n{i}") for i in range(5)]
+    export_database_tables(lambda: FakeKeysetConnection(FakeKeysetCursor(rows, key_meta=[(1, "id", False)])),
+                           ["a"], str(tmp_path), "CSV", parallelism=1)
+    dialog = DatabaseExportProgressDialog(None, ["a"])
+    qtbot.addWidget(dialog)
+    shown = []
+    monkeypatch.setattr(QMessageBox, "information", lambda *a: shown.append(("ok", a[2])))
+    monkeypatch.setattr(QMessageBox, "warning", lambda *a: shown.append(("problems", a[2])))
+
+    assert dialog.verify_btn.isHidden()
+    dialog.show_finished("Exported 5 rows", str(tmp_path))
+    assert not dialog.verify_btn.isHidden() and dialog.cancel_btn.text() == "Close"
+    dialog.verify_btn.click()
+    (tmp_path / "a.csv").write_text("tampered")
+    dialog.verify_btn.click()
+    assert shown[0][0] == "ok"
+    assert shown[1][0] == "problems" and "a.csv: checksum mismatch" in shown[1][1]
+
+
+# ============================================================
+#  Key-range parallel export tests
+# ============================================================
+
+class FakeRangeCursor(FakeKeysetCursor):
+    """FakeKeysetCursor plus key ranges: MIN/MAX, an optional histogram and `key <= ?` bounds."""
+    def __init__(self, rows, key_meta=((1, "id", False),), histogram=None):
+        super().__init__(rows, key_meta=list(key_meta))
+        self.histogram = histogram
+
+    def execute(self, sql, params=()):
+        params = list(params)
+        self.executed.append((sql, params))
+        if "sys.indexes" in sql:
+            self._result = list(self.key_meta)
+        elif "TYPE_NAME" in sql:
+            self._result = [("int", 4, 10, 0)]
+        elif "dm_db_stats_histogram" in sql:
+            if self.histogram is None:
+                raise RuntimeError("Invalid object name 'sys.dm_db_stats_histogram'")
+            self._result = [(1, high, count) for high, count in self.histogram]
+        elif "MIN(" in sql:
+            ids = [r[0] for r in self.rows]
+            self._result = [(min(ids), max(ids))]
+        else:
+            self.description = [("id",), ("name",)]
+            limit = int(sql.split("TOP ")[1].split()[0])
+            rows = self.rows
+            if "<= ?" in sql:
+                upper = params.pop()
+                rows = [r for r in rows if r[0] <= upper]
+            if params:
+                rows = [r for r in rows if r[0] > params[0]]
+            self._result = rows[:limit]
+
+    def fetchone(self):
+        return self._result[0] if self._result else None
+
+
+def test_fetch_table_key_ranges_histogram_and_min_max():
+    from db.db_utils import fetch_table_key_ranges
+
+    rows = [(i, f"n{i}") for i in range(100)]
+    skewed = FakeRangeCursor(rows, histogram=[(100, 100), (200, 700), (300, 100), (400, 100)])
+    assert fetch_table_key_ranges(FakeKeysetConnection(skewed), "t", 2) == ("id", [(None, 200), (200, None)])
+
+    no_stats = FakeRangeCursor(rows)
+    key, ranges = fetch_table_key_ranges(FakeKeysetConnection(no_stats), "t", 4)
+    assert key == "id" and ranges == [(None, 24), (24, 49), (49, 74), (74, None)]
+
+    composite = FakeRangeCursor(rows, key_meta=[(1, "a", False), (1, "b", False)])
+    assert fetch_table_key_ranges(FakeKeysetConnection(composite), "t", 4) == (None, [(None, None)])
+
+
+def test_parallel_range_chunks_match_serial_order():
+    import threading
+    from core.database_export import iter_table_ranges_parallel
+
+    rows = [(i, f"n{i}") for i in range(1000)]
+    opened = []
+    lock = threading.Lock()
+
+    def factory():
+        with lock:
+            opened.append(1)
+        return FakeKeysetConnection(FakeRangeCursor(rows))
+
+    # depth 1 forces ranges ahead of the consumer to spill to disk
+    chunks = list(iter_table_ranges_parallel(factory, "t", partitions=4, chunk_size=30, buffer_depth=1))
+
+    assert [r for _, page in chunks for r in page] == rows
+    assert all(columns == ["id", "name"] for columns, _ in chunks)
+    assert len(opened) <= 4
+
+
+def test_parallel_range_chunks_cancel_every_reader():
+    from core.database_export import ParallelRangeChunks
+
+    class CancellableRangeCursor(FakeRangeCursor):
+        cancelled = 0
+        def cancel(self):
+            CancellableRangeCursor.cancelled += 1
+
+    rows = [(i, f"n{i}") for i in range(200)]
+    chunks = ParallelRangeChunks(lambda: FakeKeysetConnection(CancellableRangeCursor(rows)), "t",
+                                 partitions=2, chunk_size=10)
+    read = [row for _, chunk in chunks for row in chunk]
+    assert read == rows
+    chunks.cancel()
+    assert chunks._connections   # pooled reader connections, reused between ranges
+    assert CancellableRangeCursor.cancelled == len(chunks._connections)
+    chunks.close()
+
+
+# ============================================================
+#  Compressed / split export tests
+# ============================================================
+
+def test_text_writers_compress_on_the_fly(tmp_path):
+    import gzip, json, lzma, os
+    from core.export_writers import open_export_writer, compressed_file_path
+
+    rows = [(i, f"name {i}") for i in range(2000)]
+    path = compressed_file_path(str(tmp_path / "out.csv"), "gzip")
+    writer = open_export_writer("CSV", path, ["id", "name"], compression="gzip", level=9)
+    for start in range(0, 2000, 500):
+        writer.write_rows(rows[start:start + 500])
+    writer.close()
+    assert path.endswith("out.csv.gz")
+    lines = gzip.open(path, "rt", encoding="utf-8").read().splitlines()
+    assert lines[0] == "id,name" and lines[-1] == "1999,name 1999" and len(lines) == 2001
+    assert writer.bytes_written == os.path.getsize(path)
+
+    path = str(tmp_path / "out.json.xz")
+    writer = open_export_writer("JSON", path, ["id", "name"], compression="xz", level=1)
+    writer.write_rows(rows[:10])
+    writer.close()
+    assert json.loads(lzma.open(path, "rt", encoding="utf-8").read())[9] == {"id": 9, "name": "name 9"}
+
+
+def test_text_writer_splits_into_complete_parts(tmp_path):
+    import gzip, json, os
+    from core.export_writers import open_export_writer
+
+    rows = [(i, "x" * 50) for i in range(1000)]
+    writer = open_export_writer("JSON", str(tmp_path / "out.json"), ["id", "v"], split_size=10_000)
+    for start in range(0, 1000, 100):
+        writer.write_rows(rows[start:start + 100])
+    writer.close()
+    assert len(writer.files) > 2
+    assert os.path.basename(writer.files[1]) == "out.part002.json"
+    ids = [r["id"] for path in writer.files for r in json.loads(open(path, encoding="utf-8").read())]
+    assert ids == list(range(1000))
+
+    writer = open_export_writer("CSV", str(tmp_path / "out.csv.gz"), ["id", "v"],
+                                compression="gzip", split_size=2_000)
+    for start in range(0, 1000, 100):
+        writer.write_rows(rows[start:start + 100])
+    writer.close()
+    assert os.path.basename(writer.files[0]) == "out.part001.csv.gz"
+    parts = [gzip.open(path, "rt").read().splitlines() for path in writer.files]
+    assert all(part[0] == "id,v" for part in parts)
+    assert sum(len(part) - 1 for part in parts) == 1000
+
+
+# ============================================================
+#  JSON / JSON Lines export tests
+# ============================================================
+
+def test_json_writers_serialize_driver_types(tmp_path):
+    import datetime, decimal, json, uuid
+    from core.export_writers import open_export_writer
+
+    headers = ["id", "amount", "created", "payload", "guid", "note"]
+    rows = [
+        (1, decimal.Decimal("12345678901234567890.12"), datetime.datetime(2024, 5, 1, 8, 30, 0, 250000),
+         b"\x00\xff", uuid.UUID(int=1), None),
+        (2, decimal.Decimal("0.50"), datetime.datetime(2024, 5, 2), b"", uuid.UUID(int=2), "ü"),
+    ]
+    expected = {
+        "id": 1, "amount": "12345678901234567890.12", "created": "2024-05-01T08:30:00.250000",
+        "payload": "AP8=", "guid": "00000000-0000-0000-0000-000000000001", "note": None,
+    }
+
+    for fmt in ("JSON", "JSON Lines"):
+        writer = open_export_writer(fmt, str(tmp_path / f"out.{fmt}"), headers)
+        writer.write_rows(rows[:1])
+        writer.write_rows([])
+        writer.write_rows(rows[1:])
+        writer.close()
+
+    text = (tmp_path / "out.JSON").read_text(encoding="utf-8")
+    assert json.loads(text)[0] == expected and json.loads(text)[1]["note"] == "ü"
+    assert "\n  " not in text   # compact records, one per line
+
+    lines = (tmp_path / "out.JSON Lines").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 2 and json.loads(lines[0]) == expected
+
+
+
+# ============================================================
+#  Resumable export tests
+# ============================================================
+
+def test_export_resumes_from_checkpoint_and_verifies(qtbot, tmp_path, monkeypatch):
+    import datetime, json
+    from PyQt5.QtWidgets import QMessageBox
+    from core.export_checkpoint import ExportCheckpoint
+    from core.export_utils import ExportWorker, verify_export_file
+    from db.db_utils import fetch_full_table_paginated
+
+    class FlakyCursor(FakeKeysetCursor):
+        pages = 0
+        def execute(self, sql, params=()):
+            if "TOP" in sql:
+                self.pages += 1
+                if self.pages == 3:
+                    raise ConnectionError("Communication link failure")
+            super().execute(sql, params)
+
+    rows = [(i, f"n{i}") for i in range(50)]
+    path = tmp_path / "t.json"
+    checkpoint = ExportCheckpoint(str(path), "t", "JSON", ["id"], 10)
+    worker = ExportWorker(
+        fetch_full_table_paginated(FakeKeysetConnection(FlakyCursor(rows, [(1, "id", False)])), "t", 10),
+        str(path), "JSON", total_rows=50, checkpoint=checkpoint,
+    )
+    failed = []
+    worker.failed.connect(failed.append)
+    worker.run()
+
+    assert failed and "20 rows were saved" in failed[0]
+    saved = ExportCheckpoint.load(str(path))
+    assert saved.rows == 20 and saved.last_key == [19] and saved.resumable
+    assert saved.verify() == ["t.json: export not finished (20 rows so far)"]
+
+    # Reconnect and continue after the last saved key
+    cursor = FakeKeysetCursor(rows, [(1, "id", False)])
+    worker = ExportWorker(
+        fetch_full_table_paginated(FakeKeysetConnection(cursor), "t", 10, after_key=saved.last_key),
+        str(path), "JSON", checkpoint=saved,
+    )
+    done = []
+    worker.finished.connect(done.append)
+    worker.run()
+
+    assert done and "50 rows" in done[0]
+    assert [r["id"] for r in json.loads(path.read_text(encoding="utf-8"))] == list(range(50))
+    assert cursor.executed[1][1] == [19]   # first page read starts after the checkpoint key
+    record = ExportCheckpoint.load(str(path))
+    assert record.status == "complete" and record.rows == 50 and record.offset == path.stat().st_size
+    assert record.verify() == []
+
+    # "Verify File" on the success message checks the file against that record
+    shown = []
+    monkeypatch.setattr(QMessageBox, "information", lambda *a: shown.append(("ok", a[2])))
+    monkeypatch.setattr(QMessageBox, "warning", lambda *a: shown.append(("problems", a[2])))
+    assert verify_export_file(None, str(path)) == [] and "50 rows" in shown[-1][1]
+    path.write_text("[]", encoding="utf-8")
+    assert "checksum mismatch" in verify_export_file(None, str(path))[-1]
+    assert shown[-1][0] == "problems"
+
+    # Typed key values survive the JSON sidecar
+    checkpoint.update(1, 0, [datetime.datetime(2024, 1, 2, 3, 4, 5, 6), b"\x01"])
+    assert ExportCheckpoint.load(str(path)).last_key == [datetime.datetime(2024, 1, 2, 3, 4, 5, 6), b"\x01"]
+
+
+# ============================================================
+#  Streaming import tests
+# ============================================================
+
+class FakeInsertCursor:
+    # sys.columns: name, type, max_length (bytes), precision, scale, is_nullable
+    columns = [("id", "int", 4, 10, 0, False), ("name", "nvarchar", 10, 0, 0, True)]
+    def __init__(self, log):
+        self.log = log
+    def execute(self, sql, params=()):
+        self.log.append(("execute", sql))
+    def fetchall(self):
+        return list(self.columns)
+    def executemany(self, sql, values):
+        self.log.append(("executemany", list(values)))
+    def close(self):
+        pass
+
+
+class FakeInsertConnection:
+    def __init__(self):
+        self.log = []
+        self.autocommit = True
+    def cursor(self):
+        return FakeInsertCursor(self.log)
+    def commit(self):
+        self.log.append(("commit", self.autocommit))
+    def rollback(self):
+        self.log.append(("rollback", self.autocommit))
+    def close(self):
+        self.log.append(("close",))
+
+
+def test_import_worker_streams_chunks_in_one_transaction(tmp_path):
+    from core.import_pipeline import ImportWorker, iter_file_chunks
+
+    path = tmp_path / "in.jsonl"
+    path.write_text("".join(f'{{"ID": {i}, "Name": "name{i}", "skip": 1}}\n' for i in range(25)), encoding="utf-8")
+    assert [len(df) for df, _ in iter_file_chunks(str(path), 10)] == [10, 10, 5]
+
+    conn = FakeInsertConnection()
+    worker = ImportWorker(conn, "t", str(path), {"ID": "id", "Name": "name", "skip": None},
+                          chunk_size=10, owns_connection=False)
+    done = []
+    worker.finished.connect(lambda rows, msg: done.append(rows))
+    worker.run()
+
+    assert done == [25]
+    batches = [entry[1] for entry in conn.log if entry[0] == "executemany"]
+    assert [len(b) for b in batches] == [10, 10, 5]
+    assert batches[2][-1] == (24, "name2")   # trimmed to the column's length
+    assert ("commit", False) in conn.log and conn.autocommit   # committed once, autocommit restored
+
+    # A bad value in a later chunk rolls the whole import back and names its file row
+    path.write_text("".join(f'{{"ID": "{i if i != 13 else "x"}"}}\n' for i in range(25)), encoding="utf-8")
+    conn = FakeInsertConnection()
+    worker = ImportWorker(conn, "t", str(path), {"ID": "id"}, chunk_size=10, owns_connection=False)
+    failed = []
+    worker.failed.connect(failed.append)
+    worker.run()
+
+    assert failed and "'x' (row 14)" in failed[0] and "not whole numbers" in failed[0]
+    assert ("rollback", False) in conn.log and not any(e[0] == "commit" for e in conn.log)
+
+
+def test_import_worker_commits_in_batches_and_resumes_from_checkpoint(tmp_path):
+    import os
+    from core.import_checkpoint import ImportCheckpoint
+    from core.import_pipeline import ImportWorker
+
+    path = tmp_path / "in.jsonl"
+    path.write_text("".join(f'{{"ID": {i}}}\n' for i in range(25)), encoding="utf-8")
+    mapping = {"ID": "id"}
+
+    class DropsOnThirdChunk(FakeInsertConnection):
+        def cursor(self):
+            cursor = FakeInsertCursor(self.log)
+            def executemany(sql, values):
+                if sum(e[0] == "executemany" for e in self.log) == 2:
+                    raise RuntimeError("connection lost")
+                self.log.append(("executemany", list(values)))
+            cursor.executemany = executemany
+            return cursor
+
+    target = {"checkpoint_dir": str(tmp_path / "checkpoints"), "server": "SQL01", "database": "sales"}
+    checkpoint = ImportCheckpoint(str(path), "t", mapping, chunk_size=10, commit_every=10, **target)
+    conn = DropsOnThirdChunk()
+    worker = ImportWorker(conn, "t", str(path), mapping, chunk_size=10, owns_connection=False,
+                          commit_every=10, checkpoint=checkpoint)
+    failed = []
+    worker.failed.connect(failed.append)
+    worker.run()
+
+    assert failed and "connection lost" in failed[0] and "20 rows committed" in failed[0]
+    assert worker.rows_committed == 20   # the GUI refreshes its caches for these
+    assert [e[0] for e in conn.log if e[0] in ("commit", "rollback")] == ["commit", "commit", "rollback"]
+    saved = ImportCheckpoint.load(str(path), "t", **target)
+    assert saved.rows == 20 and saved.resumable and saved.mapping == mapping
+    # The same file and table name in another database or on another server is a different import
+    assert ImportCheckpoint.load(str(path), "t", **{**target, "database": "sales_test"}) is None
+    assert ImportCheckpoint.load(str(path), "t", **{**target, "server": "SQL02"}) is None
+    assert saved.matches(str(path), "T", "sql01", "SALES") and not saved.matches(str(path), "t", "SQL01", "hr")
+
+    # Resuming skips the committed rows and removes the checkpoint once done
+    conn = FakeInsertConnection()
+    worker = ImportWorker(conn, "t", str(path), saved.mapping, chunk_size=saved.chunk_size,
+                          owns_connection=False, commit_every=saved.commit_every, checkpoint=saved)
+    done = []
+    worker.finished.connect(lambda rows, msg: done.append((rows, msg)))
+    worker.run()
+
+    assert done and done[0][0] == 5 and "resumed after 20 rows" in done[0][1]
+    assert [e[1] for e in conn.log if e[0] == "executemany"] == [[(i,) for i in range(20, 25)]]
+    assert not os.path.exists(saved.path)
+
+    # A changed source file cannot be resumed
+    saved.update(20)
+    path.write_text('{"ID": 1}\n', encoding="utf-8")
+    assert not ImportCheckpoint.load(str(path), "t", **target).resumable
+
+
+def test_validate_insert_frame_converts_and_reports_all_problems():
+    import datetime
+    import pandas as pd
+    from db.insert_validation import InsertValidationError, validate_insert_frame
+
+    meta = {
+        "qty": {"type": "smallint", "maxlen": None, "precision": 5, "scale": 0, "nullable": True},
+        "price": {"type": "decimal", "maxlen": None, "precision": 5, "scale": 2, "nullable": True},
+        "day": {"type": "date", "maxlen": None, "precision": 10, "scale": 0, "nullable": True},
+        "flag": {"type": "bit", "maxlen": None, "precision": 1, "scale": 0, "nullable": False},
+        "code": {"type": "nvarchar", "maxlen": 3, "precision": 0, "scale": 0, "nullable": True},
+    }
+    good = pd.DataFrame({
+        "qty": [" 7 ", "", None], "price": ["1.25", "999.99", None],
+        "day": ["2024-05-01", None, "2024-05-03"], "flag": ["yes", "0", "True"],
+        "code": ["abcdef", None, "xy"],
+    })
+    out = validate_insert_frame(good, meta)
+    assert out["qty"].tolist()[0] == 7 and out["qty"].isna().tolist()[1:] == [True, True]
+    assert out["price"].tolist()[:2] == ["1.25", "999.99"]   # decimals go in as exact text
+    assert out["day"].tolist()[0] == datetime.date(2024, 5, 1)
+    assert out["flag"].tolist() == [True, False, True]
+    assert out["code"].tolist()[0] == "abc" and pd.isna(out["code"].tolist()[1])   # no "nan" strings
+
+    bad = pd.DataFrame({
+        "qty": ["1", "40000", "2.5"], "price": ["1000", "1", "1"], "day": ["x", "2024-01-01", None],
+        "flag": ["maybe", None, "1"], "code": ["a", "b", "c"],
+    })
+    with pytest.raises(InsertValidationError) as err:
+        validate_insert_frame(bad, meta, first_row=101)
+    problems = {p[0]: p for p in err.value.problems}
+    assert problems["qty"][3] == 2 and problems["qty"][4] == [(102, "40000"), (103, "2.5")]
+    assert "too large for decimal(5,2)" in problems["price"][2]
+    assert problems["day"][4] == [(101, "x")]
+    assert [p[2] for p in err.value.problems if p[0] == "flag"] == [
+        "value(s) that are not true/false", "empty value(s) in a NOT NULL column"]
+    assert str(err.value).startswith("❌ 6 value(s) cannot be stored")
+
+    # Decimal text goes in as written, so only plain numbers pass
+    out = validate_insert_frame(pd.DataFrame({"price": [" 12 ", "-.5"]}), meta)
+    assert out["price"].tolist() == ["12", "-.5"]
+    with pytest.raises(InsertValidationError) as err:
+        validate_insert_frame(pd.DataFrame({"price": ["1e3", "inf", "1,000", "7"]}), meta)
+    (problem,) = err.value.problems
+    assert problem[2:4] == ("value(s) that are not numbers", 3)
+
+    # Floats beyond the type's range are not "not numbers"
+    with pytest.raises(InsertValidationError) as err:
+        validate_insert_frame(pd.DataFrame({"ratio": ["1.5", "1e39", "inf"]}),
+                              {"ratio": {"type": "real", "maxlen": None, "precision": 24, "scale": 0,
+                                         "nullable": True}})
+    assert err.value.problems[0][2:4] == ("value(s) outside ±3.4e+38", 2)
+
+    # time(7) / datetime2(7) values with 100 ns fractions, mixed with other layouts
+    fine = {
+        "at": {"type": "time", "maxlen": None, "precision": 16, "scale": 7, "nullable": True},
+        "stamp": {"type": "datetime2", "maxlen": None, "precision": 27, "scale": 7, "nullable": True},
+    }
+    out = validate_insert_frame(pd.DataFrame({
+        "at": ["08:30:00.1234567", "2024-01-01 09:15:00", None],
+        "stamp": ["2024-05-01T08:30:00.1234567", "05/01/2024 08:30:00.1234567", None],
+    }), fine)
+    assert out["at"].tolist()[:2] == [datetime.time(8, 30, 0, 123456), datetime.time(9, 15)]
+    assert [t.nanosecond for t in out["stamp"].tolist()[:1]] == [700]
+    assert out["stamp"].tolist()[1].month == 5 and pd.isna(out["stamp"].tolist()[2])
+
+    # The whole SQL Server date range, beyond what nanosecond timestamps hold (1677..2262)
+    edges = {name: {"type": name, "maxlen": None, "precision": 27, "scale": scale, "nullable": True}
+             for name, scale in (("date", 0), ("datetime2", 7), ("datetime", 3))}
+    out = validate_insert_frame(pd.DataFrame({
+        "date": ["0001-01-01", "9999-12-31"],
+        "datetime2": ["0001-01-01", "9999-12-31 23:59:59.1234567"],
+        "datetime": ["1753-01-01", "9999-12-31"],
+    }), edges)
+    assert out["date"].tolist() == [datetime.date(1, 1, 1), datetime.date(9999, 12, 31)]
+    assert [t.year for t in out["datetime2"].tolist()] == [1, 9999]
+    assert out["datetime"].tolist()[1] == pd.Timestamp("9999-12-31")
+    with pytest.raises(InsertValidationError) as err:
+        validate_insert_frame(pd.DataFrame({"datetime": ["0001-01-01", "9999-12-31"]}), edges)
+    assert err.value.problems[0][2:] == ("value(s) outside the datetime range", 1, [(1, "0001-01-01")])
+
+
+# ============================================================
+#  Bulk-load strategy tests
+# ============================================================
+
+class FakeBulkCursor:
+    def __init__(self, conn):
+        self.conn = conn
+    def execute(self, sql, params=()):
+        if any(word in sql for word in self.conn.refuse):
+            raise PermissionError(f"refused: {sql.split()[0]}")
+        if sql.startswith("BULK INSERT"):
+            path = sql.split("'")[1]
+            with open(path, encoding="utf-8") as f:
+                self.conn.staged.append(f.read())
+        self.conn.executed.append((sql, params))
+    def executemany(self, sql, rows):
+        self.conn.executed.append((sql, list(rows)))
+    def close(self):
+        pass
+
+
+class FakeBulkConnection:
+    def __init__(self, refuse=()):
+        self.refuse = refuse
+        self.executed = []
+        self.staged = []
+        self.autocommit = False
+    def cursor(self):
+        return FakeBulkCursor(self)
+    def commit(self):
+        pass
+
+
+def test_bulk_load_strategies_selection_and_statements(tmp_path):
+    import pandas as pd
+    from db.bulk_load import bulk_load_candidates, open_bulk_loader, FileBulkLoader
+
+    meta = {
+        "id": {"type": "int", "maxlen": None, "precision": 10, "scale": 0, "nullable": False},
+        "name": {"type": "nvarchar", "maxlen": 20, "precision": 0, "scale": 0, "nullable": True},
+        "at": {"type": "datetime", "maxlen": None, "precision": 23, "scale": 3, "nullable": True},
+        "blob": {"type": "varbinary", "maxlen": None, "precision": 0, "scale": 0, "nullable": True},
+    }
+    cols = ["id", "name", "at"]
+    assert bulk_load_candidates(meta, cols, 500) == ["executemany"]
+    assert bulk_load_candidates(meta, cols, 50_000) == ["tvp", "executemany"]
+    assert bulk_load_candidates(meta, cols, 5_000_000) == ["bulk_insert", "tvp", "executemany"]
+    assert bulk_load_candidates(meta, cols + ["blob"], 5_000_000) == ["tvp", "executemany"]
+
+    df = pd.DataFrame({"id": [1, 2], "name": ["a,b", None],
+                       "at": pd.to_datetime(["2024-05-01 08:30:00.123456", None])})
+
+    # TVP: a table type for the load, one INSERT ... SELECT per chunk, dropped on close
+    conn = FakeBulkConnection()
+    loader = open_bulk_loader(conn, "t", cols, meta, estimated_rows=50_000)
+    assert loader.name == "tvp" and loader.load(df) == 2
+    loader.close()
+    create, insert, drop = conn.executed
+    assert "([id] int, [name] nvarchar(20), [at] datetime)" in create[0]
+    assert insert[0] == "INSERT INTO [t] ([id], [name], [at]) SELECT [id], [name], [at] FROM ?"
+    tvp = insert[1][0]
+    assert tvp[:2] == [loader.type_name, "dbo"] and tvp[2][:2] == (1, "a,b") and tvp[3][1:] == (None, None)
+    assert "DROP TYPE" in drop[0]
+
+    # No permission for CREATE TYPE: falls back to executemany
+    conn = FakeBulkConnection(refuse=("CREATE TYPE",))
+    loader = open_bulk_loader(conn, "t", cols, meta, estimated_rows=50_000)
+    assert loader.name == "executemany"
+    loader.load(df)
+    assert conn.executed[-1][0].startswith("INSERT INTO [t] ([id], [name], [at]) VALUES (?, ?, ?)")
+
+    # Staged file: probe with an empty file, BULK INSERT into #stage, then INSERT ... SELECT
+    conn = FakeBulkConnection()
+    loader = FileBulkLoader(conn, "t", cols, meta, staging_dir=str(tmp_path))
+    loader.load(df)
+    loader.flush()
+    loader.close()
+    assert conn.staged == ["", '1,"a,b",2024-05-01 08:30:00.123\n2,,\n']
+
+    # Empty strings are quoted so KEEPNULLS keeps them apart from NULLs
+    conn = FakeBulkConnection()
+    loader = FileBulkLoader(conn, "t", ["id", "name"], meta, staging_dir=str(tmp_path))
+    loader.load(pd.DataFrame({"id": [1, 2, 3], "name": ["", None, 'say "hi"']}))
+    loader.flush()
+    loader.close()
+    assert conn.staged == ["", '1,""\n2,\n3,"say ""hi"""\n']
+    assert any(sql.startswith("INSERT INTO [t]") and loader.stage_table in sql for sql, _ in conn.executed)
+    assert list(tmp_path.iterdir()) == []   # staging file removed
+
+
+def test_parallel_import_stages_rows_and_moves_them_at_once(tmp_path):
+    from core.import_pipeline import ParallelImportWorker
+
+    def run(text, atomic=True):
+        path = tmp_path / "in.csv"
+        path.write_text("ID,Name\n" + text, encoding="utf-8")
+        writers = []
+        def factory():
+            writers.append(FakeInsertConnection())
+            return writers[-1]
+        coordinator = FakeInsertConnection()
+        worker = ParallelImportWorker(coordinator, "t", str(path), {"ID": "id", "Name": "name"}, factory,
+                                      workers=3, atomic=atomic, tablock=True, chunk_size=10,
+                                      owns_connection=False)
+        outcome = []
+        worker.finished.connect(lambda rows, msg: outcome.append((rows, msg)))
+        worker.failed.connect(lambda err: outcome.append(err))
+        worker.run()
+        return outcome, coordinator, writers, worker
+
+    outcome, coordinator, writers, worker = run("".join(f"{i},n{i}\n" for i in range(95)))
+    (rows, msg), = outcome
+    assert rows == 95 and "Connection 3 (" in msg
+    sqls = [entry[1] for entry in coordinator.log if entry[0] == "execute"]
+    stage = sqls[1].split("[")[1].split("]")[0]
+    assert stage.startswith("##esqli_import_") and sqls[1].startswith("CREATE TABLE")
+    assert sqls[2] == f"INSERT INTO [t] WITH (TABLOCK) ([id], [name]) SELECT [id], [name] FROM [{stage}]"
+    assert "DROP TABLE" in sqls[3]
+    batches = [e[1] for w in writers for e in w.log if e[0] == "executemany"]
+    assert sorted(r[0] for b in batches for r in b) == list(range(95))
+    assert all(("commit", False) in w.log for w in writers if any(e[0] == "executemany" for e in w.log))
+
+    # One bad chunk: nothing reaches the table and the staging table is dropped
+    outcome, coordinator, writers, worker = run("".join(f"{i if i != 56 else 'x'},n{i}\n" for i in range(95)))
+    assert "'x' (row 57)" in outcome[0] and worker.rows_committed == 0
+    sqls = [entry[1] for entry in coordinator.log if entry[0] == "execute"]
+    assert not any(sql.startswith("INSERT INTO [t]") for sql in sqls) and "DROP TABLE" in sqls[-1]
+
+    # Not all or nothing: the chunks committed before the bad one stay in the table
+    outcome, coordinator, writers, worker = run(
+        "".join(f"{i if i != 94 else 'x'},n{i}\n" for i in range(95)), atomic=False)
+    assert "'x' (row 95)" in outcome[0] and worker.rows_committed >= 70
+    assert f"{worker.rows_committed:,} rows were already committed" in outcome[0]